@@ -0,0 +1,263 @@
+"""
+Local stand-in web server that injects faults, for load-testing the crawl
+pipeline (`ConcurrencyManager`, `retry_with_backoff`, the DLQ) offline.
+
+Pages come from `synthetic_site.render_page`. Every request first waits for
+a latency drawn from a `LatencyModel`, then may be turned into one fault:
+
+- 'timeout': the server hangs past the client's timeout, then drops the
+  connection without answering.
+- 'reset': the connection is closed abruptly (RST) without a response.
+- 'throttle': HTTP 429 with a `Retry-After` header.
+- 'burst': HTTP 503; once a burst starts, the next `burst_length - 1`
+  requests to the server fail too (a flapping backend).
+- 'drip': a normal page whose body trickles out in small chunks.
+- 'huge': a large `application/octet-stream` body instead of HTML.
+"""
+
+import math
+import random
+import socket
+import struct
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+try:
+    from .synthetic_site import page_id_for, render_page
+except ImportError:
+    from synthetic_site import page_id_for, render_page
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'lognormal', 'pareto')
+FAULTS = ('timeout', 'reset', 'throttle', 'burst', 'drip', 'huge')
+DRIP_CHUNK_BYTES = 256
+HUGE_CHUNK_BYTES = 64 * 1024
+
+
+class LatencyModel:
+    """
+    Per-request latency distribution, parameterized by its median.
+
+    Args:
+        kind (str): 'fixed', 'uniform' (0 to 2x median), 'lognormal'
+            (spread set by `sigma`) or 'pareto' (heavy tail; shape `alpha`).
+        median (float): Median latency in seconds.
+        sigma (float): Log-space standard deviation for 'lognormal'.
+        alpha (float): Shape for 'pareto'; smaller means a heavier tail.
+    """
+
+    def __init__(self, kind='fixed', median=0.0, sigma=0.5, alpha=2.0):
+        if kind not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.kind = kind
+        self.median = median
+        self.sigma = sigma
+        self.alpha = alpha
+
+    def sample(self, rng):
+        if self.median <= 0 or self.kind == 'fixed':
+            return max(self.median, 0.0)
+        if self.kind == 'uniform':
+            return rng.uniform(0, 2 * self.median)
+        if self.kind == 'lognormal':
+            return self.median * math.exp(self.sigma * rng.gauss(0, 1))
+        # Pareto scaled so its median is `median`
+        return self.median * rng.paretovariate(self.alpha) / 2 ** (1 / self.alpha)
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+class FaultSpec:
+    """
+    Which faults to inject, and how often.
+
+    Args:
+        rates (dict): {fault name: probability per request}, fault names from
+            FAULTS. The probabilities are checked in FAULTS order and must
+            sum to at most 1.
+        hang_seconds (float): How long a 'timeout' hangs; set it above the
+            client's request timeout.
+        retry_after (int): Seconds advertised in 429 `Retry-After`.
+        burst_length (int): Consecutive 503s per burst.
+        drip_seconds (float): Total time a 'drip' body takes to send.
+        huge_bytes (int): Body size of a 'huge' response.
+    """
+
+    def __init__(self, rates=None, hang_seconds=20.0, retry_after=1,
+                 burst_length=20, drip_seconds=2.0, huge_bytes=20 * 1024 * 1024):
+        rates = {name: rate for name, rate in (rates or {}).items() if rate}
+        unknown = set(rates) - set(FAULTS)
+        if unknown:
+            raise ValueError(f"Unknown fault(s): {', '.join(sorted(unknown))}")
+        if sum(rates.values()) > 1:
+            raise ValueError("Fault rates must sum to at most 1")
+        self.rates = rates
+        self.hang_seconds = hang_seconds
+        self.retry_after = retry_after
+        self.burst_length = burst_length
+        self.drip_seconds = drip_seconds
+        self.huge_bytes = huge_bytes
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+class FaultInjectingServer:
+    """
+    Serves one synthetic site with injected latency and faults from a
+    background thread. Counts every request by outcome (`stats()`), so a
+    driver can compare what the server saw with what the crawler reported.
+
+    Args:
+        spec (SiteSpec): The site to serve.
+        faults (FaultSpec, optional): Faults to inject; none by default.
+        latency (LatencyModel, optional): Added before every response.
+        seed (int): Seeds the fault/latency draws.
+    """
+
+    def __init__(self, spec, faults=None, latency=None, seed=0,
+                 host="127.0.0.1", port=0):
+        self.spec = spec
+        self.faults = faults or FaultSpec()
+        self.latency = latency or LatencyModel()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._burst_remaining = 0
+        self._outcomes = Counter()
+        self._paths = set()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # See SyntheticSiteServer
+
+            def do_GET(handler):
+                path = urlparse(handler.path).path
+                delay, fault = server._draw(path)
+                if delay:
+                    time.sleep(delay)
+                server._serve(handler, path, fault)
+
+            def log_message(handler, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://{host}:{self.server.server_port}/"
+
+    def _draw(self, path):
+        """Picks latency and fault for one request (under the lock)."""
+        with self._lock:
+            self._paths.add(path)
+            delay = self.latency.sample(self._rng)
+            if self._burst_remaining:
+                self._burst_remaining -= 1
+                return delay, 'burst'
+            roll = self._rng.random()
+            for fault in FAULTS:
+                rate = self.faults.rates.get(fault, 0)
+                if roll < rate:
+                    if fault == 'burst':
+                        self._burst_remaining = self.faults.burst_length - 1
+                    return delay, fault
+                roll -= rate
+            return delay, None
+
+    def _count(self, outcome):
+        with self._lock:
+            self._outcomes[outcome] += 1
+
+    def _serve(self, handler, path, fault):
+        faults = self.faults
+        if fault in ('timeout', 'reset'):
+            if fault == 'timeout':
+                time.sleep(faults.hang_seconds)
+            # Linger 0: close() sends RST instead of a graceful FIN
+            handler.connection.setsockopt(
+                socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0)
+            )
+            handler.close_connection = True
+            self._count(fault)
+            return
+        if fault == 'throttle':
+            self._send(handler, 429, b"Too Many Requests",
+                       {'Retry-After': str(faults.retry_after)})
+            self._count(fault)
+            return
+        if fault == 'burst':
+            self._send(handler, 503, b"Service Unavailable")
+            self._count(fault)
+            return
+        if fault == 'huge':
+            handler.send_response(200)
+            handler.send_header('Content-Type', 'application/octet-stream')
+            handler.send_header('Content-Length', str(faults.huge_bytes))
+            handler.end_headers()
+            chunk = b"\0" * HUGE_CHUNK_BYTES
+            remaining = faults.huge_bytes
+            try:
+                while remaining > 0:
+                    handler.wfile.write(chunk[:remaining])
+                    remaining -= HUGE_CHUNK_BYTES
+            except OSError:
+                pass  # Client gave up
+            self._count(fault)
+            return
+
+        status, body = render_page(self.spec, page_id_for(path))
+        if fault == 'drip':
+            handler.send_response(status)
+            handler.send_header('Content-Type', 'text/html; charset=utf-8')
+            handler.send_header('Content-Length', str(len(body)))
+            handler.end_headers()
+            chunks = range(0, len(body), DRIP_CHUNK_BYTES)
+            pause = faults.drip_seconds / max(len(chunks), 1)
+            try:
+                for start in chunks:
+                    handler.wfile.write(body[start:start + DRIP_CHUNK_BYTES])
+                    time.sleep(pause)
+            except OSError:
+                pass
+            self._count(fault)
+            return
+        self._send(handler, status, body)
+        self._count(status)
+
+    @staticmethod
+    def _send(handler, status, body, headers=None):
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'text/html; charset=utf-8')
+        handler.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def stats(self):
+        """{'requests': n, 'distinct_paths': n, 'outcomes': {outcome: n}}."""
+        with self._lock:
+            return {
+                'requests': sum(self._outcomes.values()),
+                'distinct_paths': len(self._paths),
+                'outcomes': {str(k): v for k, v in sorted(
+                    self._outcomes.items(), key=lambda item: str(item[0]))},
+            }
+
+    def start(self):
+        threading.Thread(
+            target=self.server.serve_forever, name="FaultInjectingServer", daemon=True
+        ).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
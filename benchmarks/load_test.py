@@ -0,0 +1,227 @@
+"""
+Load-test driver: full `ConcurrencyManager` batches against fault-injecting
+local servers (see `fault_server`).
+
+    python -m benchmarks.load_test --sites 8 --pages 300 --workers 4 8 16 32 \\
+        --latency lognormal --latency-ms 80 --reset-rate 0.01 \\
+        --throttle-rate 0.02 --burst-rate 0.002 --output load.json
+
+Each worker count in `--workers` is one batch against fresh servers. The
+report gives, per batch: throughput (pages/s, tasks/s), fetch and task
+tail latency, retry amplification (requests the servers received per
+distinct page requested), status/DLQ rates and the server-side fault
+counts. The saturation point is the first worker count after which adding
+workers raised throughput by less than `--saturation-gain`.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from benchmarks.fault_server import (  # noqa: E402
+    FAULTS, LATENCY_DISTRIBUTIONS, FaultInjectingServer, FaultSpec, LatencyModel
+)
+from benchmarks.run import percentile  # noqa: E402
+from benchmarks.synthetic_site import NAV_SELECTOR, SiteSpec  # noqa: E402
+from src import crawler, metrics, tracing  # noqa: E402
+from src.concurrency_manager import DLQ_FILE, ConcurrencyManager  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT = "load_test_results.json"
+DEFAULT_SATURATION_GAIN = 0.05  # <5% more throughput from more workers = saturated
+
+
+def _tail_ms(seconds):
+    tail = {
+        f"p{q}": round(percentile(seconds, q) * 1000, 2) if seconds else None
+        for q in (50, 95, 99)
+    }
+    tail['max'] = round(max(seconds) * 1000, 2) if seconds else None
+    return tail
+
+
+def run_batch(spec, faults, latency, sites, workers, max_per_domain=None,
+              task_timeout=None, seed=0, defer_retries=True):
+    """
+    Runs one batch of `sites` crawls with `workers` threads.
+
+    Returns:
+        dict: Throughput, latency, retry and DLQ figures for the batch.
+    """
+    servers = [
+        FaultInjectingServer(spec, faults, latency, seed=seed + i).start()
+        for i in range(sites)
+    ]
+    retries_before = metrics.RETRIES.value(function='fetch_html')
+    tracer = tracing.start_tracing()
+    previous_cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory(prefix="navmap_load_") as work_dir:
+            os.chdir(work_dir)  # Maps and dlq.log stay out of the tree
+            manager = ConcurrencyManager(
+                max_workers=workers, max_per_domain=max_per_domain,
+                task_timeout=task_timeout, defer_retries=defer_retries
+            )
+            started = time.perf_counter()
+            try:
+                results = manager.process_tasks(
+                    [(server.base_url, NAV_SELECTOR) for server in servers]
+                )
+            finally:
+                duration = time.perf_counter() - started
+                manager.shutdown()
+            dlq_entries = 0
+            if os.path.exists(DLQ_FILE):
+                with open(DLQ_FILE, encoding='utf-8') as f:
+                    dlq_entries = sum(1 for _ in f)
+    finally:
+        os.chdir(previous_cwd)
+        tracing.stop_tracing()
+        for server in servers:
+            server.stop()
+
+    server_stats = [server.stats() for server in servers]
+    requests_seen = sum(s['requests'] for s in server_stats)
+    distinct = sum(s['distinct_paths'] for s in server_stats)
+    outcomes = Counter()
+    for s in server_stats:
+        outcomes.update(s['outcomes'])
+    statuses = Counter(r.get('status') for r in results)
+    pages = sum(r.get('stats', {}).get('pages', 0) for r in results)
+    page_errors = sum(r.get('stats', {}).get('errors', 0) for r in results)
+    fetch_seconds = [
+        event['dur'] / 1e6 for event in tracer.events()
+        if event['ph'] == 'X' and event['name'] == 'fetch'
+    ]
+    return {
+        'workers': workers,
+        'sites': sites,
+        'duration_s': round(duration, 3),
+        'pages': pages,
+        'page_errors': page_errors,
+        'pages_per_sec': round(pages / duration, 2) if duration else None,
+        'tasks_per_sec': round(len(results) / duration, 3) if duration else None,
+        'fetch_latency_ms': _tail_ms(fetch_seconds),
+        'task_latency_ms': _tail_ms([r['duration'] for r in results if 'duration' in r]),
+        'server_requests': requests_seen,
+        'distinct_pages_requested': distinct,
+        'retry_amplification': round(requests_seen / distinct, 3) if distinct else None,
+        'client_retries': metrics.RETRIES.value(function='fetch_html') - retries_before,
+        'statuses': dict(statuses),
+        'dlq_entries': dlq_entries,
+        'dlq_rate': round(dlq_entries / len(results), 3) if results else None,
+        'server_outcomes': dict(outcomes),
+    }
+
+
+def saturation_point(batches, min_gain=DEFAULT_SATURATION_GAIN):
+    """
+    Returns the worker count beyond which throughput stopped improving by
+    at least `min_gain` (relative), or None if it kept improving.
+    """
+    ordered = sorted(batches, key=lambda b: b['workers'])
+    for previous, current in zip(ordered, ordered[1:]):
+        if not previous['pages_per_sec']:
+            continue
+        if current['pages_per_sec'] / previous['pages_per_sec'] - 1 < min_gain:
+            return previous['workers']
+    return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Stress ConcurrencyManager against fault-injecting local servers."
+    )
+    site = parser.add_argument_group("sites")
+    site.add_argument('--sites', type=int, default=8)
+    site.add_argument('--pages', type=int, default=200, help="Pages per site.")
+    site.add_argument('--fanout', type=int, default=10)
+    site.add_argument('--page-size', type=int, default=8192)
+    fault = parser.add_argument_group("latency and faults")
+    fault.add_argument('--latency', choices=LATENCY_DISTRIBUTIONS, default='lognormal')
+    fault.add_argument('--latency-ms', type=float, default=50.0, help="Median latency.")
+    fault.add_argument('--latency-sigma', type=float, default=0.6)
+    fault.add_argument('--latency-alpha', type=float, default=2.0)
+    for name in FAULTS:
+        fault.add_argument(f'--{name}-rate', type=float, default=0.0,
+                           help=f"Probability of a '{name}' fault per request.")
+    fault.add_argument('--hang-seconds', type=float,
+                       help="Duration of a 'timeout' hang (default: request timeout + 1).")
+    fault.add_argument('--retry-after', type=int, default=1)
+    fault.add_argument('--burst-length', type=int, default=20)
+    fault.add_argument('--drip-seconds', type=float, default=2.0)
+    fault.add_argument('--huge-mb', type=float, default=20.0)
+    run = parser.add_argument_group("crawler")
+    run.add_argument('--workers', type=int, nargs='+', default=[4, 8, 16, 32],
+                     help="Worker counts to sweep (one batch each).")
+    run.add_argument('--max-per-domain', type=int,
+                     help="Per-domain cap (default: none; all sites share 127.0.0.1).")
+    run.add_argument('--request-timeout', type=float, default=5.0,
+                     help="Client request timeout in seconds (default: %(default)s).")
+    run.add_argument('--task-timeout', type=float)
+    run.add_argument('--blocking-retries', action='store_true',
+                     help="Sleep through retry backoffs in the worker threads.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--saturation-gain', type=float, default=DEFAULT_SATURATION_GAIN)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--log-level', default='ERROR')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper())
+    # Load-test setting: bounds how long an injected hang can hold a worker
+    crawler.REQUEST_TIMEOUT_SECONDS = args.request_timeout
+    spec = SiteSpec(pages=args.pages, fanout=args.fanout, page_size=args.page_size)
+    faults = FaultSpec(
+        rates={name: getattr(args, f"{name}_rate") for name in FAULTS},
+        hang_seconds=args.hang_seconds or args.request_timeout + 1,
+        retry_after=args.retry_after, burst_length=args.burst_length,
+        drip_seconds=args.drip_seconds, huge_bytes=int(args.huge_mb * 1024 * 1024)
+    )
+    latency = LatencyModel(
+        args.latency, args.latency_ms / 1000, args.latency_sigma, args.latency_alpha
+    )
+
+    batches = []
+    for workers in args.workers:
+        batch = run_batch(
+            spec, faults, latency, args.sites, workers,
+            max_per_domain=args.max_per_domain, task_timeout=args.task_timeout,
+            seed=args.seed, defer_retries=not args.blocking_retries
+        )
+        batches.append(batch)
+        print(
+            f"workers={workers:<3} {batch['pages_per_sec']:>8} pages/s  "
+            f"fetch p99={batch['fetch_latency_ms']['p99']}ms  "
+            f"task p99={batch['task_latency_ms']['p99']}ms  "
+            f"amplification={batch['retry_amplification']}  "
+            f"dlq_rate={batch['dlq_rate']}  statuses={batch['statuses']}"
+        )
+    saturation = saturation_point(batches, args.saturation_gain)
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'site': spec.as_dict(), 'faults': faults.as_dict(),
+        'latency': latency.as_dict(), 'request_timeout': args.request_timeout,
+        'blocking_retries': args.blocking_retries,
+        'batches': batches, 'saturation_workers': saturation,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saturation point: {saturation if saturation else 'not reached'} workers")
+    print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
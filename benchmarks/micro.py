@@ -0,0 +1,301 @@
+"""
+Microbenchmarks for the crawler's hot pure-Python functions, with stored
+baselines and a regression check.
+
+    python -m benchmarks.micro                      # compare with baselines
+    python -m benchmarks.micro --quick              # smaller corpora, fewer repeats
+    python -m benchmarks.micro --update-baselines   # record current timings
+    python -m benchmarks.micro --only find_nav_links --tolerance 0.1
+
+Fixture corpora are generated deterministically (fixed seed), so every run
+times the same input. Each benchmark is timed as the best of several
+repeats (the least noisy estimate of its cost) and compared with the
+baseline for the same name; a run fails (exit code 1) when any benchmark is
+slower than baseline * (1 + tolerance). Baselines are only comparable on the
+machine that recorded them - update them there when changing hardware.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.crawler import find_nav_links, format_tree  # noqa: E402
+from src.csv_processor import process_csv_file, validate_url  # noqa: E402
+from src.utils import get_website_name  # noqa: E402
+
+BASELINES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+DEFAULT_TOLERANCE = 0.25  # Allowed slowdown before a benchmark counts as a regression
+DEFAULT_REPEAT = 5
+QUICK_REPEAT = 3
+MIN_BATCH_SECONDS = 0.2  # Calls per repeat are scaled up to at least this long
+SEED = 1234
+
+# Corpus sizes; --quick uses the second value
+NAV_LINKS = 3000
+TREE_DEPTH, TREE_FANOUT = 8, 4  # ~87k nodes
+URL_COUNT = 10_000
+CSV_ROWS = (1_000_000, 50_000)
+
+_WORDS = (
+    "products", "solutions", "pricing", "docs", "blog", "about", "careers",
+    "support", "contact", "enterprise", "developers", "api", "guides",
+    "community", "partners", "security", "status", "news", "events", "legal",
+)
+
+
+def build_nav_page(links=NAV_LINKS, seed=SEED):
+    """
+    A large mega-menu page: nested <nav> lists with `links` links (relative,
+    absolute, fragment and mailto), surrounded by ordinary page content.
+    """
+    rng = random.Random(seed)
+    items = []
+    for i in range(links):
+        kind = rng.random()
+        path = "/".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 4)))
+        if kind < 0.6:
+            href = f"/{path}/{i}"
+        elif kind < 0.85:
+            href = f"https://www.example.com/{path}/{i}?ref=nav"
+        elif kind < 0.95:
+            href = f"#section-{i}"
+        else:
+            href = f"mailto:team{i}@example.com"
+        label = " ".join(rng.choice(_WORDS).title() for _ in range(rng.randint(1, 3)))
+        items.append(f'<li class="menu-item"><a href="{href}"><span>{label}</span></a></li>')
+    groups = [
+        "<li><ul class=\"submenu\">" + "".join(items[i:i + 25]) + "</ul></li>"
+        for i in range(0, len(items), 25)
+    ]
+    body = "".join(
+        f"<section><h2>{rng.choice(_WORDS).title()}</h2><p>{' '.join(rng.choices(_WORDS, k=80))}</p></section>"
+        for _ in range(200)
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>Example</title></head><body>"
+        f"<header><nav class=\"main-nav\"><ul>{''.join(groups)}</ul></nav></header>"
+        f"<main>{body}</main><footer><a href=\"/privacy\">Privacy</a></footer>"
+        "</body></html>"
+    )
+
+
+def build_tree(depth=TREE_DEPTH, fanout=TREE_FANOUT):
+    """A crawl result (`crawl_navigation` shape) `depth` levels deep."""
+    counter = iter(range(10 ** 9))
+
+    def children(level):
+        if level >= depth:
+            return {}
+        nodes = {}
+        for _ in range(fanout):
+            n = next(counter)
+            nodes[f"https://www.example.com/section/{n}"] = {
+                'name': f"Section {n}", 'children': children(level + 1)
+            }
+        return nodes
+
+    return {"https://www.example.com/": {
+        'name': "https://www.example.com/", 'children': children(0)
+    }}
+
+
+def build_urls(count=URL_COUNT, seed=SEED):
+    """Mixed URLs: paths, ports, queries, IPs, IDNs and malformed entries."""
+    rng = random.Random(seed)
+    urls = []
+    for i in range(count):
+        kind = rng.random()
+        path = "/".join(rng.choice(_WORDS) for _ in range(rng.randint(0, 4)))
+        if kind < 0.7:
+            urls.append(f"https://www.{rng.choice(_WORDS)}{i}.com/{path}")
+        elif kind < 0.8:
+            urls.append(f"http://sub.{rng.choice(_WORDS)}.co.uk:8080/{path}?q={i}")
+        elif kind < 0.85:
+            urls.append(f"http://192.168.{i % 256}.{rng.randint(1, 254)}/{path}")
+        elif kind < 0.9:
+            urls.append(f"https://xn--bcher-kva{i}.example/{path}")
+        else:
+            urls.append(rng.choice(("not a url", "ftp://example.com", "http://", f"www.site{i}.com")))
+    return urls
+
+
+def write_csv(path, rows, seed=SEED):
+    """A `url,css_selector` CSV with `rows` rows (some invalid or duplicate)."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write("url,css_selector\n")
+        for i in range(rows):
+            kind = rng.random()
+            if kind < 0.02:
+                f.write(f"not-a-url-{i},nav\n")
+            elif kind < 0.04:
+                f.write(f"https://www.site{i // 2}.com/docs,nav.main\n")
+            else:
+                f.write(f"https://www.site{i}.com/{rng.choice(_WORDS)},#main-nav > ul\n")
+    return path
+
+
+def build_benchmarks(work_dir, quick=False):
+    """Returns {name: zero-argument callable} with fixtures already built."""
+    html = build_nav_page()
+    tree = build_tree()
+    urls = build_urls()
+    csv_rows = CSV_ROWS[1] if quick else CSV_ROWS[0]
+    csv_path = write_csv(os.path.join(work_dir, "bench.csv"), csv_rows)
+
+    def website_names():
+        for url in urls:
+            get_website_name(url)
+
+    def validate_urls():
+        for url in urls:
+            validate_url(url)
+
+    return {
+        f"find_nav_links[{NAV_LINKS} links]": lambda: find_nav_links(
+            html, "https://www.example.com/", "nav.main-nav"
+        ),
+        f"format_tree[depth {TREE_DEPTH} x {TREE_FANOUT}]": lambda: format_tree(tree),
+        f"get_website_name[{URL_COUNT} urls]": website_names,
+        f"validate_url[{URL_COUNT} urls]": validate_urls,
+        f"process_csv_file[{csv_rows} rows]": lambda: process_csv_file(csv_path),
+    }
+
+
+def time_callable(func, repeat=DEFAULT_REPEAT, min_batch=MIN_BATCH_SECONDS):
+    """
+    Times `func` like `timeit`: calls per batch are scaled until a batch takes
+    at least `min_batch`, then `repeat` batches are run.
+
+    Returns:
+        dict: Per-call seconds: 'min' (compared against baselines), 'median'.
+    """
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_batch:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_batch / elapsed) + 1)
+    timings = [elapsed / number]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - started) / number)
+    return {'min': min(timings), 'median': statistics.median(timings), 'calls': number}
+
+
+def load_baselines(path=BASELINES_FILE):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'machine': None, 'benchmarks': {}}
+
+
+def machine_info():
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'processor': platform.processor() or None,
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results, baselines, tolerance=DEFAULT_TOLERANCE):
+    """
+    Checks `results` ({name: timings}) against `baselines['benchmarks']`.
+
+    Returns:
+        list: (name, current_min, baseline_min or None, ratio or None,
+            regressed) per benchmark.
+    """
+    rows = []
+    for name, timings in results.items():
+        baseline = baselines.get('benchmarks', {}).get(name)
+        if baseline is None:
+            rows.append((name, timings['min'], None, None, False))
+            continue
+        ratio = timings['min'] / baseline['min']
+        rows.append((name, timings['min'], baseline['min'], ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time core functions and compare with stored baselines."
+    )
+    parser.add_argument('--only', action='append', default=[], metavar='SUBSTRING',
+                        help="Run only benchmarks whose name contains SUBSTRING.")
+    parser.add_argument('--quick', action='store_true',
+                        help=f"Smaller CSV corpus and {QUICK_REPEAT} repeats.")
+    parser.add_argument('--repeat', type=int)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown fraction (default: %(default)s).")
+    parser.add_argument('--baselines', default=BASELINES_FILE)
+    parser.add_argument('--update-baselines', action='store_true',
+                        help="Store this run's timings as the new baselines.")
+    parser.add_argument('--output', help="Also write this run's timings as JSON.")
+    args = parser.parse_args(argv)
+    # Skipped-row warnings would otherwise time stderr, not the parser
+    logging.basicConfig(level=logging.ERROR)
+    repeat = args.repeat or (QUICK_REPEAT if args.quick else DEFAULT_REPEAT)
+
+    baselines = load_baselines(args.baselines)
+    if baselines.get('machine') not in (None, machine_info()):
+        print("Warning: baselines were recorded on a different machine/Python:",
+              json.dumps(baselines['machine']), file=sys.stderr)
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="navmap_micro_") as work_dir:
+        for name, func in build_benchmarks(work_dir, quick=args.quick).items():
+            if args.only and not any(part in name for part in args.only):
+                continue
+            results[name] = time_callable(func, repeat=repeat)
+
+    rows = compare(results, baselines, args.tolerance)
+    print(f"{'benchmark':<36} {'current':>11} {'baseline':>11} {'ratio':>7}")
+    for name, current, baseline, ratio, regressed in rows:
+        print(
+            f"{name:<36} {current * 1000:>9.3f}ms "
+            f"{(f'{baseline * 1000:.3f}ms' if baseline else '-'):>11} "
+            f"{(f'{ratio:.2f}' if ratio else '-'):>7}"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'machine': machine_info(), 'benchmarks': results}, f, indent=2)
+    if args.update_baselines:
+        baselines['machine'] = machine_info()
+        baselines.setdefault('benchmarks', {}).update(results)
+        with open(args.baselines, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baselines updated in {args.baselines}")
+        return 0
+
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than baseline by more than "
+              f"{args.tolerance:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
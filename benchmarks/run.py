@@ -0,0 +1,241 @@
+"""
+End-to-end crawler benchmark against synthetic sites.
+
+Examples (from the project root):
+
+    python -m benchmarks.run --preset small
+    python -m benchmarks.run --pages 20000 --fanout 20 --latency-ms 5 \\
+        --sites 8 --workers 16 --transport http --output before.json
+
+Each invocation runs one configuration and writes a JSON report with
+pages/sec, p50/p99 fetch and task latency and peak RSS. Run one
+configuration per process so the peak RSS belongs to it alone; compare
+reports from before and after a change.
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+
+try:
+    import resource  # Unix only; peak RSS is reported as None elsewhere
+except ImportError:
+    resource = None
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from benchmarks.synthetic_site import (  # noqa: E402
+    NAV_SELECTOR, SiteSpec, SyntheticSiteServer, SyntheticTransport
+)
+from src import crawler, tracing  # noqa: E402
+from src.concurrency_manager import ConcurrencyManager  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT = "benchmark_results.json"
+INPROCESS_HOST_TEMPLATE = "site-{}.bench.invalid"
+PRESETS = {
+    'small': {'pages': 10, 'fanout': 3, 'sites': 2},
+    'medium': {'pages': 1000, 'fanout': 10, 'sites': 4},
+    'large': {'pages': 100_000, 'fanout': 30, 'sites': 1},
+}
+MODES = ('crawl', 'manager')
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of `values` (q in 0-100); None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB, or None."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak  # macOS: bytes
+
+
+def _latency_ms(seconds):
+    return {
+        'p50': round(percentile(seconds, 50) * 1000, 3) if seconds else None,
+        'p99': round(percentile(seconds, 99) * 1000, 3) if seconds else None,
+    }
+
+
+def _span_seconds(tracer, name):
+    return [event['dur'] / 1e6 for event in tracer.events()
+            if event['ph'] == 'X' and event['name'] == name]
+
+
+def run_crawl(start_url):
+    """Single-threaded `crawl_navigation` of one site."""
+    tracer = tracing.start_tracing()
+    started = time.perf_counter()
+    try:
+        nav_data = crawler.crawl_navigation(start_url, NAV_SELECTOR)
+    finally:
+        tracing.stop_tracing()
+    duration = time.perf_counter() - started
+    stats = list(nav_data.values())[0]['stats'] if nav_data else {}
+    return {
+        'pages': stats.get('pages', 0), 'errors': stats.get('errors', 0),
+        'bytes': stats.get('bytes', 0), 'duration_s': duration,
+        'fetch_latency_ms': _latency_ms(_span_seconds(tracer, 'fetch')),
+        'sites_ok': 1 if nav_data else 0,
+    }
+
+
+def run_manager(start_urls, workers):
+    """All sites through `ConcurrencyManager`, writing maps to a temp dir."""
+    tracer = tracing.start_tracing()
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="navmap_bench_") as work_dir:
+        os.chdir(work_dir)  # Maps, dlq.log etc. stay out of the tree
+        manager = ConcurrencyManager(max_workers=workers, max_per_domain=None)
+        started = time.perf_counter()
+        try:
+            results = manager.process_tasks([(url, NAV_SELECTOR) for url in start_urls])
+        finally:
+            duration = time.perf_counter() - started
+            manager.shutdown()
+            tracing.stop_tracing()
+            os.chdir(previous_cwd)
+    return {
+        'pages': sum(r.get('stats', {}).get('pages', 0) for r in results),
+        'errors': sum(r.get('stats', {}).get('errors', 0) for r in results),
+        'bytes': sum(r.get('stats', {}).get('bytes', 0) for r in results),
+        'duration_s': duration,
+        'fetch_latency_ms': _latency_ms(_span_seconds(tracer, 'fetch')),
+        'task_latency_ms': _latency_ms([r['duration'] for r in results if 'duration' in r]),
+        'sites_ok': sum(1 for r in results if r.get('status') == 'success'),
+    }
+
+
+def run_benchmark(spec, sites=1, mode='manager', transport='inprocess', workers=8):
+    """
+    Serves `sites` copies of `spec` and runs one benchmark against them.
+
+    Returns:
+        dict: Machine-readable result: configuration, pages, duration_s,
+            pages_per_sec, fetch (and task) p50/p99 latency, peak_rss_kb.
+    """
+    servers = []
+    if transport == 'http':
+        servers = [SyntheticSiteServer(spec).start() for _ in range(sites)]
+        start_urls = [server.base_url for server in servers]
+    elif transport == 'inprocess':
+        hosts = [INPROCESS_HOST_TEMPLATE.format(i) for i in range(sites)]
+        transport_adapter = SyntheticTransport(dict.fromkeys(hosts, spec))
+        start_urls = [f"http://{host}/" for host in hosts]
+        for url in start_urls:
+            crawler.mount_adapter(url, transport_adapter)
+    else:
+        raise ValueError(f"Unknown transport: {transport}")
+    try:
+        if mode == 'crawl':
+            measured = run_crawl(start_urls[0])
+            sites = 1
+        elif mode == 'manager':
+            measured = run_manager(start_urls, workers)
+        else:
+            raise ValueError(f"Unknown mode: {mode}")
+    finally:
+        for server in servers:
+            server.stop()
+    measured['pages_per_sec'] = round(
+        measured['pages'] / measured['duration_s'], 1
+    ) if measured['duration_s'] > 0 else None
+    measured['duration_s'] = round(measured['duration_s'], 4)
+    return {
+        'benchmark': 'crawl_navigation' if mode == 'crawl' else 'concurrency_manager',
+        'transport': transport, 'sites': sites,
+        'workers': workers if mode == 'manager' else 1,
+        'site': spec.as_dict(),
+        'expected_pages': spec.reachable_pages() * sites,
+        **measured,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the crawler end to end against synthetic sites."
+    )
+    parser.add_argument('--preset', choices=sorted(PRESETS),
+                        help="Site shape preset; explicit options override it.")
+    parser.add_argument('--pages', type=int, help="Pages per site (default: 1000).")
+    parser.add_argument('--fanout', type=int, help="Nav links per page (default: 10).")
+    parser.add_argument('--depth', type=int, help="Deepest level that links further.")
+    parser.add_argument('--page-size', type=int, default=4096, help="Bytes per page.")
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help="Added per-request latency in milliseconds.")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Fraction of pages answering HTTP 500.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sites', type=int, help="Number of sites (default: 1).")
+    parser.add_argument('--mode', choices=MODES + ('both',), default='both')
+    parser.add_argument('--transport', choices=('inprocess', 'http'), default='inprocess',
+                        help="In-process requests adapter, or a local http.server.")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help="JSON report path (default: %(default)s); '-' for stdout.")
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args(argv)
+    preset = PRESETS.get(args.preset, {})
+    for name, default in (('pages', 1000), ('fanout', 10), ('sites', 1)):
+        if getattr(args, name) is None:
+            setattr(args, name, preset.get(name, default))
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper())
+    spec = SiteSpec(
+        pages=args.pages, fanout=args.fanout, depth=args.depth,
+        page_size=args.page_size, latency=args.latency_ms / 1000,
+        error_rate=args.error_rate, seed=args.seed
+    )
+    modes = MODES if args.mode == 'both' else (args.mode,)
+    results = [
+        run_benchmark(spec, sites=args.sites, mode=mode,
+                      transport=args.transport, workers=args.workers)
+        for mode in modes
+    ]
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+        for result in results:
+            print(
+                f"{result['benchmark']:<20} {result['pages']:>7} pages "
+                f"({result['errors']} failed) {result['pages_per_sec']:>9} pages/s  "
+                f"fetch p50={result['fetch_latency_ms']['p50']}ms "
+                f"p99={result['fetch_latency_ms']['p99']}ms  "
+                f"peak_rss={result['peak_rss_kb']}KiB"
+            )
+        print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
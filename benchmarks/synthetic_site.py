@@ -0,0 +1,218 @@
+"""
+Deterministic synthetic websites for benchmarking the crawler.
+
+Pages are generated on request rather than stored, so sites of 100k pages
+cost no disk and little memory. Page `i` of a site is
+`/p/<i>.html` (page 0 is `/`); with fan-out F its nav menu links to its
+children F*i+1 .. F*i+F (heap numbering), plus the top-level section pages,
+so the crawler also has to de-duplicate links it has already seen.
+
+Sites are served either over real HTTP (`SyntheticSiteServer`, a local
+`http.server`) or in-process through a `requests` transport adapter
+(`SyntheticTransport`), which removes socket overhead from the measurement.
+"""
+
+import hashlib
+import io
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import BaseAdapter
+
+NAV_SELECTOR = "nav"
+_FILLER = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua. "
+)
+
+
+class SiteSpec:
+    """
+    Shape and behaviour of one synthetic site.
+
+    Args:
+        pages (int): Number of pages (1 or more).
+        fanout (int): Nav links to child pages on each page.
+        depth (int, optional): Deepest level that still links to children;
+            None means the tree is only bounded by `pages`.
+        page_size (int): Approximate HTML size per page in bytes; the body
+            is padded with filler text up to this size.
+        latency (float): Seconds added to every response.
+        error_rate (float): Fraction of pages (chosen deterministically by
+            `seed`) that answer HTTP 500. The start page never fails.
+        seed (int): Varies which pages fail.
+    """
+
+    def __init__(self, pages=1000, fanout=10, depth=None, page_size=4096,
+                 latency=0.0, error_rate=0.0, seed=0):
+        if pages < 1 or fanout < 1:
+            raise ValueError("pages and fanout must be at least 1")
+        if not 0 <= error_rate < 1:
+            raise ValueError(f"error_rate must be in [0, 1), got {error_rate}")
+        self.pages = pages
+        self.fanout = fanout
+        self.depth = depth
+        self.page_size = page_size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def page_depth(self, page_id):
+        depth = 0
+        while page_id > 0:
+            page_id = (page_id - 1) // self.fanout
+            depth += 1
+        return depth
+
+    def children(self, page_id):
+        if self.depth is not None and self.page_depth(page_id) >= self.depth:
+            return range(0)
+        first = self.fanout * page_id + 1
+        return range(first, min(first + self.fanout, self.pages))
+
+    def reachable_pages(self):
+        """Number of pages a complete crawl fetches (respects `depth`)."""
+        if self.depth is None:
+            return self.pages
+        count, level = 0, [0]
+        while level:
+            count += len(level)
+            level = [child for page in level for child in self.children(page)]
+        return count
+
+    def fails(self, page_id):
+        if not self.error_rate or page_id == 0:
+            return False
+        digest = hashlib.blake2b(
+            f"{self.seed}:{page_id}".encode(), digest_size=8
+        ).digest()
+        return int.from_bytes(digest, 'big') / 2 ** 64 < self.error_rate
+
+
+def page_path(page_id):
+    return "/" if page_id == 0 else f"/p/{page_id}.html"
+
+
+def page_id_for(path):
+    """Inverse of `page_path`; None for paths that are not pages."""
+    if path in ("", "/"):
+        return 0
+    if path.startswith("/p/") and path.endswith(".html"):
+        try:
+            return int(path[3:-5])
+        except ValueError:
+            return None
+    return None
+
+
+def render_page(spec, page_id):
+    """Returns (status, html bytes) for a page of `spec`."""
+    if page_id is None or not 0 <= page_id < spec.pages:
+        return 404, b"<html><body>Not found</body></html>"
+    if spec.fails(page_id):
+        return 500, b"<html><body>Internal error</body></html>"
+    links = list(spec.children(0))
+    if page_id != 0:
+        links.extend(spec.children(page_id))
+    nav = "".join(
+        f'<li><a href="{page_path(child)}">Page {child}</a></li>' for child in links
+    )
+    head = (
+        f"<html><head><title>Page {page_id}</title></head><body>"
+        f"<nav><ul>{nav}</ul></nav><main>"
+    )
+    tail = "</main></body></html>"
+    padding = max(spec.page_size - len(head) - len(tail), 0)
+    filler = (_FILLER * (padding // len(_FILLER) + 1))[:padding]
+    return 200, (head + filler + tail).encode('utf-8')
+
+
+class SyntheticSiteServer:
+    """
+    Serves one synthetic site over HTTP on 127.0.0.1 from a background
+    thread. Use as a context manager; `base_url` is the start page.
+    """
+
+    def __init__(self, spec, host="127.0.0.1", port=0):
+        self.spec = spec
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like real sites
+            # Headers and body are separate writes; without TCP_NODELAY each
+            #  keep-alive response stalls ~40ms on delayed ACKs
+            disable_nagle_algorithm = True
+
+            def do_GET(handler):
+                if spec.latency:
+                    time.sleep(spec.latency)
+                status, body = render_page(spec, page_id_for(urlparse(handler.path).path))
+                handler.send_response(status)
+                handler.send_header('Content-Type', 'text/html; charset=utf-8')
+                handler.send_header('Content-Length', str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                pass  # One line per request would dominate the benchmark
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://{host}:{self.server.server_port}/"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name="SyntheticSiteServer", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class SyntheticTransport(BaseAdapter):
+    """
+    `requests` transport adapter answering from synthetic sites without
+    sockets. Maps each host (e.g. 'site-0.bench.invalid') to its SiteSpec;
+    mount it for each host with
+    `crawler.mount_adapter("http://site-0.bench.invalid/", transport)`.
+    """
+
+    def __init__(self, specs_by_host):
+        super().__init__()
+        self.specs_by_host = specs_by_host
+
+    def send(self, request, **kwargs):
+        parsed = urlparse(request.url)
+        spec = self.specs_by_host.get(parsed.hostname)
+        if spec is None:
+            raise requests.exceptions.ConnectionError(f"Unknown host: {parsed.hostname}")
+        if spec.latency:
+            time.sleep(spec.latency)
+        status, body = render_page(spec, page_id_for(parsed.path))
+        response = requests.Response()
+        response.status_code = status
+        response.reason = "OK" if status == 200 else "Error"
+        response.headers['Content-Type'] = 'text/html; charset=utf-8'
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.encoding = 'utf-8'
+        return response
+
+    def close(self):
+        pass
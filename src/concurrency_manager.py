@@ -1,26 +1,66 @@
 import concurrent.futures
+import heapq
+import itertools
 import logging
 import os
 import json
+import signal
+import threading
 import time
 import random  # Add missing import for test block
 from functools import partial
 
 # Assuming other modules are importable
 try:
-    from .crawler import crawl_navigation, format_tree
-    from .file_writer import generate_filename, write_map_file
+    from .crawler import (
+        CrawlSuspended, crawl_navigation, format_tree, iter_format_tree
+    )
+    from .file_writer import (
+        generate_filename, validate_compression, write_map_file
+    )
     from .utils import retry_with_backoff
+    from .deadline import Deadline
+    from .crawl_limits import CrawlLimits
+    from .scheduler import DomainScheduler, longest_expected_first
+    from .page_cache import PageCache, DEFAULT_CACHE_MAX_BYTES
+    from .write_behind import WriteBehindWriter, DEFAULT_MAX_PENDING_WRITES
+    from .map_manifest import DigestingChunks, MapManifest, content_digest
+    from .map_store import SqliteMapStore, DEFAULT_DB_PATH
+    from .metrics import (
+        FORMAT_SECONDS, TASKS, TASKS_IN_FLIGHT, WRITE_SECONDS,
+        WRITES_IN_FLIGHT, export_metrics
+    )
+    from .tracing import span, start_tracing, stop_tracing
     # Although worker might handle retries internally
 except ImportError:
     # Fallback for potential standalone testing or structure issues
-    from crawler import crawl_navigation, format_tree
-    from file_writer import generate_filename, write_map_file
+    from crawler import (
+        CrawlSuspended, crawl_navigation, format_tree, iter_format_tree
+    )
+    from file_writer import (
+        generate_filename, validate_compression, write_map_file
+    )
     from utils import retry_with_backoff
+    from deadline import Deadline
+    from crawl_limits import CrawlLimits
+    from scheduler import DomainScheduler, longest_expected_first
+    from page_cache import PageCache, DEFAULT_CACHE_MAX_BYTES
+    from write_behind import WriteBehindWriter, DEFAULT_MAX_PENDING_WRITES
+    from map_manifest import DigestingChunks, MapManifest, content_digest
+    from map_store import SqliteMapStore, DEFAULT_DB_PATH
+    from metrics import (
+        FORMAT_SECONDS, TASKS, TASKS_IN_FLIGHT, WRITE_SECONDS,
+        WRITES_IN_FLIGHT, export_metrics
+    )
+    from tracing import span, start_tracing, stop_tracing
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+DEFAULT_MAX_PER_DOMAIN = 2  # Concurrent tasks allowed against one site
+# Tasks read ahead from the input iterable into the scheduler. Interleaving
+#  by domain and priority ordering operate within this window.
+DEFAULT_SCHEDULER_LOOKAHEAD = 1000
 DLQ_FILE = "dlq.log"  # Dead Letter Queue file
 
 
@@ -38,7 +78,21 @@ def log_to_dlq(failed_task_info):
         )
 
 
-def process_single_url_task(url, css_selector):
+def instrumented_write(write_func):
+    """Wraps a `(filepath, content) -> bool` writer with write metrics."""
+    def write(filepath, content):
+        with WRITES_IN_FLIGHT.track(), WRITE_SECONDS.time(), \
+                span('write', path=filepath):
+            return write_func(filepath, content)
+    return write
+
+
+def process_single_url_task(url, css_selector, deadline=None, limits=None,
+                            progress_callback=None, page_cache=None,
+                            writer=None, write_func=None,
+                            output_layout='flat', store=None,
+                            compression=None, defer_retries=False,
+                            crawl_state=None):
     """
     Worker function to process a single URL: crawl, format, write.
     Includes retry logic implicitly via crawler's fetch_html.
@@ -47,22 +101,75 @@ def process_single_url_task(url, css_selector):
     Args:
         url (str): The URL to process.
         css_selector (str): The CSS selector for navigation.
+        deadline (Deadline, optional): Time budget / cancel signal for this
+            task. If it expires mid-crawl, the partial map is still written
+            and the result carries a 'truncated' reason.
+        limits (CrawlLimits, optional): Depth/page/byte limits for the crawl.
+        progress_callback (callable, optional): Receives the crawl's running
+            counts dict after each page.
+        page_cache (PageCache, optional): Link cache shared across the run.
+        writer (WriteBehindWriter, optional): If given, the map is queued on
+            the writer thread instead of written here, and the result carries
+            a 'write_future' that resolves to the write's success flag. For a
+            streamed (compressed) map it also carries 'digest_chunks', whose
+            `hexdigest()` is the map's digest once the write is done.
+        write_func (callable, optional): `(filepath, content) -> bool` used
+            for synchronous writes; defaults to `write_map_file`.
+        output_layout (str): 'flat' or 'sharded' (see `generate_filename`).
+        store (SqliteMapStore, optional): If given, the map (markdown plus
+            node table) is stored in the database instead of written as a
+            file; `writer` and `write_func` are not used.
+        compression (str, optional): 'gzip' or 'zstd' to write a compressed
+            map file. The map is then rendered lazily and streamed through
+            the compressor instead of being built as one string.
+        defer_retries (bool): Don't sleep through fetch retry backoffs. If
+            the crawl runs out of pages that aren't waiting for a retry, the
+            task returns status 'retry_later' with the suspended
+            'crawl_state' and the 'resume_at' time (`time.monotonic()`),
+            and should be run again then with that `crawl_state`.
+        crawl_state (CrawlState, optional): Suspended crawl to resume. A
+            resumed task is finished even if its deadline has expired, so
+            the pages crawled so far are written as a partial map.
 
     Returns:
         dict: A result dictionary containing status, url, and message/filepath.
               Example: {'status': 'success', 'url': url, 'filepath': filepath}
+                       {'status': 'success', 'url': url, 'filepath': filepath,
+                        'truncated': 'deadline'}
+                       {'status': 'cancelled', 'url': url, 'reason': reason}
                        {'status': 'failed', 'url': url, 'error': str(e)}
                        {'status': 'dlq', 'url': url, 'error': str(e)}
+                       {'status': 'retry_later', 'url': url,
+                        'crawl_state': state, 'resume_at': monotonic_time}
     """
     task_info = {
         'url': url, 'css_selector': css_selector, 'timestamp': time.time()
     }
-    logger.info(f"Starting processing for URL: {url}")
+    if crawl_state is None and deadline is not None and deadline.expired():
+        # Never started: not a failure, so keep it out of the DLQ.
+        reason = deadline.reason()
+        logger.warning(f"Skipping URL {url} before start ({reason}).")
+        return {'status': 'cancelled', 'url': url, 'reason': reason}
+
+    if crawl_state is None:
+        logger.info(f"Starting processing for URL: {url}")
 
     try:
         # 1. Crawl navigation
         # Note: fetch_html within crawl_navigation already has retries
-        nav_data = crawl_navigation(url, css_selector)
+        try:
+            nav_data = crawl_navigation(
+                url, css_selector, deadline=deadline, limits=limits,
+                progress_callback=progress_callback, page_cache=page_cache,
+                defer_retries=defer_retries, state=crawl_state
+            )
+        except CrawlSuspended as suspended:
+            # Only pages waiting out a backoff are left; free this worker
+            return {
+                'status': 'retry_later', 'url': url,
+                'crawl_state': suspended.state,
+                'resume_at': suspended.resume_at
+            }
         if nav_data is None:
             # Crawling itself might fail definitively (e.g., invalid start URL
             #  after retries)
@@ -72,29 +179,68 @@ def process_single_url_task(url, css_selector):
             raise ValueError(
                 "Crawl navigation returned None, indicating failure."
             )
+        truncated = list(nav_data.values())[0].get('truncated')
         if not list(nav_data.values())[0]['children']:
             logger.warning(f"Crawl for {url} completed but found no links.")
             # Decide if this is success or failure - let's treat as success
             #  with empty map for now.
 
         # 2. Format tree
-        markdown_content = format_tree(nav_data)
-        if markdown_content == "Navigation tree data is empty.":
-            logger.warning(f"Formatted tree is empty for {url}.")
-            # Still treat as success, write empty file? Or skip write?
-            #  Let's write.
+        if compression and store is None:
+            # Rendered chunk by chunk while compressing; never held whole,
+            #  so formatting time is counted in the write metrics instead.
+            #  The digest is taken from the same chunks as they are written.
+            markdown_content = DigestingChunks(iter_format_tree(nav_data))
+            digest = None
+        else:
+            with FORMAT_SECONDS.time(), span('format', url=url):
+                markdown_content = format_tree(nav_data)
+            digest = content_digest(markdown_content)
 
         # 3. Generate filename
-        filepath = generate_filename(url)
+        filepath = generate_filename(
+            url, layout=output_layout,
+            compression=None if store is not None else compression
+        )
+
+        result = {
+            'status': 'success', 'url': url, 'filepath': filepath,
+            'digest': digest
+        }
+        stats = list(nav_data.values())[0].get('stats')
+        if stats is not None:
+            result['stats'] = dict(stats)
+        if truncated:
+            result['truncated'] = truncated
 
         # 4. Write map file (includes atomic write & locking)
-        write_success = write_map_file(filepath, markdown_content)
+        if store is not None:
+            with WRITES_IN_FLIGHT.track(), WRITE_SECONDS.time(), \
+                    span('write', path=filepath):
+                stored = store.write_map(url, filepath, markdown_content, nav_data)
+            if not stored:
+                raise IOError(f"Failed to store map for {url} in {store.db_path}")
+            logger.info(f"Successfully processed and stored map for URL: {url}")
+            return result
+
+        if writer is not None:
+            # Hand off to the write-behind thread; the caller resolves the
+            #  final status once the write completes.
+            with span('write_enqueue', url=url):  # Blocks while the queue is full
+                result['write_future'] = writer.submit(filepath, markdown_content)
+            if digest is None:
+                result['digest_chunks'] = markdown_content  # Digested once written
+            return result
+
+        write_success = (write_func or write_map_file)(filepath, markdown_content)
+        if write_success and digest is None:
+            result['digest'] = markdown_content.hexdigest()
 
         if write_success:
             logger.info(
                 f"Successfully processed and wrote map for URL: {url} to {filepath}"
             )
-            return {'status': 'success', 'url': url, 'filepath': filepath}
+            return result
         else:
             # File writing failed despite crawl success (e.g., lock contention,
             #  permissions)
@@ -116,83 +262,499 @@ def process_single_url_task(url, css_selector):
 class ConcurrencyManager:
     """Manages concurrent execution of URL processing tasks."""
 
-    def __init__(self, max_workers=DEFAULT_MAX_WORKERS):
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, task_timeout=None,
+                 run_timeout=None, limits=None,
+                 max_per_domain=DEFAULT_MAX_PER_DOMAIN, history=None,
+                 priority=None, cache_max_bytes=DEFAULT_CACHE_MAX_BYTES,
+                 write_behind=False,
+                 max_pending_writes=DEFAULT_MAX_PENDING_WRITES,
+                 fsync_policy=None, output_layout='flat', storage='files',
+                 store_path=DEFAULT_DB_PATH, compression=None,
+                 lookahead=DEFAULT_SCHEDULER_LOOKAHEAD, cache_ttl=None,
+                 progress=None, metrics_textfile=None, metrics_json=None,
+                 profiler=None, trace_path=None, defer_retries=True):
+        """
+        Args:
+            max_workers (int): Size of the thread pool.
+            task_timeout (float, optional): Seconds each task may run, counted
+                from when it starts. Expired tasks write a partial map.
+            run_timeout (float, optional): Seconds the whole `process_tasks`
+                call may run. On expiry queued tasks are cancelled and
+                in-flight tasks stop at their next page boundary.
+            limits (CrawlLimits, optional): Global crawl limits. Limits given
+                per task (e.g. from a CSV row) override individual fields.
+            max_per_domain (int, optional): Cap on concurrent tasks against
+                one registered domain in `process_tasks`. None disables it.
+            history (CrawlHistory, optional): Per-site stats from earlier
+                runs. Completed crawls are recorded into it and it is saved
+                at the end of each `process_tasks` call.
+            priority (callable, optional): Scheduling policy mapping a task
+                tuple to a sort key (lower runs first). Defaults to
+                `longest_expected_first(history)` when a history is given,
+                otherwise plain round-robin by domain.
+            cache_max_bytes (int, optional): Memory bound of the page/link
+                cache shared by all tasks of one `process_tasks` call, so
+                overlapping sections of a domain are fetched once per run.
+                0 or None disables the cache.
+            write_behind (bool): Write maps on a dedicated writer thread fed
+                by a bounded queue, so workers never stall on slow disks.
+            max_pending_writes (int): Queue bound for the write-behind writer.
+            fsync_policy (str, optional): 'none' (fast), 'file' or 'full'
+                (durable); see `file_writer.FSYNC_POLICIES`. Defaults to
+                `file_writer.DEFAULT_FSYNC_POLICY`.
+            output_layout (str): 'flat' (default) or 'sharded'. The sharded
+                layout spreads maps over hashed-prefix subdirectories and
+                keeps a manifest (URL -> path, digest) up to date.
+            storage (str): 'files' (one markdown file per site, default) or
+                'sqlite' (every map in one database; see `SqliteMapStore`).
+            store_path (str): Database path when storage is 'sqlite'.
+            compression (str, optional): 'gzip' or 'zstd' for compressed map
+                files (ignored with sqlite storage). 'zstd' needs the
+                optional `zstandard` package. Read such maps back with
+                `file_writer.read_map_file`.
+            lookahead (int): How many not-yet-started tasks `process_tasks`
+                pulls from its input at a time. Inputs such as
+                `csv_processor.iter_valid_urls` are consumed lazily, so the
+                first crawl starts on the first row.
+            cache_ttl (float, optional): If set, the page cache is kept
+                across `process_tasks` calls (long-running processes such as
+                the daemon) and entries expire after this many seconds.
+            progress (ProgressReporter, optional): Aggregated progress
+                display fed by every task of a `process_tasks` call.
+            metrics_textfile (str, optional): Path of a Prometheus textfile
+                (`*.prom`) rewritten with `metrics.REGISTRY` at the end of
+                each `process_tasks` call.
+            metrics_json (str, optional): Path of a JSON metrics summary
+                (counts, histogram mean/p50/p90/p99) written likewise.
+            profiler (TaskProfiler, optional): Runs the tasks it selects
+                under cProfile; the merged run profile is written at the end
+                of each `process_tasks` call.
+            trace_path (str, optional): If set, each `process_tasks` call
+                records fetch/parse/format/write, retry-sleep and lock-wait
+                spans from every thread and writes them to this path as a
+                Chrome Trace Event file (open in Perfetto or chrome://tracing).
+            defer_retries (bool): Keep fetch retry backoffs off the worker
+                threads. A crawl sets failed pages aside and carries on with
+                the rest of its site; when nothing else is left it is
+                suspended and parked by `process_tasks` until the earliest
+                retry is due, freeing its slot for other sites. False
+                restores in-thread `time.sleep` backoff.
+        """
+        validate_compression(compression)  # Fail now, not once per task
         self.max_workers = max_workers
+        self.max_per_domain = max_per_domain
+        self.lookahead = max(lookahead, max_workers)
+        self.history = history
+        if priority is None and history is not None:
+            priority = longest_expected_first(history)
+        self.priority = priority
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_ttl = cache_ttl
+        self.progress = progress
+        self.page_cache = (
+            PageCache(cache_max_bytes, ttl=cache_ttl)
+            if cache_max_bytes and cache_ttl is not None else None
+        )
+        self.output_layout = output_layout
+        if storage not in ('files', 'sqlite'):
+            raise ValueError(f"Unknown storage backend: {storage}")
+        self.store = SqliteMapStore(store_path) if storage == 'sqlite' else None
+        self.manifest = (
+            MapManifest()
+            if output_layout == 'sharded' and self.store is None else None
+        )
+        self.compression = compression
+        self.write_func = instrumented_write(partial(
+            write_map_file, fsync=fsync_policy, compression=compression
+        ))
+        self.metrics_textfile = metrics_textfile
+        self.metrics_json = metrics_json
+        self.profiler = profiler
+        self.trace_path = trace_path
+        self.defer_retries = defer_retries
+        self.writer = (
+            WriteBehindWriter(
+                max_pending=max_pending_writes, write_func=self.write_func
+            )
+            if write_behind else None
+        )
+        self.task_timeout = task_timeout
+        self.run_timeout = run_timeout
+        self.limits = limits or CrawlLimits()
+        # Live crawl counts per URL ({'pages', 'bytes', 'queued', 'depth'}),
+        #  updated in place by running crawls for progress/metrics readers.
+        self.task_stats = {}
         # Using ThreadPoolExecutor as tasks are I/O bound (network,
         #  file writes)
         self.executor = concurrent.futures.ThreadPoolExecutor(
             max_workers=self.max_workers
         )
-        self.futures = []
+        # Unhandled futures -> url, so failures can be attributed and queued
+        #  tasks cancelled; dropped once handled so finished results (and
+        #  suspended crawl states) aren't kept for the whole run
+        self.futures = {}
+        self.run_deadline = Deadline(timeout=run_timeout)
         logger.info(
             f"ConcurrencyManager initialized with max_workers={self.max_workers}"
         )
 
-    def submit_task(self, url, css_selector):
-        """Submits a single URL processing task to the executor."""
+    def _run_task(self, url, css_selector, limits, resume=None):
+        """
+        Executor entry point: derives the task deadline when the task starts.
+
+        A task suspended for a retry backoff returns status 'retry_later'
+        with a 'resume' dict (crawl state, deadline, start time, task
+        profile or None); passing it back as `resume` continues the same
+        crawl under the same deadline, adding to the same profile.
+        """
+        if resume is None:
+            deadline = self.run_deadline.child(self.task_timeout)
+            started = time.monotonic()
+            crawl_state = None
+            profile = (
+                self.profiler.start(url)
+                if self.profiler is not None and self.profiler.should_profile(url)
+                else None
+            )
+        else:
+            deadline = resume['deadline']
+            started = resume['started']
+            crawl_state = resume['crawl_state']
+            profile = resume['profile']
+
+        def record_stats(stats):
+            self.task_stats[url] = stats
+            if self.progress is not None:
+                self.progress.update(url, stats)
+
+        run = process_single_url_task
+        if profile is not None:
+            run = partial(self.profiler.run_part, profile, process_single_url_task)
+        with TASKS_IN_FLIGHT.track(), span('task', url=url):
+            result = run(
+                url, css_selector, deadline=deadline, limits=limits,
+                progress_callback=record_stats, page_cache=self.page_cache,
+                writer=self.writer, write_func=self.write_func,
+                output_layout=self.output_layout, store=self.store,
+                compression=self.compression,
+                defer_retries=self.defer_retries, crawl_state=crawl_state
+            )
+        if result.get('status') == 'retry_later':
+            result['resume'] = {
+                'crawl_state': result.pop('crawl_state'),
+                'deadline': deadline, 'started': started, 'profile': profile
+            }
+            return result
+        if profile is not None:
+            self.profiler.finish(profile)  # One profile across all runs
+        result['duration'] = time.monotonic() - started
+        if (self.history is not None and result.get('status') == 'success'
+                and not result.get('truncated')):
+            # Truncated crawls would understate the site's real cost
+            self.history.record(
+                url, result.get('stats', {}).get('pages', 0),
+                result['duration']
+            )
+        return result
+
+    def submit_task(self, url, css_selector, limits=None, resume=None):
+        """
+        Submits a single URL processing task to the executor and returns its
+        future (None if the task was rejected).
+
+        `limits` (CrawlLimits, optional) overrides the manager's global limits
+        field by field. `resume` continues a suspended task (see `_run_task`).
+        """
         if not url or not css_selector:
             logger.warning(
                 "Attempted to submit task with empty URL or selector."
             )
-            return
+            return None
 
         logger.debug(f"Submitting task for URL: {url}")
-        # Use partial to pass arguments to the worker function
-        # task_func = partial(process_single_url_task, url=url,
-        #  css_selector=css_selector)
-        # Or submit directly:
         future = self.executor.submit(
-            process_single_url_task, url,
-            css_selector
+            self._run_task, url, css_selector, self.limits.merged(limits), resume
         )
-        self.futures.append(future)
+        self.futures[future] = url
+        return future
+
+    def cancel(self):
+        """
+        Cooperatively cancels the current run.
+
+        Queued tasks are cancelled outright; running tasks observe the shared
+        cancel signal at their next page boundary and write a partial map.
+        Safe to call from a signal handler or another thread.
+        """
+        self.run_deadline.cancel()
+        self._cancel_queued()
+
+    def _cancel_queued(self):
+        cancelled = sum(1 for future in list(self.futures) if future.cancel())
+        if cancelled:
+            logger.warning(f"Cancelled {cancelled} queued task(s).")
+
+    def _install_sigint_handler(self):
+        """
+        Routes the first SIGINT to `cancel()` so in-flight work drains
+        cleanly; a second SIGINT falls through to the previous handler.
+        Returns the previous handler, or None if not installed.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return None
+        previous = signal.getsignal(signal.SIGINT)
+
+        def handler(signum, frame):
+            logger.warning(
+                "Interrupt received: cancelling queued tasks and draining "
+                "in-flight work. Interrupt again to abort immediately."
+            )
+            signal.signal(signal.SIGINT, previous)
+            self.cancel()
+
+        signal.signal(signal.SIGINT, handler)
+        return previous
+
+    def _result_for(self, future):
+        """Converts a finished (or cancelled) future into a result dict."""
+        url = self.futures.pop(future, 'unknown')
+        if future.cancelled():
+            return {
+                'status': 'cancelled', 'url': url,
+                'reason': self.run_deadline.reason() or 'cancelled'
+            }
+        try:
+            return future.result()  # Get the result dict from the worker
+        except Exception as e:
+            # This shouldn't ideally happen if worker catches exceptions,
+            # but catch it just in case.
+            logger.error(
+                f"Exception retrieving future result for {url}: {e}",
+                exc_info=True
+            )
+            return {'status': 'error', 'url': url, 'error': str(e)}
+
+    def _finish_write(self, write_future, task, result):
+        """Resolves a task whose map was handed to the write-behind writer."""
+        url = result['url']
+        digest_chunks = result.pop('digest_chunks', None)
+        try:
+            write_success = write_future.result()
+            error = f"Failed to write map file for {url} to {result['filepath']}"
+        except Exception as e:
+            write_success = False
+            error = str(e)
+        if write_success:
+            if digest_chunks is not None:
+                result['digest'] = digest_chunks.hexdigest()
+            logger.info(
+                f"Successfully processed and wrote map for URL: {url} to {result['filepath']}"
+            )
+            return result
+        logger.error(f"Processing failed for URL {url}: {error}")
+        log_to_dlq({
+            'url': url, 'css_selector': task[1], 'timestamp': time.time(),
+            'error': error
+        })
+        return {'status': 'dlq', 'url': url, 'error': error}
 
     def process_tasks(self, url_selector_list):
         """
-        Submits multiple tasks and waits for their completion.
+        Schedules multiple tasks and waits for their completion.
+
+        Tasks are interleaved round-robin by registered domain (or ordered by
+        the `priority` policy, e.g. longest-expected-first) and at most
+        `max_per_domain` run against one domain at a time. Only as many tasks
+        as there are workers are handed to the executor, so a capped domain
+        never blocks slots that other hosts could use.
+
+        Honours `run_timeout` and cooperative cancellation (`cancel()` or
+        SIGINT when called from the main thread).
+
+        With `defer_retries`, a task whose crawl is suspended for a retry
+        backoff gives up its worker slot (and domain slot); it waits on a
+        timer heap here and rejoins the scheduler when its retry is due. If
+        the run stops first, suspended crawls are finished right away so
+        their partial maps are still written.
+
+        The input is read lazily, `lookahead` tasks ahead of the executor,
+        so a generator (e.g. `csv_processor.iter_valid_urls`) is never
+        materialized in full.
 
         Args:
-            url_selector_list (list): A list of tuples, where each tuple is 
-            (url, css_selector).
+            url_selector_list (iterable): Tuples (url, css_selector) or
+            (url, css_selector, CrawlLimits); a list or any iterator.
 
         Returns:
-            list: A list of result dictionaries from each completed task.
+            list: A list of result dictionaries, one per task.
         """
         results = []
-        self.futures = []  # Clear previous futures if any
-
-        for url, css_selector in url_selector_list:
-            self.submit_task(url, css_selector)
-
-        # Wait for all submitted futures to complete and collect results
-        for future in concurrent.futures.as_completed(self.futures):
-            try:
-                result = future.result()  # Get the result dict from the worker
-                results.append(result)
-                logger.debug(f"Task completed: {result}")
-            except Exception as e:
-                # This shouldn't ideally happen if worker catches exceptions,
-                # but catch it just in case.
-                logger.error(
-                    f"Exception retrieving future result: {e}",
-                    exc_info=True
-                )
-                # How to associate this error back to a URL? Difficult here.
-                results.append(
-                    {'status': 'error', 'url': 'unknown', 'error': str(e)}
+        self.futures = {}  # Clear previous futures if any
+        self.task_stats = {}
+        self.run_deadline = Deadline(timeout=self.run_timeout)
+        if self.cache_ttl is None:
+            self.page_cache = (
+                PageCache(self.cache_max_bytes) if self.cache_max_bytes else None
+            )
+        scheduler = DomainScheduler(
+            max_per_domain=self.max_per_domain, priority=self.priority
+        )
+        incoming = iter(url_selector_list)
+        if self.progress is not None:
+            self.progress.start(
+                total=len(url_selector_list)
+                if hasattr(url_selector_list, '__len__') else None
+            )
+        future_tasks = {}
+        pending = set()
+        writes = {}  # write future -> (task, provisional result)
+        # Tasks suspended for a retry backoff: heap of (resume_at, seq, task),
+        #  the task tuple extended to (url, css_selector, limits, resume)
+        delayed = []
+        delay_sequence = itertools.count()
+        previous_handler = self._install_sigint_handler()
+        if self.trace_path:
+            start_tracing()
+
+        def dispatch(task):
+            """Submits a scheduled (or resumed) task; False if rejected."""
+            url, css_selector, *extra = task
+            future = self.submit_task(
+                url, css_selector, extra[0] if extra else None,
+                extra[1] if len(extra) > 1 else None
+            )
+            if future is None:
+                return False
+            future_tasks[future] = task
+            pending.add(future)
+            if self.progress is not None and len(extra) < 2:
+                self.progress.task_started(url)
+            return True
+
+        try:
+            stopping = False
+            while True:
+                if not stopping and self.run_deadline.expired():
+                    reason = self.run_deadline.reason()
+                    logger.warning(f"Run stopping early ({reason}).")
+                    self._cancel_queued()
+                    for task in itertools.chain(scheduler.drain(), incoming):
+                        if len(task) > 3:
+                            # A suspended crawl: finish it below instead
+                            heapq.heappush(delayed, (0, next(delay_sequence), task))
+                            continue
+                        self._record_result(
+                            results,
+                            {'status': 'cancelled', 'url': task[0], 'reason': reason}
+                        )
+                    stopping = True
+
+                # Suspended crawls whose retry is due rejoin the scheduler;
+                #  once stopping, they run at once to write partial maps
+                now = time.monotonic()
+                while delayed and (stopping or delayed[0][0] <= now):
+                    task = heapq.heappop(delayed)[2]
+                    if stopping:
+                        dispatch(task)
+                    else:
+                        scheduler.add(task)
+
+                if not stopping:
+                    # Top up the scheduler window from the (lazy) input;
+                    #  resumed crawls may already have filled it past
+                    #  `lookahead`
+                    for task in itertools.islice(
+                            incoming, max(0, self.lookahead - len(scheduler))):
+                        scheduler.add(task)
+
+                # Keep exactly one task per worker in flight
+                while not stopping and len(pending) < self.max_workers:
+                    task = scheduler.next_task()
+                    if task is None:
+                        break
+                    if not dispatch(task):
+                        scheduler.task_done(task)
+
+                timeout = None if stopping else self.run_deadline.remaining()
+                if delayed and not stopping:
+                    wake = max(0.0, delayed[0][0] - time.monotonic())
+                    timeout = wake if timeout is None else min(timeout, wake)
+                if not pending and not writes:
+                    if not delayed:
+                        break
+                    # Only suspended crawls left; wakes early on cancel()
+                    self.run_deadline.cancel_event.wait(timeout)
+                    continue
+                done, _ = concurrent.futures.wait(
+                    pending | writes.keys(), timeout=timeout,
+                    return_when=concurrent.futures.FIRST_COMPLETED
                 )
+                for future in done:
+                    if future in writes:
+                        result = self._finish_write(future, *writes.pop(future))
+                    else:
+                        pending.discard(future)
+                        task = future_tasks.pop(future)
+                        scheduler.task_done(task)
+                        result = self._result_for(future)
+                        if result.get('status') == 'retry_later':
+                            heapq.heappush(delayed, (
+                                result['resume_at'], next(delay_sequence),
+                                (task[0], task[1],
+                                 task[2] if len(task) > 2 else None,
+                                 result['resume'])
+                            ))
+                            continue
+                        write_future = result.pop('write_future', None)
+                        if write_future is not None:
+                            # Worker slot is free; wait for the write separately
+                            writes[write_future] = (task, result)
+                            continue
+                    if (self.manifest is not None
+                            and result.get('status') == 'success'):
+                        self.manifest.record(
+                            result['url'], result['filepath'], result['digest']
+                        )
+                    self._record_result(results, result)
+                    logger.debug(f"Task completed: {result}")
+        finally:
+            if self.progress is not None:
+                self.progress.stop()
+            if previous_handler is not None:
+                signal.signal(signal.SIGINT, previous_handler)
+            if self.history is not None:
+                self.history.save()
+            if self.store is not None:
+                self.store.flush()
+            if self.page_cache is not None:
+                logger.info(f"Page cache: {self.page_cache.stats()}")
+            export_metrics(self.metrics_textfile, self.metrics_json)
+            if self.profiler is not None:
+                self.profiler.write_summary()
+            if self.trace_path:
+                stop_tracing(self.trace_path)
 
         logger.info(
             f"Finished processing all submitted tasks. Results count: {len(results)}"
         )
         return results
 
-    def shutdown(self, wait=True):
+    def _record_result(self, results, result):
+        results.append(result)
+        TASKS.inc(status=result.get('status'))
+        if self.progress is not None:
+            self.progress.task_finished(result.get('url'), result.get('status'))
+
+    def shutdown(self, wait=True, cancel_futures=False):
         """Shuts down the thread pool executor."""
         logger.info(
             f"Shutting down ConcurrencyManager executor (wait={wait})..."
         )
-        self.executor.shutdown(wait=wait)
+        self.executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+        if self.writer is not None:
+            self.writer.close(wait=wait)
+        if self.store is not None:
+            self.store.close()
         logger.info("ConcurrencyManager executor shut down.")
 
 
@@ -210,7 +772,9 @@ if __name__ == '__main__':
         logging.warning("logger_config not found, using basicConfig.")
 
     # Mock dependencies for testing
-    def mock_crawl_navigation(url, css_selector):
+    def mock_crawl_navigation(url, css_selector, deadline=None, limits=None,
+                              progress_callback=None, page_cache=None,
+                              defer_retries=False, state=None):
         logger.info(f"[MOCK CM] Crawling {url} with {css_selector}")
         time.sleep(random.uniform(0.1, 0.5))  # Simulate work
         if "failcrawl" in url:
@@ -227,11 +791,11 @@ if __name__ == '__main__':
             return "Empty Tree"
         return f"{list(nav_data.keys())[0]}\n└── {list(list(nav_data.values())[0]['children'].keys())[0]}"
 
-    def mock_generate_filename(url):
+    def mock_generate_filename(url, layout='flat', compression=None):
         name = url.split('//')[1].replace('/', '_').replace('.', '_')
         return os.path.join("output_maps", f"{name}_map.md")
 
-    def mock_write_map_file(filepath, content):
+    def mock_write_map_file(filepath, content, fsync=None, compression=None):
         logger.info(f"[MOCK CM] Writing to {filepath}")
         time.sleep(0.05) # Simulate write
         if "failwrite" in filepath:
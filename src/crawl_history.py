@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_FILE = "crawl_history.json"
+DEFAULT_DURATION_ESTIMATE_SECONDS = 30.0  # Used until any site has history
+SMOOTHING = 0.5  # Weight of the newest run in the moving average
+
+
+class CrawlHistory:
+    """
+    Small persistent store of per-site crawl statistics from earlier runs.
+
+    Each start URL maps to a smoothed page count and duration, which the
+    scheduler uses to estimate how long a task will take. Thread-safe:
+    workers record results concurrently; `save` writes the store atomically.
+
+    Args:
+        path (str, optional): JSON file backing the store. None keeps the
+            history in memory only.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._sites = {}
+        self._default_estimate = None  # Median of known sites; None = stale
+        if path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._sites = json.load(f)
+        except FileNotFoundError:
+            return
+        except (IOError, ValueError) as e:
+            logger.warning(
+                f"Ignoring unreadable crawl history {self.path}: {e}"
+            )
+            self._sites = {}
+
+    def _default(self):
+        """Median duration of known sites, recomputed only after a `record`."""
+        if self._default_estimate is None:
+            durations = [site['duration'] for site in self._sites.values()]
+            self._default_estimate = (
+                statistics.median(durations) if durations
+                else DEFAULT_DURATION_ESTIMATE_SECONDS
+            )
+        return self._default_estimate
+
+    def record(self, url, pages, duration):
+        """Folds one completed crawl into the site's moving averages."""
+        with self._lock:
+            site = self._sites.get(url)
+            if site is None:
+                self._sites[url] = {
+                    'pages': pages, 'duration': duration, 'runs': 1
+                }
+            else:
+                site['pages'] += SMOOTHING * (pages - site['pages'])
+                site['duration'] += SMOOTHING * (duration - site['duration'])
+                site['runs'] += 1
+            self._default_estimate = None
+
+    def get(self, url):
+        """Returns the stored stats dict for a URL, or None."""
+        with self._lock:
+            site = self._sites.get(url)
+            return dict(site) if site else None
+
+    def estimate(self, url):
+        """
+        Expected crawl duration in seconds. Sites without history get the
+        median of known sites (or DEFAULT_DURATION_ESTIMATE_SECONDS).
+        """
+        with self._lock:
+            site = self._sites.get(url)
+            return site['duration'] if site else self._default()
+
+    def save(self):
+        """Atomically writes the store to `path` (no-op for in-memory stores)."""
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self._sites, indent=1, sort_keys=True)
+        directory = os.path.dirname(self.path) or '.'
+        temp_file_path = None
+        try:
+            with tempfile.NamedTemporaryFile(
+                mode='w', encoding='utf-8', delete=False,
+                dir=directory, suffix=".tmp"
+            ) as temp_file:
+                temp_file_path = temp_file.name
+                temp_file.write(data)
+            os.replace(temp_file_path, self.path)
+            logger.debug(f"Saved crawl history for {len(self._sites)} site(s).")
+        except OSError as e:
+            logger.error(f"Failed to save crawl history {self.path}: {e}")
+            if temp_file_path and os.path.exists(temp_file_path):
+                os.remove(temp_file_path)
@@ -0,0 +1,77 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+LIMIT_FIELDS = ('max_depth', 'max_pages', 'max_bytes')
+
+
+class CrawlLimits:
+    """
+    Size limits for a single site crawl.
+
+    Any field left as None is unlimited. Limits can be set globally (e.g. on
+    `ConcurrencyManager`) and overridden per CSV row via `merged`.
+
+    Args:
+        max_depth (int, optional): Deepest tree level whose pages are fetched.
+            The start URL is depth 0; links found on it are depth 1.
+        max_pages (int, optional): Maximum number of pages fetched.
+        max_bytes (int, optional): Maximum response bytes downloaded. Checked
+            after each page, so the final page may overshoot.
+    """
+
+    def __init__(self, max_depth=None, max_pages=None, max_bytes=None):
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_string(cls, spec):
+        """
+        Parses a limits spec such as "max_depth=3;max_pages=500".
+
+        Entries may be separated by ';' or whitespace.
+
+        Raises:
+            ValueError: If an entry is malformed, unknown or not a
+                non-negative integer.
+        """
+        values = {}
+        for entry in spec.replace(';', ' ').split():
+            key, sep, value = entry.partition('=')
+            key = key.strip()
+            if not sep or key not in LIMIT_FIELDS:
+                raise ValueError(f"Unknown crawl limit entry: '{entry}'")
+            number = int(value)
+            if number < 0:
+                raise ValueError(f"Crawl limit must be non-negative: '{entry}'")
+            values[key] = number
+        return cls(**values)
+
+    def merged(self, override):
+        """Returns new limits where fields set on `override` take precedence."""
+        if override is None:
+            return self
+        return CrawlLimits(**{
+            field: getattr(override, field)
+            if getattr(override, field) is not None else getattr(self, field)
+            for field in LIMIT_FIELDS
+        })
+
+    def is_unlimited(self):
+        return all(getattr(self, field) is None for field in LIMIT_FIELDS)
+
+    def __eq__(self, other):
+        if not isinstance(other, CrawlLimits):
+            return NotImplemented
+        return all(
+            getattr(self, field) == getattr(other, field)
+            for field in LIMIT_FIELDS
+        )
+
+    def __repr__(self):
+        fields = ", ".join(
+            f"{field}={getattr(self, field)}" for field in LIMIT_FIELDS
+            if getattr(self, field) is not None
+        )
+        return f"CrawlLimits({fields})"
@@ -1,18 +1,36 @@
+import codecs
+import heapq
+import itertools
 import logging
+import re
 import requests
+import threading
 import time  # Add missing import for test block
 # Removed duplicate logging, requests imports
 from bs4 import BeautifulSoup  # Removed unused SoupStrainer
+from requests.compat import chardet  # charset_normalizer or chardet
 from urllib.parse import urljoin, urlparse
 from collections import deque
-from tqdm import tqdm  # Import tqdm for progress bar
+from functools import partial
 
 # Assuming utils.py is in the same directory or src is in PYTHONPATH
 try:
-    from .utils import retry_with_backoff, get_website_name
+    from .utils import RetryLater, retry_with_backoff, get_website_name
+    from .deadline import DeadlineExceeded
+    from .metrics import (
+        CACHE_LOOKUPS, DECODE_SOURCES, FETCH_BYTES, FETCH_SECONDS,
+        FETCHES_IN_FLIGHT, HTTP_RESPONSES, PARSE_SECONDS
+    )
+    from .tracing import span
 except ImportError:
     # Fallback for standalone execution or different project structure
-    from utils import retry_with_backoff  # Removed unused get_website_name
+    from utils import RetryLater, retry_with_backoff  # Removed unused get_website_name
+    from deadline import DeadlineExceeded
+    from metrics import (
+        CACHE_LOOKUPS, DECODE_SOURCES, FETCH_BYTES, FETCH_SECONDS,
+        FETCHES_IN_FLIGHT, HTTP_RESPONSES, PARSE_SECONDS
+    )
+    from tracing import span
 
 
 logger = logging.getLogger(__name__)
@@ -28,36 +46,159 @@ NETWORK_RETRY_EXCEPTIONS = (
     requests.exceptions.RequestException  # Catch broader RequestExceptions too
 )
 
+REQUEST_TIMEOUT_SECONDS = 15
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Encoding sniffing (see sniff_encoding)
+META_SNIFF_BYTES = 1024  # <meta charset> must appear this early (HTML spec)
+DETECT_SAMPLE_BYTES = 64 * 1024  # Statistical detection looks at this prefix only
+FALLBACK_ENCODING = 'windows-1252'
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+)
+_HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+# Matches both <meta charset="x"> and <meta http-equiv=... content="...; charset=x">
+_META_CHARSET = re.compile(rb'<meta[^>]*?charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+
+_thread_local = threading.local()
+# URL prefix -> transport adapter mounted on every session (see mount_adapter)
+_session_adapters = {}
+_session_adapters_version = 0
+
+
+def get_session():
+    """
+    Returns this thread's `requests.Session`.
+
+    Sessions are not shared between threads, but each worker thread reuses
+    its own across pages and tasks, keeping TCP/TLS connections to a site
+    alive instead of reconnecting for every request.
+    """
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        session = _thread_local.session = requests.Session()
+        session.headers.update(REQUEST_HEADERS)
+    if getattr(session, 'adapters_version', 0) != _session_adapters_version:
+        for prefix, adapter in _session_adapters.items():
+            session.mount(prefix, adapter)
+        session.adapters_version = _session_adapters_version
+    return session
+
+
+def mount_adapter(prefix, adapter):
+    """
+    Routes requests for URLs starting with `prefix` through `adapter` (a
+    `requests` transport adapter) in every thread's session, including
+    sessions that already exist. Used e.g. by the benchmarks to serve
+    synthetic sites in-process.
+    """
+    global _session_adapters_version
+    _session_adapters[prefix] = adapter
+    _session_adapters_version += 1
+
+
+def _codec_name(label):
+    """Normalized codec name for an encoding label, or None if unknown."""
+    try:
+        return codecs.lookup(label).name
+    except (LookupError, TypeError):
+        return None
+
+
+def sniff_encoding(content_type, body):
+    """
+    Picks the character encoding of an HTML body without decoding it as a
+    whole unless nothing declares one.
+
+    In order: a byte order mark, the Content-Type `charset`, a `<meta>`
+    charset in the first `META_SNIFF_BYTES`, a strict UTF-8 check, and only
+    then statistical detection over the first `DETECT_SAMPLE_BYTES`
+    (`FALLBACK_ENCODING` if even that finds nothing).
+
+    Args:
+        content_type (str): The response's Content-Type header.
+        body (bytes): The raw response body.
+
+    Returns:
+        tuple: (encoding, source), where source is 'bom', 'header', 'meta',
+            'utf-8', 'detected' or 'fallback'.
+    """
+    for bom, encoding in _BOMS:
+        if body.startswith(bom):
+            return encoding, 'bom'
+    match = _HEADER_CHARSET.search(content_type or '')
+    encoding = _codec_name(match.group(1)) if match else None
+    if encoding:
+        return encoding, 'header'
+    match = _META_CHARSET.search(body, 0, META_SNIFF_BYTES)
+    encoding = _codec_name(match.group(1).decode('ascii')) if match else None
+    if encoding:
+        return encoding, 'meta'
+    try:
+        body.decode('utf-8')
+        return 'utf-8', 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    detected = chardet.detect(body[:DETECT_SAMPLE_BYTES]).get('encoding') if chardet else None
+    encoding = _codec_name(detected) if detected else None
+    if encoding:
+        return encoding, 'detected'
+    return FALLBACK_ENCODING, 'fallback'
+
 
 @retry_with_backoff(retries=3, initial_delay=1, backoff_factor=2, jitter=0.1,
                     retry_exceptions=NETWORK_RETRY_EXCEPTIONS)
-def fetch_html(url):
+def fetch_html(url, deadline=None, stats=None):
     """
     Fetches HTML content from a URL with retry logic.
 
     Args:
         url (str): The URL to fetch.
+        deadline (Deadline, optional): Budget for this fetch. The request
+            timeout is clamped to the time remaining, and DeadlineExceeded is
+            raised instead of starting a request after expiry/cancellation.
+        stats (dict, optional): Crawl counters; the response body size is
+            added to stats['bytes'] for every response received.
 
     Returns:
-        str: The HTML content as text, or None if fetching fails after retries.
+        tuple: (body, encoding) - the raw HTML bytes and the encoding chosen
+            by `sniff_encoding`, for `find_nav_links(..., from_encoding=)` -
+            or None if fetching fails after retries. The body is never
+            decoded here, so requests' whole-body charset detection is
+            skipped.
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    timeout = REQUEST_TIMEOUT_SECONDS
+    if deadline is not None:
+        deadline.check()
+        timeout = deadline.clamp(timeout)
     try:
         # Allow redirects, set a reasonable timeout
-        response = requests.get(
-            url, headers=headers,
-            timeout=15,
-            allow_redirects=True
-        )
+        with FETCHES_IN_FLIGHT.track(), FETCH_SECONDS.time(), span('fetch', url=url):
+            response = get_session().get(
+                url,
+                timeout=timeout,
+                allow_redirects=True
+            )
+        HTTP_RESPONSES.inc(code=response.status_code)
+        FETCH_BYTES.inc(len(response.content))
+        if stats is not None:
+            stats['bytes'] += len(response.content)
         response.raise_for_status()
         # Raise HTTPError for bad responses (4xx or 5xx)
         # Ensure content type is HTML before returning
         content_type = response.headers.get('content-type', '').lower()
         if 'html' in content_type:
-            logger.debug(f"Successfully fetched HTML from {url}")
-            return response.text
+            encoding, source = sniff_encoding(content_type, response.content)
+            DECODE_SOURCES.inc(source=source)
+            logger.debug(
+                "Successfully fetched HTML from %s (encoding %s from %s)",
+                url, encoding, source
+            )
+            return response.content, encoding
         else:
             logger.warning(f"Content type for {url} is not HTML ({content_type}). Skipping.")
             return None
@@ -70,19 +211,23 @@ def fetch_html(url):
         # This exception is caught by the decorator for retries,
         # but we log it here if it persists after retries or if it's not in
         #  RETRY_EXCEPTIONS
+        HTTP_RESPONSES.inc(code='error')
         logger.error(f"Request exception fetching {url}: {e}")
         # The decorator will raise the exception if retries are exhausted
         raise  # Re-raise for the decorator to handle retries
 
 
-def find_nav_links(html_content, base_url, css_selector):
+def find_nav_links(html_content, base_url, css_selector, from_encoding=None):
     """
     Finds navigation links within the specified CSS selector in HTML content.
 
     Args:
-        html_content (str): The HTML content to parse.
+        html_content (str or bytes): The HTML content to parse.
         base_url (str): The base URL for resolving relative links.
         css_selector (str): The CSS selector for the main navigation container.
+        from_encoding (str, optional): Encoding of `html_content` when it is
+            bytes (see `sniff_encoding`); spares BeautifulSoup its own
+            detection.
 
     Returns:
         list: A list of tuples, where each tuple is (link_text, absolute_url).
@@ -98,7 +243,12 @@ def find_nav_links(html_content, base_url, css_selector):
         #  one area
         # strainer = SoupStrainer(css_select=css_selector) # Requires newer
         #  bs4? Using select instead.
-        soup = BeautifulSoup(html_content, 'html.parser')
+        if isinstance(html_content, bytes):
+            soup = BeautifulSoup(
+                html_content, 'html.parser', from_encoding=from_encoding
+            )
+        else:
+            soup = BeautifulSoup(html_content, 'html.parser')
 
         # Find the navigation container(s)
         nav_elements = soup.select(css_selector)
@@ -124,7 +274,8 @@ def find_nav_links(html_content, base_url, css_selector):
                     links.append((link_text, absolute_url))
 
         logger.debug(
-            f"Found {len(links)} potential nav links using selector '{css_selector}' on {base_url}"
+            "Found %d potential nav links using selector '%s' on %s",
+            len(links), css_selector, base_url
         )
 
     except Exception as e:
@@ -143,98 +294,258 @@ def find_nav_links(html_content, base_url, css_selector):
     return unique_links
 
 
-def crawl_navigation(start_url, css_selector):
+def _fetch_links(url, css_selector, deadline=None, stats=None,
+                 retry_attempt=None):
+    """
+    Fetches a page and extracts its nav links; None if the fetch failed.
+    With `retry_attempt` set, failed fetches raise `RetryLater` (see
+    `retry_with_backoff`) instead of sleeping between attempts.
+    """
+    if retry_attempt is None:
+        page = fetch_html(url, deadline=deadline, stats=stats)
+    else:
+        page = fetch_html(url, deadline=deadline, stats=stats,
+                          retry_attempt=retry_attempt)
+    if not page:
+        return None
+    body, encoding = page
+    with PARSE_SECONDS.time(), span('parse', url=url):
+        return find_nav_links(body, url, css_selector, from_encoding=encoding)
+
+
+def _mark_unexpanded(queue, reason):
+    """Flags every node still waiting in the crawl queue as truncated."""
+    for _, node, _ in queue:
+        node['truncated'] = reason
+
+
+class CrawlSuspended(Exception):
+    """
+    Raised by `crawl_navigation(..., defer_retries=True)` when every page
+    left to fetch is waiting out a retry backoff. Pass `state` back to
+    `crawl_navigation` at or after `resume_at` (a `time.monotonic()` value)
+    to continue the crawl.
+    """
+
+    def __init__(self, state):
+        super().__init__(
+            f"Crawl of {state.start_url} suspended with "
+            f"{len(state.deferred)} page(s) awaiting retry"
+        )
+        self.state = state
+        self.resume_at = state.deferred[0][0]
+
+
+class CrawlState:
+    """
+    Progress of one `crawl_navigation` call: the tree built so far, the
+    fetch queue, visited URLs and counters. Kept outside the function so a
+    suspended crawl (see `CrawlSuspended`) can resume where it stopped.
+
+    Pages whose fetch failed with `RetryLater` wait in `deferred`, a heap
+    of (ready_at, sequence, url, node, depth), and rejoin the front of the
+    queue once their backoff has passed.
+    """
+
+    def __init__(self, start_url):
+        self.start_url = start_url
+        self.root_node = {'name': start_url, 'children': {}}
+        # Queue stores (url_to_crawl, node_in_tree, depth)
+        self.queue = deque([(start_url, self.root_node, 0)])
+        self.visited = {start_url}
+        self.stats = {
+            'pages': 0, 'errors': 0, 'bytes': 0, 'queued': len(self.queue),
+            'depth': 0, 'cache_hits': 0
+        }
+        self.deferred = []
+        self.attempts = {}  # url -> next fetch attempt number, once deferred
+        self._sequence = itertools.count()
+
+    def defer(self, url, node, depth, retry):
+        """Parks a page until the backoff of `retry` (a RetryLater) passes."""
+        self.attempts[url] = retry.attempt
+        heapq.heappush(self.deferred, (
+            time.monotonic() + retry.delay, next(self._sequence), url, node, depth
+        ))
+
+    def promote_due(self):
+        """Moves deferred pages whose backoff has passed to the queue front."""
+        now = time.monotonic()
+        while self.deferred and self.deferred[0][0] <= now:
+            _, _, url, node, depth = heapq.heappop(self.deferred)
+            self.queue.appendleft((url, node, depth))
+
+    def pending(self):
+        """Number of pages still to fetch, including deferred ones."""
+        return len(self.queue) + len(self.deferred)
+
+
+def crawl_navigation(start_url, css_selector, deadline=None, limits=None,
+                     progress_callback=None, page_cache=None,
+                     defer_retries=False, state=None):
     """
     Crawls the navigation menu starting from a URL.
 
     Args:
         start_url (str): The initial URL to crawl.
         css_selector (str): The CSS selector for the navigation container.
+        deadline (Deadline, optional): Checked between pages. When it expires
+            or is cancelled the crawl stops early and returns the partial
+            tree, with the root node marked `'truncated': <reason>`.
+        limits (CrawlLimits, optional): Depth/page/byte limits. Nodes that
+            were discovered but not expanded because of a limit are marked
+            `'truncated': 'max_depth' | 'max_pages' | 'max_bytes'`.
+        progress_callback (callable, optional): Called after each page with
+            the running counts dict (see Returns), e.g.
+            `ProgressReporter.update` bound to this site.
+        page_cache (PageCache, optional): Cache of parsed links shared with
+            other crawls in the same run; pages already fetched (or being
+            fetched) by another task are not fetched again.
+        defer_retries (bool): Never sleep through a retry backoff. A page
+            whose fetch failed is set aside while the crawl carries on with
+            other pages; once only such pages are left, `CrawlSuspended` is
+            raised so the caller can free this thread and resume later.
+        state (CrawlState, optional): State of a suspended crawl to resume.
 
     Returns:
         dict: A nested dictionary representing the navigation tree,
             e.g., {url: {'name': link_text, 'children': {}}}, or None if
-             crawling fails.
+             crawling fails. The root node also carries 'stats':
+             {'pages': expanded, 'errors': pages whose fetch failed,
+             'bytes': downloaded, 'queued': remaining, 'depth': deepest
+             level expanded, 'cache_hits': pages served from `page_cache`}.
+
+    Raises:
+        CrawlSuspended: Only with `defer_retries`; see above.
     """
-    logger.info(f"Starting navigation crawl for {start_url} using selector '{css_selector}'")
-    nav_tree = {}
-    queue = deque([(start_url, nav_tree)])
-    # Queue stores (url_to_crawl, parent_node_in_tree)
-    visited = {start_url}
+    if state is None:
+        logger.info(f"Starting navigation crawl for {start_url} using selector '{css_selector}'")
+        state = CrawlState(start_url)
+    else:
+        logger.info(
+            f"Resuming navigation crawl for {start_url}; "
+            f"{len(state.deferred)} page(s) due for retry"
+        )
+    root_node = state.root_node
+    queue = state.queue
+    visited = state.visited
+    stats = state.stats
     start_domain = urlparse(start_url).netloc
-    initial_queue_size = len(queue) # For tqdm total, though queue size changes
-
-    # Wrap the loop with tqdm for progress visualization
-    # Note: Total might be inaccurate as queue grows, but gives an indication.
-    # Using unit='URL' for clarity. Leave=False cleans up bar on completion.
-    with tqdm(
-        total=initial_queue_size,
-        desc=f"Crawling {start_domain}",
-        unit="URL",
-        leave=False
-    ) as pbar:
-        while queue:
-            current_url, parent_node = queue.popleft()
-            pbar.set_description(f"Processing {current_url[-50:]}")
-            # Show current URL (truncated)
-            logger.debug(f"Processing URL: {current_url}")
-
-            # --- Start of indented block ---
-            html = fetch_html(current_url)
-            if not html:
-                logger.warning(
-                    f"Failed to fetch HTML for {current_url}, skipping."
+    truncated = None
+    max_depth = limits.max_depth if limits is not None else None
+    max_pages = limits.max_pages if limits is not None else None
+    max_bytes = limits.max_bytes if limits is not None else None
+
+    while queue or state.deferred:
+        if deadline is not None and deadline.expired():
+            truncated = deadline.reason()
+        elif (max_pages is not None
+              and stats['pages'] + stats['errors'] >= max_pages):
+            # Failed fetches cost a request too, so they count towards the cap
+            truncated = 'max_pages'
+        elif max_bytes is not None and stats['bytes'] >= max_bytes:
+            truncated = 'max_bytes'
+        if truncated:
+            logger.warning(
+                f"Stopping crawl of {start_url} early ({truncated}); "
+                f"{state.pending()} queued URL(s) not fetched."
+            )
+            break
+        if state.deferred:
+            state.promote_due()
+            if not queue:
+                raise CrawlSuspended(state)
+        current_url, current_node, depth = queue.popleft()
+        logger.debug("Processing URL: %s", current_url)
+        attempt = state.attempts.get(current_url, 0) if defer_retries else None
+
+        # --- Start of indented block ---
+        try:
+            if page_cache is not None:
+                links, hit = page_cache.get_or_load(
+                    current_url, css_selector,
+                    partial(_fetch_links, current_url, css_selector,
+                            deadline, stats, attempt)
+                )
+                CACHE_LOOKUPS.inc(result='hit' if hit else 'miss')
+                if hit:
+                    stats['cache_hits'] += 1
+            else:
+                links = _fetch_links(
+                    current_url, css_selector, deadline, stats, attempt
                 )
-                continue  # Skip this URL if fetching failed
+        except RetryLater as retry:
+            state.defer(current_url, current_node, depth, retry)
+            continue
+        except DeadlineExceeded as e:
+            truncated = e.reason
+            queue.appendleft((current_url, current_node, depth))
+            logger.warning(
+                f"Stopping crawl of {start_url} early ({truncated}) while fetching {current_url}."
+            )
+            break
+        if links is None:
+            logger.warning(
+                f"Failed to fetch HTML for {current_url}, skipping."
+            )
+            stats['errors'] += 1
+            stats['queued'] = state.pending()
+            if progress_callback is not None:
+                progress_callback(stats)
+            continue  # Skip this URL if fetching failed
+
+        if not links:
+            logger.debug(
+                "No navigation links found on %s with selector '%s'.",
+                current_url, css_selector
+            )
 
-            links = find_nav_links(html, current_url, css_selector)
-            if not links:
+        stats['pages'] += 1
+        stats['depth'] = max(stats['depth'], depth)
+        parent_node = current_node['children']
+        child_depth = depth + 1
+        for link_text, link_url in links:
+            # Basic check to stay on the same domain
+            if urlparse(link_url).netloc != start_domain:
+                logger.debug("Skipping off-domain link: %s", link_url)
+                continue
+
+            if link_url not in visited:
+                visited.add(link_url)
+                # Add the new node to the parent's children
+                new_node = {'name': link_text, 'children': {}}
+                parent_node[link_url] = new_node
+                if max_depth is not None and child_depth > max_depth:
+                    # Listed in the tree, but its own menu is not fetched
+                    new_node['truncated'] = 'max_depth'
+                    continue
                 logger.debug(
-                    f"No navigation links found on {current_url} with selector '{css_selector}'."
+                    "Adding new link to queue: %s (from %s)", link_url, current_url
                 )
-                # Even if no links found here, the page itself might be a valid
-                #  node
-                # We need to ensure the start_url gets added if it wasn't already
-                #  a child
-                if current_url == start_url and not parent_node:
-                    # This logic needs refinement - how do we get the 'name' for
-                    #  the start_url itself?
-                    # For now, we assume the start_url is the root and its
-                    #  children are added below.
-                    # The structure might need a dedicated root node.
-                    pass
-                    # Root is implicitly handled by the initial nav_tree structure
-
-            for link_text, link_url in links:
-                # Basic check to stay on the same domain
-                if urlparse(link_url).netloc != start_domain:
-                    logger.debug(f"Skipping off-domain link: {link_url}")
-                    continue
-
-                if link_url not in visited:
-                    visited.add(link_url)
-                    logger.debug(
-                        f"Adding new link to queue: {link_url} (from {current_url})"
-                    )
-                    # Add the new node to the parent's children
-                    new_node = {'name': link_text, 'children': {}}
-                    parent_node[link_url] = new_node
-                    # Add the new URL to the queue to crawl its children
-                    queue.append((link_url, new_node['children']))
-                    pbar.total += 1
-                    # Increment total as we add new URLs to the queue
-                # else: # If already visited, do not add it again to enforce a
-                #  strict tree structure.
-                #     logger.debug(f"Skipping already visited link: {link_url}
-                #  (found under {current_url})")
-                pbar.update(1)
-            # --- End of indented block ---
-            # Update progress bar after processing one URL from the queue
-
-    # The initial nav_tree might be empty if the start_url fetch failed.
-    # We need a way to represent the root node itself. Let's wrap the result.
-    # root_name = get_website_name(start_url) # Unused variable
-    final_tree = {start_url: {'name': start_url, 'children': nav_tree}}
+                # Add the new URL to the queue to crawl its children
+                queue.append((link_url, new_node, child_depth))
+            # else: # If already visited, do not add it again to enforce a
+            #  strict tree structure.
+            #     logger.debug(f"Skipping already visited link: {link_url}
+            #  (found under {current_url})")
+        # --- End of indented block ---
+        # Progress is reported once per page, not per link
+        stats['queued'] = state.pending()
+        if progress_callback is not None:
+            progress_callback(stats)
+
+    if truncated:
+        # Pages still waiting out a backoff were not expanded either
+        queue.extend((url, node, depth) for _, _, url, node, depth in state.deferred)
+        state.deferred.clear()
+        _mark_unexpanded(queue, truncated)
+        root_node['truncated'] = truncated
+    stats['queued'] = len(queue)
+    root_node['stats'] = stats
+
+    # The start URL is the root node; its children may be empty if the
+    #  start_url fetch failed.
+    final_tree = {start_url: root_node}
 
     if not final_tree[start_url]['children']:
         logger.warning(
@@ -243,49 +554,75 @@ def crawl_navigation(start_url, css_selector):
         # Return the root node even if empty, or None? Let's return the root.
 
     logger.info(
-        f"Finished navigation crawl for {start_url}. Visited {len(visited)} unique URLs."
+        f"Finished navigation crawl for {start_url}. Visited {len(visited)} unique URLs, "
+        f"fetched {stats['pages']} page(s) ({stats['errors']} failed), "
+        f"{stats['bytes']} byte(s)."
     )
     return final_tree
 
 
-def _format_tree_recursive(node_dict, indent=""):
-    """Helper function to recursively format the navigation tree."""
-    output = ""
+def _truncation_marker(node_data):
+    """Returns the suffix flagging a node whose subtree was not fully crawled."""
+    reason = node_data.get('truncated')
+    return f" [truncated: {reason}]" if reason else ""
+
+
+def _iter_tree_lines(node_dict, indent=""):
+    """Yields the formatted lines (without newlines) of a subtree, in order."""
     children = list(node_dict.items())
+    last_index = len(children) - 1
     for i, (url, node_data) in enumerate(children):
-        is_last = (i == len(children) - 1)
+        is_last = (i == last_index)
         prefix = indent + ("└── " if is_last else "├── ")
         # Use URL as the primary identifier in the tree as per brief example
-        output += f"{prefix}{url}\n"
+        yield f"{prefix}{url}{_truncation_marker(node_data)}"
         if node_data.get('children'):
             new_indent = indent + ("    " if is_last else "│   ")
-            output += _format_tree_recursive(node_data['children'], new_indent)
-    return output
+            yield from _iter_tree_lines(node_data['children'], new_indent)
 
 
-def format_tree(nav_data):
+def _format_tree_recursive(node_dict, indent=""):
+    """Helper function to recursively format the navigation tree."""
+    return "".join(f"{line}\n" for line in _iter_tree_lines(node_dict, indent))
+
+
+def iter_format_tree(nav_data):
     """
-    Formats the crawled navigation data into a markdown tree string.
+    Yields the markdown tree in small chunks instead of one string.
+
+    Joining the chunks gives exactly what `format_tree` returns, so large
+    maps can be streamed to a (compressed) file without ever holding the
+    whole rendered map in memory.
 
     Args:
         nav_data (dict): The nested dictionary from crawl_navigation.
 
-    Returns:
-        str: A string representing the navigation tree in markdown format.
+    Yields:
+        str: The root line, then each following line prefixed with "\n".
     """
     if not nav_data:
-        return "Navigation tree data is empty."
+        yield "Navigation tree data is empty."
+        return
 
     # Expecting the structure {start_url: {'name': ..., 'children': {...}}}
-    root_url = list(nav_data.keys())[0]
+    root_url = next(iter(nav_data))
     root_node = nav_data[root_url]
+    yield f"{root_url}{_truncation_marker(root_node)}"
+    for line in _iter_tree_lines(root_node.get('children', {})):
+        yield f"\n{line}"
 
-    # Start with the root URL
-    output = f"{root_url}\n"
-    # Recursively format its children
-    output += _format_tree_recursive(root_node.get('children', {}))
 
-    return output.strip()  # Remove trailing newline if any
+def format_tree(nav_data):
+    """
+    Formats the crawled navigation data into a markdown tree string.
+
+    Args:
+        nav_data (dict): The nested dictionary from crawl_navigation.
+
+    Returns:
+        str: A string representing the navigation tree in markdown format.
+    """
+    return "".join(iter_format_tree(nav_data)).strip()
 
 
 # Example usage (optional)
@@ -342,11 +679,11 @@ if __name__ == '__main__':
 
     original_fetch_html = fetch_html
 
-    def mock_fetch_html(url):
+    def mock_fetch_html(url, deadline=None, stats=None):
         logger.debug(f"[MOCK] Fetching {url}")
         time.sleep(0.05)  # Simulate network delay
         if url in MOCK_HTML:
-            return MOCK_HTML[url]
+            return MOCK_HTML[url].encode('utf-8'), 'utf-8'
         else:
             logger.warning(f"[MOCK] URL not found in mock data: {url}")
             # Simulate a 404 by returning None or raising an exception the
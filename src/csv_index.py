@@ -0,0 +1,155 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+CSV_INDEX_FILENAME = ".csv_index.json"  # Sidecar kept in the input directory
+INDEX_VERSION = 2  # Bump when row validation rules or the entry format change
+
+
+class RowRecorder:
+    """
+    Accumulates an index entry while a CSV file is read.
+
+    Valid rows are recorded by their position in the file's `csv.reader`
+    record stream (header included), as runs of consecutive positions, so
+    an entry stays small however many rows the file has. A BLAKE2b digest
+    of the recorded cells lets cached reads detect a file that changed
+    without changing size or mtime.
+    """
+
+    def __init__(self):
+        self.runs = []  # [[first record, count], ...]
+        self.count = 0
+        self.digest = None
+        self.complete = False
+        self._hasher = hashlib.blake2b(digest_size=16)
+
+    def add(self, record, url, selector, limits_cell):
+        """Records the valid row at position `record` and its raw cells."""
+        if self.runs and sum(self.runs[-1]) == record:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([record, 1])
+        self.count += 1
+        self._hasher.update(
+            f"{record}\x1f{url}\x1f{selector}\x1f{limits_cell}\x1e".encode('utf-8')
+        )
+
+    def finish(self):
+        """Marks the file as fully read; the recorder is picklable after this."""
+        self.digest = self._hasher.hexdigest()
+        self._hasher = None
+        self.complete = True
+
+
+def iter_records(runs):
+    """Yields the record positions covered by `runs`, in ascending order."""
+    for first, count in runs:
+        yield from range(first, first + count)
+
+
+class CsvIndex:
+    """
+    Sidecar index of where the valid rows of each input CSV file are.
+
+    Entries are keyed by the file's absolute path and are only used while
+    the file's size and mtime still match, so editing or replacing a CSV
+    invalidates its entry. An entry holds the positions of the valid rows
+    (see `RowRecorder`), their count and a digest, not the rows themselves:
+    cached files are still read, but without sniffing or validation. The
+    index is one compact JSON file; `save` writes it atomically and only
+    when something changed.
+
+    Args:
+        directory (str): Input directory the CSV files live in.
+        path (str, optional): Index file; defaults to CSV_INDEX_FILENAME
+            inside `directory`.
+    """
+
+    def __init__(self, directory, path=None):
+        self.path = path or os.path.join(directory, CSV_INDEX_FILENAME)
+        self._files = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (IOError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable CSV index {self.path}: {e}")
+            return
+        if not isinstance(data, dict) or data.get('version') != INDEX_VERSION:
+            logger.info(f"CSV index {self.path} is outdated; rebuilding.")
+            self._dirty = True
+            return
+        self._files = data.get('files', {})
+
+    @staticmethod
+    def _signature(stat):
+        return stat.st_size, stat.st_mtime_ns
+
+    def lookup(self, filepath, stat):
+        """
+        Returns the entry of `filepath` (a dict with 'runs', 'count' and
+        'digest'), or None if the file is not indexed or changed since
+        (different size or mtime).
+        """
+        entry = self._files.get(os.path.abspath(filepath))
+        if entry is None or (entry['size'], entry['mtime_ns']) != self._signature(stat):
+            return None
+        return entry
+
+    def store(self, filepath, stat, recorder):
+        """Records the `RowRecorder` of a complete read of `filepath` at `stat`."""
+        size, mtime_ns = self._signature(stat)
+        self._files[os.path.abspath(filepath)] = {
+            'size': size, 'mtime_ns': mtime_ns, 'runs': recorder.runs,
+            'count': recorder.count, 'digest': recorder.digest
+        }
+        self._dirty = True
+
+    def invalidate(self, filepath):
+        """Drops the entry of `filepath`, e.g. after a failed cached read."""
+        if self._files.pop(os.path.abspath(filepath), None) is not None:
+            self._dirty = True
+
+    def prune(self, filepaths):
+        """Drops entries for files not in `filepaths` (deleted CSVs)."""
+        keep = {os.path.abspath(filepath) for filepath in filepaths}
+        for key in list(self._files):
+            if key not in keep:
+                del self._files[key]
+                self._dirty = True
+
+    def save(self):
+        """Atomically writes the index if it changed since loading."""
+        if not self._dirty:
+            return
+        data = json.dumps(
+            {'version': INDEX_VERSION, 'files': self._files},
+            separators=(',', ':')
+        )
+        directory = os.path.dirname(self.path) or '.'
+        temp_file_path = None
+        try:
+            with tempfile.NamedTemporaryFile(
+                mode='w', encoding='utf-8', delete=False,
+                dir=directory, suffix=".tmp"
+            ) as temp_file:
+                temp_file_path = temp_file.name
+                temp_file.write(data)
+            os.replace(temp_file_path, self.path)
+            self._dirty = False
+            logger.debug(f"Saved CSV index for {len(self._files)} file(s).")
+        except OSError as e:
+            # A read-only input directory only costs the cache, not the run
+            logger.warning(f"Failed to save CSV index {self.path}: {e}")
+            if temp_file_path and os.path.exists(temp_file_path):
+                os.remove(temp_file_path)
@@ -1,43 +1,68 @@
+import concurrent.futures
 import csv
+import hashlib
 import logging
 import os
 from urllib.parse import urlparse
 
+try:
+    from .crawl_limits import CrawlLimits
+    from .csv_index import CsvIndex, RowRecorder, iter_records
+    from .logger_config import init_worker_logging, start_worker_log_relay
+except ImportError:
+    from crawl_limits import CrawlLimits
+    from csv_index import CsvIndex, RowRecorder, iter_records
+    from logger_config import init_worker_logging, start_worker_log_relay
+
 # Get a logger instance for this module
 logger = logging.getLogger(__name__)
 
+# Processes used to parse changed CSV files (parsing is CPU-bound)
+DEFAULT_PARSE_WORKERS = min(8, os.cpu_count() or 1)
 
-def find_csv_files(directory):
+
+def iter_csv_files(directory):
     """
-    Finds all CSV files in the specified directory.
+    Yields the full paths of the CSV files in the specified directory.
 
     Args:
         directory (str): The path to the directory to search.
 
-    Returns:
-        list: A list of full file paths for CSV files found.
+    Yields:
+        str: Full file path of each CSV file found.
     """
-    csv_files = []
     if not os.path.isdir(directory):
         logger.error(
             f"Input directory not found or is not a directory: {directory}"
             )
-        return csv_files
+        return
 
+    found = False
     try:
-        for filename in os.listdir(directory):
-            if filename.lower().endswith(".csv"):
-                full_path = os.path.join(directory, filename)
-                if os.path.isfile(full_path):
-                    csv_files.append(full_path)
-                    logger.debug(f"Found CSV file: {full_path}")
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(".csv") and entry.is_file():
+                    found = True
+                    logger.debug(f"Found CSV file: {entry.path}")
+                    yield entry.path
     except OSError as e:
         logger.error(f"Error listing directory {directory}: {e}")
 
-    if not csv_files:
+    if not found:
         logger.warning(f"No CSV files found in directory: {directory}")
 
-    return csv_files
+
+def find_csv_files(directory):
+    """
+    Finds all CSV files in the specified directory.
+
+    Args:
+        directory (str): The path to the directory to search.
+
+    Returns:
+        list: A list of full file paths for CSV files found.
+    """
+    return list(iter_csv_files(directory))
 
 
 def validate_url(url_string):
@@ -60,24 +85,30 @@ def validate_url(url_string):
         # urlparse can raise ValueError for malformed URLs (though less common
         #  now)
         logger.debug(
-            f"URL validation failed due to ValueError for: {url_string}"
+            "URL validation failed due to ValueError for: %s", url_string
         )
         return False
 
 
-def process_csv_file(filepath):
+def iter_csv_rows(filepath, recorder=None):
     """
-    Reads a single CSV file, validates URLs, and extracts valid ones.
-    Assumes CSV format: url,css_selector (header optional, only 'url' column
-      used).
+    Reads a single CSV file lazily, yielding each valid row as it is parsed.
+    Assumes CSV format: url,css_selector[,limits] (header optional). The
+      optional third column holds per-row crawl limits, e.g.
+      "max_depth=2;max_pages=200" (see `CrawlLimits.from_string`).
+
+    Read errors are logged and end the iteration; rows already yielded
+      stay valid.
 
     Args:
         filepath (str): The path to the CSV file.
+        recorder (RowRecorder, optional): Records each yielded row for the
+          CSV index; it is only marked complete if the whole file was read.
 
-    Returns:
-        list: A list of tuples `(url, css_selector)` for valid rows.
+    Yields:
+        tuple: `(url, css_selector)` for valid rows, or
+            `(url, css_selector, CrawlLimits)` for rows that set limits.
     """
-    valid_rows = []
     try:
         with open(filepath, mode='r', newline='', encoding='utf-8') as csvfile:
             # Sniff to detect dialect and header presence
@@ -93,9 +124,12 @@ def process_csv_file(filepath):
                     f"Could not determine CSV header presence in {filepath}. "
                     "Assuming no header."
                 )
+                has_header = False
                 csvfile.seek(0)
                 reader = csv.reader(csvfile)
 
+            # i counts reader records from 1 (header included); the
+            # recorder gets the 0-based record position
             for i, row in enumerate(reader, start=2 if has_header else 1):
                 # Adjust line number based on header
                 if not row:  # Skip empty rows
@@ -106,22 +140,43 @@ def process_csv_file(filepath):
 
                 if not selector_cell:
                     logger.warning(
-                         f"Missing CSS selector in {os.path.basename(filepath)}"
-                         ":{i} for URL '{url_cell}'. Skipping row."
+                        "Missing CSS selector in %s:%d for URL '%s'. Skipping row.",
+                        os.path.basename(filepath), i, url_cell
                     )
                     continue  # Skip row if selector is missing
 
+                limits_cell = row[2].strip() if len(row) > 2 else ""
+                limits = None
+                if limits_cell:
+                    try:
+                        limits = CrawlLimits.from_string(limits_cell)
+                    except ValueError as e:
+                        logger.warning(
+                            "Invalid crawl limits in %s:%d: '%s' (%s). Skipping row.",
+                            os.path.basename(filepath), i, limits_cell, e
+                        )
+                        continue
+
                 if validate_url(url_cell):
-                    valid_rows.append((url_cell, selector_cell))
                     logger.debug(
-                        f"Validated row: ('{url_cell}', '{selector_cell}') "
-                        "from {os.path.basename(filepath)}:{i}"
+                        "Validated row: ('%s', '%s') from %s:%d",
+                        url_cell, selector_cell, os.path.basename(filepath), i
                     )
+                    if recorder is not None:
+                        recorder.add(i - 1, url_cell, selector_cell, limits_cell)
+                    if limits is not None:
+                        yield (url_cell, selector_cell, limits)
+                    else:
+                        yield (url_cell, selector_cell)
                 else:
                     logger.warning(
-                        f"Invalid URL format found in {os.path.basename(filepath)}:{i}: '{row[0]}'. Skipping row."
+                        "Invalid URL format found in %s:%d: '%s'. Skipping row.",
+                        os.path.basename(filepath), i, row[0]
                     )  # Log original value
 
+        if recorder is not None:
+            recorder.finish()
+
     except FileNotFoundError:
         logger.error(f"CSV file not found: {filepath}")
     except IOError as e:
@@ -134,52 +189,233 @@ def process_csv_file(filepath):
             exc_info=True
         )
 
-    return valid_rows
-
 
-def load_all_valid_urls(directory="input_csvs"):
+def process_csv_file(filepath):
     """
-    Loads and validates URLs from all CSV files in the specified directory.
+    Reads a single CSV file, validates URLs, and extracts valid ones.
+    See `iter_csv_rows` for the format; this collects its rows.
 
     Args:
-        directory (str): The directory containing CSV files. Defaults to
-          "input_csvs".
+        filepath (str): The path to the CSV file.
 
     Returns:
-        list: A consolidated list of unique (by URL) tuples `(url,
-         css_selector)`.
-            If a URL appears multiple times with different selectors,
-             only the first encountered pair is kept.
+        list: A list of tuples `(url, css_selector)` for valid rows, or
+            `(url, css_selector, CrawlLimits)` for rows that set limits.
+    """
+    return list(iter_csv_rows(filepath))
+
+
+def _url_key(url):
+    """Compact dedupe key: a 64-bit BLAKE2b hash of the URL, as an int."""
+    return int.from_bytes(
+        hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'big'
+    )
+
+
+def _parse_csv_file(filepath):
+    """Pool worker: the rows of `filepath` and the `RowRecorder` of the read."""
+    recorder = RowRecorder()
+    rows = list(iter_csv_rows(filepath, recorder))
+    return rows, recorder
+
+
+def _start_parse_pool(max_workers):
+    """
+    Starts the parser process pool and the relay for its log records.
+
+    Workers are started with forkserver (or spawn) rather than fork: by
+    now the log listener, progress and write-behind threads may be
+    running, and forking a multi-threaded process can deadlock on locks
+    those threads hold.
+
+    Returns:
+        tuple: (ProcessPoolExecutor, QueueListener relaying worker logs).
+    """
+    import multiprocessing  # Deferred: only batch parsing needs it
+    method = (
+        'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods()
+        else 'spawn'
+    )
+    context = multiprocessing.get_context(method)
+    log_queue, relay = start_worker_log_relay(context)
+    try:
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=context,
+            initializer=init_worker_logging,
+            initargs=(log_queue, logger.getEffectiveLevel())
+        )
+    except BaseException:
+        relay.stop()
+        raise
+    return executor, relay
+
+
+def _iter_indexed_rows(filepath, stat, index):
+    """Streams `filepath` through `iter_csv_rows`, indexing it once fully read."""
+    recorder = RowRecorder() if index is not None and stat is not None else None
+    yield from iter_csv_rows(filepath, recorder)
+    if recorder is not None and recorder.complete:
+        index.store(filepath, stat, recorder)
+
+
+def _iter_cached_rows(filepath, entry, index):
+    """
+    Yields the rows of `filepath` at the positions recorded in its index
+    `entry`, without sniffing or validating them. A read error or a
+    count/digest mismatch drops the entry so the next run re-parses.
+    """
+    recorder = RowRecorder()
+    wanted = iter_records(entry['runs'])
+    next_record = next(wanted, None)
+    try:
+        with open(filepath, mode='r', newline='', encoding='utf-8') as csvfile:
+            for record, row in enumerate(csv.reader(csvfile)):
+                if next_record is None:
+                    break
+                if record != next_record:
+                    continue
+                next_record = next(wanted, None)
+                url_cell, selector_cell = row[0].strip(), row[1].strip()
+                limits_cell = row[2].strip() if len(row) > 2 else ""
+                recorder.add(record, url_cell, selector_cell, limits_cell)
+                if limits_cell:
+                    yield (url_cell, selector_cell, CrawlLimits.from_string(limits_cell))
+                else:
+                    yield (url_cell, selector_cell)
+    except (IOError, csv.Error, IndexError, ValueError) as e:
+        logger.error(f"Error reading indexed CSV file {filepath}: {e}")
+        index.invalidate(filepath)
+        return
+    recorder.finish()
+    if (recorder.count, recorder.digest) != (entry['count'], entry['digest']):
+        logger.warning(f"CSV index entry for {filepath} is stale; it will be rebuilt.")
+        index.invalidate(filepath)
+
+
+def _iter_file_rows(filepaths, index=None, max_workers=DEFAULT_PARSE_WORKERS):
+    """
+    Yields (filepath, rows) in `filepaths` order, `rows` being an iterable
+    to consume before the next file is pulled. Files with a current `index`
+    entry are read through it. The first file that needs parsing is
+    streamed row by row in this process; if more do and `max_workers` > 1,
+    the rest are parsed meanwhile in worker processes. Parsed files are
+    recorded in the index.
+    """
+    sources = []  # (filepath, stat, index entry or None)
+    for filepath in filepaths:
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            stat = None  # Let the parser report it
+        entry = (
+            index.lookup(filepath, stat)
+            if index is not None and stat is not None else None
+        )
+        sources.append((filepath, stat, entry))
+    stale = [filepath for filepath, _, entry in sources if entry is None]
+    if index is not None:
+        logger.info(
+            f"CSV index: {len(sources) - len(stale)} cached, {len(stale)} to parse."
+        )
+
+    executor = relay = None
+    futures = {}
+    if len(stale) > 1 and max_workers > 1:
+        try:
+            executor, relay = _start_parse_pool(min(max_workers, len(stale) - 1))
+        except (OSError, NotImplementedError, ValueError) as e:
+            logger.warning(f"Parsing CSV files sequentially ({e}).")
+        else:
+            futures = {
+                filepath: executor.submit(_parse_csv_file, filepath)
+                for filepath in stale[1:]
+            }
+    try:
+        for filepath, stat, entry in sources:
+            if entry is not None:
+                yield filepath, _iter_cached_rows(filepath, entry, index)
+            elif filepath in futures:
+                rows, recorder = futures.pop(filepath).result()
+                if index is not None and stat is not None and recorder.complete:
+                    index.store(filepath, stat, recorder)
+                yield filepath, rows
+            else:
+                yield filepath, _iter_indexed_rows(filepath, stat, index)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+            relay.stop()  # Drains records the workers logged
+
+
+def iter_valid_urls(directory="input_csvs", use_index=True,
+                    max_workers=DEFAULT_PARSE_WORKERS):
     """
-    all_valid_data = {}
-    # Use dict to store url -> selector, ensuring URL uniqueness
-    csv_files = find_csv_files(directory)
+    Streams unique valid rows from all CSV files in the specified directory.
+
+    Rows are yielded as they are read, so crawling can start before the
+    first file has been read in full. Unchanged files are read through the
+    index of valid row positions (see `CsvIndex`); changed ones are parsed,
+    in parallel worker processes after the first one. Only a 64-bit hash
+    per seen URL is kept for deduplication, not the rows themselves.
 
-    if not csv_files:
+    Args:
+        directory (str): The directory containing CSV files. Defaults to
+          "input_csvs".
+        use_index (bool): Read and update the sidecar index of validated rows.
+        max_workers (int): Processes used to parse changed files; 1 parses
+          in this process.
+
+    Yields:
+        tuple: `(url, css_selector)` (or `(url, css_selector, CrawlLimits)`),
+            unique by URL. If a URL appears multiple times, only the first
+            encountered row (in file and row order) is yielded.
+    """
+    filepaths = sorted(iter_csv_files(directory))
+    if not filepaths:
         logger.warning(
             f"No CSV files found or accessible in {directory}. "
             "Cannot load URLs."
         )
-        return []
+        return
+    index = CsvIndex(directory) if use_index else None
 
-    for filepath in csv_files:
+    seen = set()
+    for filepath, rows in _iter_file_rows(filepaths, index, max_workers):
         logger.info(f"Processing CSV file: {filepath}")
-        rows_from_file = process_csv_file(filepath)
-        for url, selector in rows_from_file:
-            if url not in all_valid_data:
-                # Keep first encountered selector for a unique URL
-                all_valid_data[url] = selector
-            else:
+        for row in rows:
+            key = _url_key(row[0])
+            if key in seen:
                 logger.debug(
-                    f"Duplicate URL '{url}' found in {os.path.basename(filepath)}. Keeping first encountered selector '{all_valid_data[url]}'."
+                    "Duplicate URL '%s' found in %s. Keeping first encountered row.",
+                    row[0], os.path.basename(filepath)
                 )
+                continue
+            seen.add(key)
+            yield row
 
-    # Convert dict back to list of tuples
-    result_list = list(all_valid_data.items())
+    if index is not None:
+        index.prune(filepaths)
+        index.save()
     logger.info(
-        f"Loaded {len(result_list)} unique valid URL/selector pairs from {len(csv_files)} CSV file(s)."
+        f"Loaded {len(seen)} unique valid URL/selector pairs from {len(filepaths)} CSV file(s)."
     )
-    return result_list
+
+
+def load_all_valid_urls(directory="input_csvs"):
+    """
+    Loads and validates URLs from all CSV files in the specified directory.
+
+    Args:
+        directory (str): The directory containing CSV files. Defaults to
+          "input_csvs".
+
+    Returns:
+        list: A consolidated list of unique (by URL) tuples `(url,
+         css_selector)` (or `(url, css_selector, CrawlLimits)`).
+            If a URL appears multiple times with different selectors,
+             only the first encountered row is kept.
+    """
+    return list(iter_valid_urls(directory))
 
 
 # Example usage (optional)
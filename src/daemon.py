@@ -0,0 +1,423 @@
+import argparse
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+try:
+    from .concurrency_manager import ConcurrencyManager, DEFAULT_MAX_WORKERS
+    from .csv_processor import iter_valid_urls
+    from .metrics import REGISTRY
+except ImportError:
+    from concurrency_manager import ConcurrencyManager, DEFAULT_MAX_WORKERS
+    from csv_processor import iter_valid_urls
+    from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECRAWL_INTERVAL_SECONDS = 3600  # Each site is recrawled hourly
+DEFAULT_POLL_INTERVAL_SECONDS = 5.0  # How often input_csvs is checked
+# Sites per `process_tasks` call. Smaller batches let triggered sites and
+#  CSV changes get picked up sooner during a long cycle.
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_CACHE_TTL_SECONDS = 300
+DEFAULT_CONTROL_HOST = "127.0.0.1"  # Control endpoint is local-only
+DEFAULT_CONTROL_PORT = 8765
+
+
+def _csv_signature(directory):
+    """Cheap change detector: (name, size, mtime) of every CSV file."""
+    try:
+        with os.scandir(directory) as entries:
+            return tuple(sorted(
+                (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+                for entry in entries
+                if entry.name.lower().endswith(".csv") and entry.is_file()
+            ))
+    except OSError:
+        return None
+
+
+class CrawlDaemon:
+    """
+    Resident crawl service: recrawls every CSV site on an interval.
+
+    One `ConcurrencyManager` lives for the whole process, so its executor
+    threads (and their pooled HTTP sessions), page cache, writer and store
+    stay warm between cycles. The input directory is polled for changes;
+    added sites are crawled right away and removed ones are dropped. Sites
+    can also be triggered on demand (see `serve_control`).
+
+    Args:
+        manager (ConcurrencyManager): Executes the crawls. Should be created
+            with a `cache_ttl` so its page cache persists across batches.
+        input_dir (str): Directory holding the input CSV files.
+        interval (float): Seconds between crawls of the same site.
+        poll_interval (float): Seconds between input-directory checks.
+        batch_size (int): Maximum sites handed to the manager at once.
+    """
+
+    def __init__(self, manager, input_dir="input_csvs",
+                 interval=DEFAULT_RECRAWL_INTERVAL_SECONDS,
+                 poll_interval=DEFAULT_POLL_INTERVAL_SECONDS,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        self.manager = manager
+        self.input_dir = input_dir
+        self.interval = interval
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.started_at = time.time()
+        self.cycles = 0  # Batches run so far
+        self._sites = {}  # url -> state dict (see `_new_site`)
+        self._triggered = deque()
+        self._running = []
+        self._csv_signature = None
+        self._reload_requested = True
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    @staticmethod
+    def _new_site(task):
+        return {
+            'task': task, 'next_due': 0.0, 'runs': 0, 'last_status': None,
+            'last_started': None, 'last_finished': None, 'last_result': None,
+        }
+
+    def reload_sites(self):
+        """Re-reads the input CSVs, adding, updating and dropping sites."""
+        signature = _csv_signature(self.input_dir)
+        # Parse in-process: reloads follow every CSV change, and starting a
+        #  parser process pool each time costs more than it saves
+        tasks = {
+            task[0]: task
+            for task in iter_valid_urls(self.input_dir, max_workers=1)
+        }
+        with self._lock:
+            self._csv_signature = signature
+            for url in list(self._sites):
+                if url not in tasks:
+                    del self._sites[url]
+            added = 0
+            for url, task in tasks.items():
+                site = self._sites.get(url)
+                if site is None:
+                    self._sites[url] = self._new_site(task)
+                    added += 1
+                else:
+                    site['task'] = task  # Selector or limits may have changed
+        logger.info(
+            f"Loaded {len(tasks)} site(s) from {self.input_dir} ({added} new)."
+        )
+
+    def request_reload(self):
+        """Forces a CSV reload before the next batch."""
+        self._reload_requested = True
+        self._wake.set()
+
+    def trigger(self, url):
+        """
+        Queues a known site to be crawled in the next batch.
+
+        Returns:
+            bool: False if `url` is not a site from the input CSVs.
+        """
+        with self._lock:
+            if url not in self._sites:
+                return False
+            if url not in self._triggered:
+                self._triggered.append(url)
+        logger.info(f"Crawl of {url} triggered.")
+        self._wake.set()
+        return True
+
+    def status(self):
+        """Returns a JSON-serializable snapshot of the daemon."""
+        now = time.time()
+        with self._lock:
+            due = sum(1 for site in self._sites.values() if site['next_due'] <= now)
+            status = {
+                'started_at': self.started_at,
+                'uptime': round(now - self.started_at, 1),
+                'cycles': self.cycles,
+                'sites': len(self._sites),
+                'due': due,
+                'triggered': list(self._triggered),
+                'running': list(self._running),
+            }
+        status['live'] = dict(self.manager.task_stats)
+        if self.manager.page_cache is not None:
+            status['page_cache'] = self.manager.page_cache.stats()
+        return status
+
+    def site_status(self, url=None):
+        """Returns the state of one site (None if unknown) or of all sites."""
+        with self._lock:
+            if url is not None:
+                site = self._sites.get(url)
+                return self._public_state(url, site) if site else None
+            return [self._public_state(u, s) for u, s in self._sites.items()]
+
+    @staticmethod
+    def _public_state(url, site):
+        state = {key: value for key, value in site.items() if key != 'task'}
+        state['url'] = url
+        state['css_selector'] = site['task'][1]
+        return state
+
+    def _check_inputs(self):
+        if self._reload_requested or _csv_signature(self.input_dir) != self._csv_signature:
+            self._reload_requested = False
+            self.reload_sites()
+
+    def _next_batch(self):
+        """Triggered sites first, then the most overdue ones. Lock held."""
+        batch = []
+        while self._triggered and len(batch) < self.batch_size:
+            url = self._triggered.popleft()
+            if url in self._sites:
+                batch.append(url)
+        now = time.time()
+        overdue = sorted(
+            (site['next_due'], url) for url, site in self._sites.items()
+            if site['next_due'] <= now and url not in batch
+        )
+        batch.extend(url for _, url in overdue[:self.batch_size - len(batch)])
+        return batch
+
+    def run_once(self):
+        """
+        Runs one batch of due or triggered sites.
+
+        Returns:
+            int: Number of sites processed.
+        """
+        with self._lock:
+            if self._stop.is_set():
+                return 0
+            urls = self._next_batch()
+            tasks = [self._sites[url]['task'] for url in urls]
+            started = time.time()
+            for url in urls:
+                self._sites[url]['last_started'] = started
+            self._running = urls
+        if not tasks:
+            return 0
+        logger.info(f"Crawl batch {self.cycles + 1}: {len(tasks)} site(s).")
+        try:
+            results = self.manager.process_tasks(self._until_stopped(tasks))
+        finally:
+            with self._lock:
+                self._running = []
+        with self._lock:
+            self.cycles += 1
+            finished = time.time()
+            for result in results:
+                site = self._sites.get(result.get('url'))
+                if site is None:
+                    continue  # Removed from the CSVs meanwhile
+                status = result.get('status')
+                site['last_status'] = status
+                site['last_result'] = result
+                if status == 'cancelled':
+                    continue  # Still due; picked up again next batch
+                site['runs'] += 1
+                site['last_finished'] = finished
+                site['next_due'] = finished + self.interval
+        return len(tasks)
+
+    def _until_stopped(self, tasks):
+        """
+        Feeds `tasks` to the manager until `stop` is called. `process_tasks`
+        replaces the run deadline, so a `cancel()` from `stop` just before
+        a batch starts would be lost; tasks are pulled after the new
+        deadline exists, so cancelling again here ends the batch.
+        """
+        for task in tasks:
+            if self._stop.is_set():
+                self.manager.cancel()
+                return
+            yield task
+
+    def _seconds_until_due(self):
+        with self._lock:
+            if self._triggered:
+                return 0.0
+            next_due = min(
+                (site['next_due'] for site in self._sites.values()), default=None
+            )
+        if next_due is None:
+            return self.poll_interval
+        return max(0.0, min(self.poll_interval, next_due - time.time()))
+
+    def run_forever(self):
+        """Runs batches until `stop` is called."""
+        logger.info(
+            f"Daemon started: recrawl interval {self.interval}s, "
+            f"watching {self.input_dir}."
+        )
+        while not self._stop.is_set():
+            self._check_inputs()
+            if self.run_once():
+                if self._stop.is_set():
+                    break
+                if self.manager.run_deadline.reason() == 'cancelled':
+                    # SIGINT during a batch cancels it; stop the daemon too
+                    self._stop.set()
+                continue
+            self._wake.wait(self._seconds_until_due())
+            self._wake.clear()
+        logger.info("Daemon stopped.")
+
+    def stop(self):
+        """Stops after the current batch; in-flight crawls are cancelled."""
+        self._stop.set()
+        self._wake.set()
+        self.manager.cancel()
+
+
+def _make_handler(daemon):
+    class ControlHandler(BaseHTTPRequestHandler):
+        """
+        GET /status, GET /sites[?url=...], POST /trigger?url=...,
+        POST /reload, POST /stop. All responses are JSON, except
+        GET /metrics (Prometheus text format).
+        """
+
+        def _send_json(self, code, payload):
+            body = json.dumps(payload, default=str).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _route(self):
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query)
+            return parsed.path.rstrip('/') or '/', query.get('url', [None])[0]
+
+        def do_GET(self):
+            path, url = self._route()
+            if path == '/status':
+                self._send_json(200, daemon.status())
+            elif path == '/metrics':
+                body = REGISTRY.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            elif path == '/sites':
+                state = daemon.site_status(url)
+                if url is not None and state is None:
+                    self._send_json(404, {'error': f"Unknown site: {url}"})
+                else:
+                    self._send_json(200, state)
+            else:
+                self._send_json(404, {'error': f"Unknown endpoint: {path}"})
+
+        def do_POST(self):
+            path, url = self._route()
+            if path == '/trigger':
+                if not url:
+                    self._send_json(400, {'error': "Missing 'url' parameter."})
+                elif daemon.trigger(url):
+                    self._send_json(202, {'triggered': url})
+                else:
+                    self._send_json(404, {'error': f"Unknown site: {url}"})
+            elif path == '/reload':
+                daemon.request_reload()
+                self._send_json(202, {'reload': True})
+            elif path == '/stop':
+                self._send_json(202, {'stopping': True})
+                daemon.stop()
+            else:
+                self._send_json(404, {'error': f"Unknown endpoint: {path}"})
+
+        def log_message(self, format, *args):
+            logger.debug("Control request from %s: " + format, self.address_string(), *args)
+
+    return ControlHandler
+
+
+def serve_control(daemon, host=DEFAULT_CONTROL_HOST, port=DEFAULT_CONTROL_PORT):
+    """
+    Starts the HTTP control endpoint for `daemon` on a background thread.
+
+    Returns:
+        ThreadingHTTPServer: Call `shutdown()` on it to stop serving.
+    """
+    server = ThreadingHTTPServer((host, port), _make_handler(daemon))
+    server.daemon_threads = True
+    thread = threading.Thread(
+        target=server.serve_forever, name="ControlServer", daemon=True
+    )
+    thread.start()
+    logger.info(f"Control endpoint listening on http://{host}:{server.server_port}")
+    return server
+
+
+if __name__ == '__main__':
+    try:
+        from logger_config import setup_logging
+        setup_logging()
+    except ImportError:
+        logging.basicConfig(level=logging.INFO)
+    from crawl_history import CrawlHistory, DEFAULT_HISTORY_FILE
+    from crawl_limits import CrawlLimits
+
+    parser = argparse.ArgumentParser(
+        description="Run the crawler as a resident service with scheduled recrawls."
+    )
+    parser.add_argument('--input-dir', default="input_csvs")
+    parser.add_argument(
+        '--interval', type=float, default=DEFAULT_RECRAWL_INTERVAL_SECONDS,
+        help="Seconds between crawls of a site (default: %(default)s)."
+    )
+    parser.add_argument(
+        '--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL_SECONDS,
+        help="Seconds between input directory checks (default: %(default)s)."
+    )
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument('--max-per-domain', type=int, default=2)
+    parser.add_argument('--task-timeout', type=float)
+    parser.add_argument('--limits', type=CrawlLimits.from_string, metavar='SPEC')
+    parser.add_argument(
+        '--cache-ttl', type=float, default=DEFAULT_CACHE_TTL_SECONDS,
+        help="Seconds cached pages stay valid across batches (default: %(default)s)."
+    )
+    parser.add_argument('--history', nargs='?', const=DEFAULT_HISTORY_FILE)
+    parser.add_argument('--host', default=DEFAULT_CONTROL_HOST)
+    parser.add_argument(
+        '--port', type=int, default=DEFAULT_CONTROL_PORT,
+        help="Control endpoint port; 0 disables it (default: %(default)s)."
+    )
+    args = parser.parse_args()
+
+    manager = ConcurrencyManager(
+        max_workers=args.workers, task_timeout=args.task_timeout,
+        limits=args.limits, max_per_domain=args.max_per_domain,
+        history=CrawlHistory(args.history) if args.history else None,
+        cache_ttl=args.cache_ttl
+    )
+    crawl_daemon = CrawlDaemon(
+        manager, input_dir=args.input_dir, interval=args.interval,
+        poll_interval=args.poll_interval, batch_size=args.batch_size
+    )
+    signal.signal(signal.SIGTERM, lambda signum, frame: crawl_daemon.stop())
+    control = serve_control(crawl_daemon, args.host, args.port) if args.port else None
+    try:
+        crawl_daemon.run_forever()
+    except KeyboardInterrupt:
+        logger.warning("Interrupted; shutting down.")
+    finally:
+        if control is not None:
+            control.shutdown()
+        manager.shutdown(cancel_futures=True)
@@ -0,0 +1,98 @@
+import threading
+import time
+
+
+class DeadlineExceeded(Exception):
+    """Raised when work is abandoned because its deadline hit or it was cancelled."""
+
+    def __init__(self, reason="deadline"):
+        super().__init__(f"Work stopped: {reason}")
+        self.reason = reason
+
+
+class Deadline:
+    """
+    A monotonic time budget combined with a cooperative cancel signal.
+
+    Deadlines are checked between units of work (e.g. between pages in
+    `crawl_navigation`) rather than interrupting anything mid-flight. A child
+    deadline shares its parent's cancel event and never outlives the parent,
+    which lets a per-run budget cap every per-task budget derived from it.
+
+    Args:
+        timeout (float, optional): Seconds from now until expiry. None means
+            no time limit (only cancellation applies).
+        cancel_event (threading.Event, optional): Event that, once set,
+            cancels this deadline and all of its children.
+        expires_at (float, optional): Absolute `time.monotonic()` expiry;
+            used internally when deriving child deadlines.
+    """
+
+    def __init__(self, timeout=None, cancel_event=None, expires_at=None):
+        if expires_at is None and timeout is not None:
+            expires_at = time.monotonic() + timeout
+        self.expires_at = expires_at
+        self.cancel_event = cancel_event or threading.Event()
+
+    def child(self, timeout=None):
+        """Returns a deadline no later than this one, sharing its cancel event."""
+        expires_at = self.expires_at
+        if timeout is not None:
+            candidate = time.monotonic() + timeout
+            expires_at = candidate if expires_at is None else min(expires_at, candidate)
+        return Deadline(cancel_event=self.cancel_event, expires_at=expires_at)
+
+    def cancel(self):
+        """Signals cancellation to this deadline and every child sharing the event."""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def remaining(self):
+        """Seconds left before expiry (never negative), or None if unbounded."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        """True if the deadline has passed or cancellation was requested."""
+        if self.cancelled:
+            return True
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def reason(self):
+        """Returns 'cancelled', 'deadline', or None if still live."""
+        if self.cancelled:
+            return "cancelled"
+        if self.expired():
+            return "deadline"
+        return None
+
+    def check(self):
+        """Raises DeadlineExceeded if the deadline has passed or was cancelled."""
+        reason = self.reason()
+        if reason:
+            raise DeadlineExceeded(reason)
+
+    def clamp(self, timeout):
+        """Caps a timeout (e.g. an HTTP request timeout) to the time remaining."""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return min(timeout, remaining)
+
+    def sleep(self, seconds):
+        """
+        Sleeps for up to `seconds`, waking early on cancellation.
+
+        Returns:
+            bool: True if the full sleep elapsed, False if it was cut short by
+                cancellation or by the deadline expiring first.
+        """
+        remaining = self.remaining()
+        if remaining is not None and remaining < seconds:
+            self.cancel_event.wait(remaining)
+            return False
+        return not self.cancel_event.wait(seconds)
@@ -1,39 +1,116 @@
 import os
+import contextlib
+import gzip
+import hashlib
 import logging
 import tempfile
 import time
 
+try:
+    import fcntl  # POSIX advisory locks; unavailable on Windows
+except ImportError:
+    fcntl = None
+
+try:
+    import zstandard  # Optional; only needed for compression='zstd'
+except ImportError:
+    zstandard = None
+
 # Assuming utils.py is in the same directory or src is in PYTHONPATH
 try:
     from .utils import get_website_name
+    from .tracing import span
 except ImportError:
     # Fallback for standalone execution or different project structure
     from utils import get_website_name
+    from tracing import span
 
 logger = logging.getLogger(__name__)
 
 OUTPUT_DIR = "output_maps"
+# 'flat' puts every map directly in OUTPUT_DIR; 'sharded' spreads them over
+#  hashed-prefix subdirectories (e.g. output_maps/3f/a2/<name>_nav_map.md).
+OUTPUT_LAYOUTS = ('flat', 'sharded')
+SHARD_LEVELS = 2  # Two levels of 256 directories each
 LOCK_SUFFIX = ".lock"
-STALE_LOCK_THRESHOLD_SECONDS = 300  # 5 minutes
+STALE_LOCK_THRESHOLD_SECONDS = 300  # 5 minutes (lock-file fallback only)
+LOCK_TIMEOUT_SECONDS = 10.0  # Bounded wait for a contended lock
+LOCK_POLL_INTERVAL_SECONDS = 0.05
+
+# fsync policies: 'none' leaves flushing to the OS (fast), 'file' syncs the
+#  temp file before the rename, 'full' also syncs the directory entry so the
+#  rename itself survives a crash (durable).
+FSYNC_POLICIES = ('none', 'file', 'full')
+DEFAULT_FSYNC_POLICY = 'none'
+
+# Optional map compression. Compressed maps get an extra suffix
+#  (e.g. example_com_nav_map.md.gz); use `open_map_file` / `read_map_file`
+#  to read any map regardless of compression.
+COMPRESSIONS = ('gzip', 'zstd')
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
 
+def shard_path(filename, output_dir=None):
+    """
+    Returns the sharded location of a map file name.
+
+    The first SHARD_LEVELS byte pairs of the name's SHA-1 pick the
+    subdirectories, keeping every directory small no matter how many maps
+    exist.
 
-def generate_filename(url):
+    Args:
+        filename (str): Bare map file name, e.g. "example_com_nav_map.md".
+        output_dir (str, optional): Root directory; defaults to OUTPUT_DIR.
+
+    Returns:
+        str: e.g. "output_maps/3f/a2/example_com_nav_map.md".
+    """
+    digest = hashlib.sha1(filename.encode('utf-8')).hexdigest()
+    shards = [digest[i * 2:i * 2 + 2] for i in range(SHARD_LEVELS)]
+    return os.path.join(output_dir or OUTPUT_DIR, *shards, filename)
+
+
+def validate_compression(compression):
+    """Raises ValueError for an unknown or unavailable compression."""
+    if compression is None:
+        return
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression}")
+    if compression == 'zstd' and zstandard is None:
+        raise ValueError(
+            "compression='zstd' requires the 'zstandard' package."
+        )
+
+
+def generate_filename(url, layout='flat', compression=None):
     """
     Generates the full path for the output markdown file based on the URL.
 
     Args:
         url (str): The URL of the website.
+        layout (str): One of OUTPUT_LAYOUTS.
+        compression (str, optional): One of COMPRESSIONS; appends its suffix.
 
     Returns:
-        str: The full file path (e.g., "output_maps/example_com_nav_map.md").
+        str: The full file path (e.g., "output_maps/example_com_nav_map.md",
+            or "output_maps/3f/a2/example_com_nav_map.md" when sharded).
     """
+    validate_compression(compression)
     website_name = get_website_name(url)
     filename = f"{website_name}_nav_map.md"
+    if compression:
+        filename += COMPRESSION_SUFFIXES[compression]
+    if layout == 'sharded':
+        return shard_path(filename)
+    if layout != 'flat':
+        raise ValueError(f"Unknown output layout: {layout}")
     return os.path.join(OUTPUT_DIR, filename)
 
 
 def _cleanup_stale_lock(lock_file_path):
-    """Checks if a lock file is stale and removes it."""
+    """Checks if a lock file is stale and removes it (lock-file fallback only)."""
     try:
         lock_mtime = os.path.getmtime(lock_file_path)
         if (time.time() - lock_mtime) > STALE_LOCK_THRESHOLD_SECONDS:
@@ -50,72 +127,178 @@ def _cleanup_stale_lock(lock_file_path):
     return False  # Lock not stale or couldn't be removed
 
 
-def write_map_file(filepath, content):
+def _acquire_lock(lock_file_path, timeout=LOCK_TIMEOUT_SECONDS):
+    """
+    Takes an exclusive advisory lock for a map file, waiting up to `timeout`.
+
+    With `fcntl` available the lock is a kernel `flock` on the `.lock` file:
+    the kernel drops it when the holder closes the file or dies, so a crashed
+    writer never blocks the path. A lock file left behind by a crash is
+    simply locked and reused by the next writer.
+    Without `fcntl` (e.g. Windows) an exclusively-created lock file is used,
+    with the stale-lock heuristic as before.
+
+    Returns:
+        int or bool: A handle to pass to `_release_lock`, or None if the lock
+            could not be acquired in time.
+    """
+    give_up_at = time.monotonic() + timeout
+    if fcntl is not None:
+        while True:
+            fd = os.open(lock_file_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                if time.monotonic() >= give_up_at:
+                    return None
+                time.sleep(LOCK_POLL_INTERVAL_SECONDS)
+                continue
+            except OSError:
+                os.close(fd)
+                raise
+            # The previous holder unlinks the lock file on release; if that
+            #  happened after our open, we locked an orphaned inode. Retry.
+            try:
+                if os.stat(lock_file_path).st_ino == os.fstat(fd).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+
+    while True:
+        try:
+            # Use 'x' mode to create file exclusively, fails if it exists
+            with open(lock_file_path, 'x') as lock_file:
+                lock_file.write(f"Locked at {time.time()}")
+            return True
+        except FileExistsError:
+            if _cleanup_stale_lock(lock_file_path):
+                continue
+            if time.monotonic() >= give_up_at:
+                return None
+            time.sleep(LOCK_POLL_INTERVAL_SECONDS)
+
+
+def _release_lock(lock_file_path, handle):
+    """Releases a lock taken by `_acquire_lock`."""
+    if fcntl is not None:
+        try:
+            # Unlink while still holding the lock; waiters detect the
+            #  orphaned inode and retry on a fresh file.
+            os.remove(lock_file_path)
+        except OSError as e:
+            logger.error(f"Failed to remove lock file {lock_file_path}: {e}")
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+            os.close(handle)
+        return
+    try:
+        os.remove(lock_file_path)
+    except OSError as e:
+        logger.error(f"Failed to remove lock file {lock_file_path}: {e}")
+
+
+def _fsync_directory(directory):
+    """Flushes a directory entry (e.g. a rename) to disk where supported."""
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # Not supported on this platform (e.g. Windows)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def _compressed_stream(raw_file, compression):
+    """Wraps a binary file in a compressing writer (or passes it through)."""
+    if compression == 'gzip':
+        # mtime=0 keeps identical maps byte-identical across runs
+        return gzip.GzipFile(fileobj=raw_file, mode='wb', mtime=0)
+    if compression == 'zstd':
+        return zstandard.ZstdCompressor().stream_writer(raw_file, closefd=False)
+    return contextlib.nullcontext(raw_file)
+
+
+def write_map_file(filepath, content, fsync=None,
+                   lock_timeout=LOCK_TIMEOUT_SECONDS, compression=None):
     """
     Writes the markdown content to the specified file path atomically
-    using a temporary file and os.rename, with basic locking.
+    using a temporary file and os.replace, under an exclusive lock.
 
-    Includes stale lock file cleanup.
+    Contention waits up to `lock_timeout` for the other writer instead of
+    failing immediately.
 
     Args:
         filepath (str): The target path for the markdown file in OUTPUT_DIR.
-        content (str): The markdown content to write.
+        content (str or iterable of str): The markdown content to write. An
+            iterable (e.g. `crawler.iter_format_tree`) is streamed chunk by
+            chunk, so the full map never has to be held in memory.
+        fsync (str, optional): One of FSYNC_POLICIES; defaults to
+            DEFAULT_FSYNC_POLICY.
+        lock_timeout (float): Seconds to wait for a contended lock.
+        compression (str, optional): One of COMPRESSIONS. None writes plain
+            UTF-8 text.
 
     Returns:
         bool: True if the write was successful, False otherwise.
     """
+    fsync = fsync or DEFAULT_FSYNC_POLICY
+    if fsync not in FSYNC_POLICIES:
+        raise ValueError(f"Unknown fsync policy: {fsync}")
+    validate_compression(compression)
+    chunks = (content,) if isinstance(content, str) else content
     lock_file_path = filepath + LOCK_SUFFIX
     temp_file_path = None  # Initialize to ensure it's defined in finally block
+    target_dir = os.path.dirname(filepath) or OUTPUT_DIR
 
     # 1. Ensure output directory exists
     try:
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        os.makedirs(target_dir, exist_ok=True)
     except OSError as e:
-        logger.error(f"Failed to create output directory {OUTPUT_DIR}: {e}")
+        logger.error(f"Failed to create output directory {target_dir}: {e}")
         return False
 
-    # 2. Check for and potentially clean up stale lock
-    if os.path.exists(lock_file_path):
-        if not _cleanup_stale_lock(lock_file_path):
-            logger.warning(
-                f"Lock file {lock_file_path} exists and is not stale. Skipping write for {filepath}."
-            )
-            return False  # Another process might be actively writing
-
-    # 3. Attempt to acquire the lock (create lock file)
+    # 2. Acquire the lock, waiting briefly if another writer holds it
     try:
-        # Use 'x' mode to create file exclusively, fails if it exists
-        with open(lock_file_path, 'x') as lock_file:
-            lock_file.write(f"Locked at {time.time()}")
-        logger.debug(f"Acquired lock: {lock_file_path}")
-    except FileExistsError:
+        with span('lock_wait', path=filepath):
+            lock_handle = _acquire_lock(lock_file_path, lock_timeout)
+    except OSError as e:
+        logger.error(f"Failed to lock {lock_file_path}: {e}")
+        return False
+    if lock_handle is None:
         logger.warning(
-            f"Failed to acquire lock (already exists): {lock_file_path}. Skipping write for {filepath}."
+            f"Timed out after {lock_timeout}s waiting for lock {lock_file_path}. Skipping write for {filepath}."
         )
         return False
-    except IOError as e:
-        logger.error(f"Failed to create lock file {lock_file_path}: {e}")
-        return False
+    logger.debug(f"Acquired lock: {lock_file_path}")
 
-    # 4. Write to temporary file and rename (Atomic Write)
+    # 3. Write to temporary file and rename (Atomic Write)
     try:
         # Create a temporary file in the same directory to ensure rename works
         #  across filesystems
         with tempfile.NamedTemporaryFile(
-            mode='w',
-            encoding='utf-8',
+            mode='wb',
             delete=False,
-            dir=OUTPUT_DIR,
+            dir=target_dir,
             suffix=".tmp"
         ) as temp_file:
             temp_file_path = temp_file.name
-            temp_file.write(content)
+            with _compressed_stream(temp_file, compression) as stream:
+                for chunk in chunks:
+                    stream.write(chunk.encode('utf-8'))
+            if fsync != 'none':
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
             logger.debug(
                 f"Content written to temporary file: {temp_file_path}"
             )
 
-        # Atomically rename the temporary file to the target file path
-        os.rename(temp_file_path, filepath)
+        # Atomically replace the target file with the temporary file
+        os.replace(temp_file_path, filepath)
+        if fsync == 'full':
+            _fsync_directory(target_dir)
         logger.info(f"Successfully wrote map file: {filepath}")
         return True
 
@@ -124,29 +307,72 @@ def write_map_file(filepath, content):
             f"Error writing or renaming file for {filepath}: {e}",
             exc_info=True
         )
-        # Clean up temporary file if it still exists
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.remove(temp_file_path)
-                logger.debug(
-                    f"Removed temporary file after error: {temp_file_path}"
-                )
-            except OSError as rm_err:
-                logger.error(
-                    f"Failed to remove temporary file {temp_file_path} after error: {rm_err}"
-                )
+        _remove_temp_file(temp_file_path)
         return False
+    except BaseException:
+        # E.g. a compressor error or UnicodeEncodeError while streaming, or
+        #  KeyboardInterrupt: don't leave the partial .tmp next to the map
+        _remove_temp_file(temp_file_path)
+        raise
 
     finally:
-        # 5. Release the lock (remove lock file)
-        if os.path.exists(lock_file_path):
-            try:
-                os.remove(lock_file_path)
-                logger.debug(f"Released lock: {lock_file_path}")
-            except OSError as e:
-                logger.error(
-                    f"Failed to remove lock file {lock_file_path}: {e}"
-                )
+        # 4. Release the lock
+        _release_lock(lock_file_path, lock_handle)
+        logger.debug(f"Released lock: {lock_file_path}")
+
+
+def _remove_temp_file(temp_file_path):
+    """Removes a failed write's temporary file if it still exists."""
+    if temp_file_path and os.path.exists(temp_file_path):
+        try:
+            os.remove(temp_file_path)
+            logger.debug(
+                f"Removed temporary file after error: {temp_file_path}"
+            )
+        except OSError as rm_err:
+            logger.error(
+                f"Failed to remove temporary file {temp_file_path} after error: {rm_err}"
+            )
+
+
+def open_map_file(filepath):
+    """
+    Opens a map file for reading as text, whatever its compression.
+
+    The format is detected from the file's magic bytes rather than its
+    suffix, so renamed or migrated files still read correctly.
+
+    Returns:
+        file object: UTF-8 text stream; use as a context manager.
+
+    Raises:
+        OSError: If the file cannot be opened.
+        ValueError: If the file is zstd-compressed and `zstandard` is missing.
+    """
+    with open(filepath, 'rb') as raw_file:
+        magic = raw_file.read(len(_ZSTD_MAGIC))
+    if magic.startswith(_GZIP_MAGIC):
+        return gzip.open(filepath, 'rt', encoding='utf-8')
+    if magic == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise ValueError(
+                f"{filepath} is zstd-compressed; install 'zstandard' to read it."
+            )
+        return zstandard.open(filepath, 'rt', encoding='utf-8')
+    return open(filepath, 'r', encoding='utf-8')
+
+
+def read_map_file(filepath):
+    """Returns the full text of a (possibly compressed) map file."""
+    with open_map_file(filepath) as f:
+        return f.read()
+
+
+def iter_map_file_lines(filepath):
+    """Streams the lines of a (possibly compressed) map file."""
+    with open_map_file(filepath) as f:
+        for line in f:
+            yield line.rstrip('\n')
 
 
 # Example usage (optional)
@@ -195,36 +421,22 @@ if __name__ == '__main__':
         else:
             print("File write failed or file not found.")
 
-    print("\n--- Testing Stale Lock Cleanup (Manual Check Required) ---")
-    stale_lock_path = os.path.join(OUTPUT_DIR, "stale_test.md.lock")
+    print("\n--- Testing Lock Contention ---")
+    contended_path = os.path.join(OUTPUT_DIR, "lock_test.md")
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    held = _acquire_lock(contended_path + LOCK_SUFFIX)
     try:
-        # Create a dummy old lock file
-        with open(stale_lock_path, 'w') as f:
-            f.write("dummy lock")
-        # Set its modification time to be old
-        old_time = time.time() - STALE_LOCK_THRESHOLD_SECONDS - 60
-        os.utime(stale_lock_path, (old_time, old_time))
-        print(f"Created dummy stale lock file: {stale_lock_path}")
-        print("Running write_map_file again should clean it up...")
-        write_map_file(
-            os.path.join(OUTPUT_DIR, "stale_test.md"),
-            "test content"
+        # While the lock is held, a second writer waits and then gives up
+        started = time.monotonic()
+        result = write_map_file(contended_path, "test content", lock_timeout=0.5)
+        print(
+            f"Write while locked returned {result} after "
+            f"{time.monotonic() - started:.2f}s (expected False after ~0.5s)"
         )
-        if not os.path.exists(stale_lock_path):
-            print("Stale lock file appears to have been removed.")
-        else:
-            print("Stale lock file still exists.")
-        # Clean up test file if created
-        if os.path.exists(os.path.join(OUTPUT_DIR, "stale_test.md")):
-            os.remove(os.path.join(OUTPUT_DIR, "stale_test.md"))
-        if os.path.exists(stale_lock_path):
-            # Clean up lock if somehow not removed
-            os.remove(stale_lock_path)
-
-    except Exception as e:
-        print(f"Error during stale lock test: {e}")
-        # Ensure cleanup even on error
-        if os.path.exists(os.path.join(OUTPUT_DIR, "stale_test.md")):
-            os.remove(os.path.join(OUTPUT_DIR, "stale_test.md"))
-        if os.path.exists(stale_lock_path):
-            os.remove(stale_lock_path)
+    finally:
+        _release_lock(contended_path + LOCK_SUFFIX, held)
+    result = write_map_file(contended_path, "test content", fsync='full')
+    print(f"Write after release (fsync='full') returned {result}")
+    for path in (contended_path, contended_path + LOCK_SUFFIX):
+        if os.path.exists(path):
+            os.remove(path)
@@ -1,13 +1,34 @@
+import atexit
+import copy
 import logging
 import logging.handlers
 import json
 import os
+import queue
+import socket
 import threading
 from datetime import datetime, timezone
 
+# Background listener that owns the real handlers; see setup_logging()
+_listener = None
+_listener_lock = threading.Lock()
+
 
 class JsonFormatter(logging.Formatter):
-    """Custom formatter to output log records as JSON."""
+    """
+    Custom formatter to output log records as JSON.
+
+    The hostname is serialized once up front and spliced into every
+    record, and a single encoder instance is reused, so each record only
+    pays for its own fields. The pid is taken from the record, so records
+    relayed from worker processes carry the worker's pid.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._encoder = json.JSONEncoder(default=str)
+        # '"hostname": "..."' without the surrounding braces
+        self._static_json = self._encoder.encode({"hostname": socket.gethostname()})[1:-1]
+
     def format(self, record):
         log_record = {
             "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
@@ -19,6 +40,7 @@ class JsonFormatter(logging.Formatter):
             "filename": record.filename,
             "func_name": record.funcName,
             "line_no": record.lineno,
+            "process": record.process if record.process is not None else os.getpid(),
         }
         # Include exception info if available
         if record.exc_info:
@@ -30,7 +52,48 @@ class JsonFormatter(logging.Formatter):
         extra_attrs = record.__dict__.get('__extra__', {})
         log_record.update(extra_attrs)
 
-        return json.dumps(log_record)
+        return f"{self._encoder.encode(log_record)[:-1]}, {self._static_json}}}"
+
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler for a listener in the same process.
+
+    The stock `prepare` fully formats the record (and drops exc_info) so it
+    can be pickled; here the record never leaves the process, so only the
+    message is resolved - args may be mutable objects that change after the
+    call returns - and formatting is left to the listener thread.
+    """
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        self.queue.put_nowait(record)
+
+
+def shutdown_logging():
+    """
+    Stops the background log listener, writing out any queued records.
+
+    Registered with atexit by setup_logging(); call it directly before
+    exiting abruptly (e.g. os._exit) or to flush logs at a known point.
+    Safe to call more than once.
+    """
+    global _listener
+    with _listener_lock:
+        listener, _listener = _listener, None
+    if listener is None:
+        return
+    listener.stop()  # Drains the queue before returning
+    for handler in listener.handlers:
+        try:
+            handler.flush()
+            handler.close()
+        except (OSError, ValueError):
+            pass  # Stream already closed by the interpreter or a test runner
 
 
 def setup_logging(log_dir="logs", log_file="app.log", level=logging.INFO):
@@ -40,6 +103,11 @@ def setup_logging(log_dir="logs", log_file="app.log", level=logging.INFO):
     Sets up logging to output to both the console and a rotating file.
     File logs are written in JSON format.
 
+    Logging calls only put the record on an in-memory queue; a background
+    QueueListener thread formats it and does the console and file I/O, so
+    crawl threads never block on a slow terminal or disk. Calling this
+    again replaces the previous listener.
+
     Args:
         log_dir (str): The directory to store log files. Defaults to "logs".
         log_file (str): The name of the log file. Defaults to "app.log".
@@ -64,6 +132,7 @@ def setup_logging(log_dir="logs", log_file="app.log", level=logging.INFO):
     root_logger.setLevel(level)  # Set the minimum level for the root logger
 
     # Prevent adding handlers multiple times if setup_logging is called again
+    shutdown_logging()
     if root_logger.hasHandlers():
         root_logger.handlers.clear()
 
@@ -75,7 +144,6 @@ def setup_logging(log_dir="logs", log_file="app.log", level=logging.INFO):
     console_handler.setFormatter(console_formatter)
     console_handler.setLevel(level)
     # Console handler respects the overall level
-    root_logger.addHandler(console_handler)
 
     # Rotating File Handler (JSON Format)
     # Rotate logs at 5MB, keep 5 backup files
@@ -85,13 +153,59 @@ def setup_logging(log_dir="logs", log_file="app.log", level=logging.INFO):
     json_formatter = JsonFormatter()
     file_handler.setFormatter(json_formatter)
     file_handler.setLevel(level) # File handler also respects the overall level
-    root_logger.addHandler(file_handler)
+
+    # Both handlers run on the listener thread; the root logger only enqueues
+    global _listener
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    listener.start()
+    with _listener_lock:
+        _listener = listener
+    root_logger.addHandler(_LocalQueueHandler(log_queue))
 
     logging.info(
-        "Logging configured: Console and Rotating File Handler (JSON)."
+        "Logging configured: Console and Rotating File Handler (JSON), "
+        "written by a background listener."
     )
 
 
+class _RelayHandler(logging.Handler):
+    """Re-dispatches records relayed from worker processes to this process's loggers."""
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+
+def start_worker_log_relay(mp_context):
+    """
+    Relays log records from worker processes started with `mp_context`
+    to this process's handlers, so workers never open the log file
+    themselves (parent and workers would write and rotate it at once).
+
+    Pass the returned queue to `init_worker_logging` as the pool
+    initializer; stop the listener once the pool has shut down.
+
+    Returns:
+        tuple: (queue, QueueListener).
+    """
+    log_queue = mp_context.Queue()
+    listener = logging.handlers.QueueListener(log_queue, _RelayHandler())
+    listener.start()
+    return log_queue, listener
+
+
+def init_worker_logging(log_queue, level):
+    """Pool initializer: sends the worker's log records to `log_queue`."""
+    root_logger = logging.getLogger()
+    root_logger.handlers.clear()
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    root_logger.setLevel(level)
+
+
+atexit.register(shutdown_logging)
+
+
 # Example usage (optional, can be removed or kept for testing)
 if __name__ == '__main__':
     setup_logging()
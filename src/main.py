@@ -1,12 +1,24 @@
+import argparse
+import json
 import logging
+import re
 import sys
+import time
+from collections import Counter
 from urllib.parse import urlparse
 
 # Assuming src is in PYTHONPATH or running from project root
+# Only light modules are imported here. The crawl stack (requests, bs4,
+#  via concurrency_manager/crawler) is imported when a crawl starts,
+#  so --help, --list and argument errors return without paying for it.
+#  tests/test_startup.py enforces this.
 try:
     from logger_config import setup_logging
-    from csv_processor import load_all_valid_urls
-    from concurrency_manager import ConcurrencyManager
+    from csv_processor import load_all_valid_urls, iter_valid_urls
+    from crawl_limits import CrawlLimits
+    from crawl_history import CrawlHistory, DEFAULT_HISTORY_FILE
+    from file_writer import COMPRESSIONS, FSYNC_POLICIES, OUTPUT_LAYOUTS
+    from progress import ProgressReporter
 except ImportError as e:
     print(
         f"Error importing modules: {e}. Ensure src is in PYTHONPATH or run from project root.", 
@@ -14,17 +26,19 @@ except ImportError as e:
     )
     sys.exit(1)
 
-# Setup logging as early as possible
-# Using default log level INFO, adjust if needed
-setup_logging()
 logger = logging.getLogger(__name__)
 
+# Batch-mode exit codes
+EXIT_OK = 0  # Every task succeeded
+EXIT_FAILURE = 1  # Nothing succeeded (or nothing matched the filters)
+EXIT_PARTIAL = 2  # Some tasks failed or were cancelled
+
 
 def display_url_options(url_selector_list):
     """Displays a numbered list of website domains for user selection."""
     print("\nPlease select a website to generate the navigation map for:")
     print("-" * 60)
-    for i, (url, _) in enumerate(url_selector_list):
+    for i, (url, *_) in enumerate(url_selector_list):
         try:
             # Display domain name for clarity
             domain = urlparse(url).netloc or url
@@ -57,17 +71,282 @@ def get_user_selection(num_options):
             print("Invalid input. Please enter a number or 'exit'.")
 
 
-def main():
-    """Main execution function."""
-    logger.info("Application started.")
+def parse_args(argv=None):
+    """Parses command line arguments. No batch option means interactive mode."""
+    parser = argparse.ArgumentParser(
+        description="Generate website navigation maps from the URLs in CSV files."
+    )
+    selection = parser.add_argument_group(
+        "batch selection (any of these runs non-interactively)"
+    )
+    selection.add_argument(
+        '--all', action='store_true', help="Process every row."
+    )
+    selection.add_argument(
+        '--domain', action='append', default=[], metavar='DOMAIN',
+        help="Only rows whose host is DOMAIN or a subdomain of it (repeatable)."
+    )
+    selection.add_argument(
+        '--match', metavar='REGEX',
+        help="Only rows whose URL matches this regular expression."
+    )
+    parser.add_argument(
+        '--input-dir', default="input_csvs",
+        help="Directory with the input CSV files (default: %(default)s)."
+    )
+    parser.add_argument(
+        '--list', action='store_true',
+        help="Print the selected rows and exit without crawling."
+    )
+    parser.add_argument(
+        '--workers', type=int,
+        help="Concurrent crawls in batch mode (default: min(32, CPUs + 4))."
+    )
+    parser.add_argument(
+        '--max-per-domain', type=int, default=2,
+        help="Concurrent crawls against one domain (default: %(default)s)."
+    )
+    parser.add_argument(
+        '--summary', metavar='PATH',
+        help="Write a JSON run summary to PATH ('-' for stdout)."
+    )
+    parser.add_argument(
+        '--task-timeout', type=float, help="Seconds each site may take."
+    )
+    parser.add_argument(
+        '--run-timeout', type=float, help="Seconds the whole run may take."
+    )
+    parser.add_argument(
+        '--limits', type=CrawlLimits.from_string, metavar='SPEC',
+        help="Global crawl limits, e.g. 'max_depth=3;max_pages=500'."
+    )
+    parser.add_argument(
+        '--history', nargs='?', const=DEFAULT_HISTORY_FILE, metavar='PATH',
+        help="Schedule longest-expected-first using crawl history "
+             "(default file: %(const)s)."
+    )
+    parser.add_argument(
+        '--layout', choices=OUTPUT_LAYOUTS, default='flat',
+        help="Output directory layout (default: %(default)s)."
+    )
+    parser.add_argument(
+        '--storage', choices=('files', 'sqlite'), default='files',
+        help="Map storage backend (default: %(default)s)."
+    )
+    parser.add_argument(
+        '--compression', choices=COMPRESSIONS, help="Compress map files."
+    )
+    parser.add_argument(
+        '--fsync', choices=FSYNC_POLICIES, help="Write durability policy."
+    )
+    parser.add_argument(
+        '--write-behind', action='store_true',
+        help="Write maps on a dedicated writer thread."
+    )
+    parser.add_argument(
+        '--blocking-retries', action='store_true',
+        help="Sleep through fetch retry backoffs in the worker thread instead "
+             "of suspending the crawl and freeing the worker."
+    )
+    parser.add_argument(
+        '--no-progress', action='store_true',
+        help="Disable the progress display (a status line on terminals, "
+             "periodic log lines otherwise)."
+    )
+    parser.add_argument(
+        '--metrics-textfile', metavar='PATH',
+        help="Write run metrics in Prometheus text format to PATH (*.prom), "
+             "e.g. for node_exporter's textfile collector."
+    )
+    parser.add_argument(
+        '--metrics-json', metavar='PATH',
+        help="Write a JSON summary of run metrics (latency percentiles, "
+             "status codes, retries, cache hits) to PATH."
+    )
+    parser.add_argument(
+        '--trace', nargs='?', const="trace.json", metavar='PATH',
+        help="Write a Chrome Trace Event timeline of fetch/parse/format/write "
+             "spans per thread to PATH (default: %(const)s); open it in "
+             "https://ui.perfetto.dev."
+    )
+    parser.add_argument(
+        '--profile', nargs='?', type=float, const=100.0, metavar='PERCENT',
+        help="Run tasks under cProfile (all of them, or a random PERCENT), "
+             "writing per-task and merged run profiles to --profile-dir."
+    )
+    parser.add_argument(
+        '--profile-match', metavar='REGEX',
+        help="Only profile tasks whose URL matches REGEX (implies --profile)."
+    )
+    parser.add_argument(
+        '--profile-dir', default="profiles", metavar='DIR',
+        help="Directory for profile output (default: %(default)s)."
+    )
+    args = parser.parse_args(argv)
+    args.batch = bool(args.all or args.domain or args.match)
+    if args.match:
+        try:
+            args.match = re.compile(args.match)
+        except re.error as e:
+            parser.error(f"invalid --match pattern: {e}")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.profile_match:
+        try:
+            args.profile_match = re.compile(args.profile_match)
+        except re.error as e:
+            parser.error(f"invalid --profile-match pattern: {e}")
+        if args.profile is None:
+            args.profile = 100.0
+    if args.profile is not None and not 0 < args.profile <= 100:
+        parser.error("--profile must be a percentage in (0, 100]")
+    return args
 
+
+def row_matches(url, domains=(), pattern=None):
+    """
+    Returns True if `url` passes the batch filters.
+
+    Args:
+        url (str): Row URL.
+        domains (iterable of str): Hosts to accept, subdomains included.
+            Empty accepts every host.
+        pattern (re.Pattern, optional): Must match somewhere in the URL.
+    """
+    if domains:
+        host = (urlparse(url).hostname or "").lower()
+        if not any(
+            host == domain.lower() or host.endswith("." + domain.lower())
+            for domain in domains
+        ):
+            return False
+    return pattern is None or pattern.search(url) is not None
+
+
+def summarize_results(results, duration):
+    """Builds the JSON-serializable run summary for batch mode."""
+    counts = Counter(result.get('status', 'error') for result in results)
+    return {
+        'total': len(results),
+        'succeeded': counts.get('success', 0),
+        'failed': len(results) - counts.get('success', 0) - counts.get('cancelled', 0),
+        'cancelled': counts.get('cancelled', 0),
+        'truncated': sum(1 for result in results if result.get('truncated')),
+        'duration': round(duration, 3),
+        'results': results,
+    }
+
+
+def exit_code_for(summary):
+    """Maps a run summary to EXIT_OK, EXIT_PARTIAL or EXIT_FAILURE."""
+    if summary['total'] and summary['succeeded'] == summary['total']:
+        return EXIT_OK
+    if summary['succeeded']:
+        return EXIT_PARTIAL
+    return EXIT_FAILURE
+
+
+def build_manager(args, max_workers=None):
+    """Creates a ConcurrencyManager configured from the command line."""
+    # Deferred: pulls in the whole crawl stack (requests, bs4, ...)
+    from concurrency_manager import ConcurrencyManager, DEFAULT_MAX_WORKERS
+    profiler = None
+    if args.profile is not None:
+        from profiling import TaskProfiler
+        profiler = TaskProfiler(
+            output_dir=args.profile_dir, sample_rate=args.profile / 100,
+            match=args.profile_match
+        )
+    return ConcurrencyManager(
+        max_workers=max_workers or DEFAULT_MAX_WORKERS,
+        task_timeout=args.task_timeout,
+        run_timeout=args.run_timeout, limits=args.limits,
+        max_per_domain=args.max_per_domain,
+        history=CrawlHistory(args.history) if args.history else None,
+        write_behind=args.write_behind, fsync_policy=args.fsync,
+        output_layout=args.layout, storage=args.storage,
+        compression=args.compression,
+        progress=None if args.no_progress else ProgressReporter(),
+        metrics_textfile=args.metrics_textfile, metrics_json=args.metrics_json,
+        profiler=profiler, trace_path=args.trace,
+        defer_retries=not args.blocking_retries
+    )
+
+
+def selected_rows(args):
+    """Streams the CSV rows that pass the batch filters."""
+    return (
+        row for row in iter_valid_urls(directory=args.input_dir)
+        if row_matches(row[0], args.domain, args.match)
+    )
+
+
+def list_rows(args):
+    """Prints the selected rows (URL and selector) without crawling."""
+    count = 0
+    for url, css_selector, *_ in selected_rows(args):
+        print(f"{url}\t{css_selector}")
+        count += 1
+    return EXIT_OK if count else EXIT_FAILURE
+
+
+def run_batch(args):
+    """
+    Processes every selected CSV row without prompting.
+
+    Rows are streamed from the CSV files straight into the manager, so
+    crawling starts on the first matching row.
+
+    Returns:
+        int: Process exit code (see EXIT_OK, EXIT_PARTIAL, EXIT_FAILURE).
+    """
+    manager = build_manager(args, max_workers=args.workers)
+    logger.info(
+        f"Batch run started (workers={manager.max_workers}, domains={args.domain}, "
+        f"match={args.match.pattern if args.match else None})."
+    )
+    tasks = selected_rows(args)
+    started = time.monotonic()
+    try:
+        results = manager.process_tasks(tasks)
+    finally:
+        manager.shutdown()
+    summary = summarize_results(results, time.monotonic() - started)
+
+    # With '--summary -' stdout carries only the JSON, so it can be piped
+    report_stream = sys.stderr if args.summary == '-' else sys.stdout
+    if not results:
+        print(f"No valid URLs in '{args.input_dir}' matched the selection.",
+              file=report_stream)
+        logger.warning("Batch run matched no rows.")
+    else:
+        print(
+            f"Processed {summary['total']} site(s) in {summary['duration']:.1f}s: "
+            f"{summary['succeeded']} succeeded ({summary['truncated']} partial), "
+            f"{summary['failed']} failed, {summary['cancelled']} cancelled.",
+            file=report_stream
+        )
+    if args.summary:
+        data = json.dumps(summary, indent=2, default=str)
+        if args.summary == '-':
+            print(data)
+        else:
+            with open(args.summary, 'w', encoding='utf-8') as f:
+                f.write(data + "\n")
+    exit_code = exit_code_for(summary)
+    logger.info(f"Batch run finished with exit code {exit_code}: {summary['total']} task(s).")
+    return exit_code
+
+
+def run_interactive(args):
+    """Lets the user pick one site from the CSV rows and maps it."""
     # Load valid URL and selector pairs from CSVs in the input directory
     # The load function now returns list of (url, selector) tuples
-    url_selector_pairs = load_all_valid_urls(directory="input_csvs")
+    url_selector_pairs = load_all_valid_urls(directory=args.input_dir)
 
     if not url_selector_pairs:
         print(
-            "No valid URLs found in the 'input_csvs' directory. Please check"
+            f"No valid URLs found in the '{args.input_dir}' directory. Please check"
             " your CSV files."
         )
         logger.warning("Exiting: No valid URLs found.")
@@ -84,8 +363,9 @@ def main():
         logger.info("User requested exit.")
         sys.exit(0)
 
-    # Get the selected URL and selector
-    selected_url, selected_selector = url_selector_pairs[selected_index]
+    # Get the selected URL and selector (rows may also carry crawl limits)
+    selected_task = url_selector_pairs[selected_index]
+    selected_url, selected_selector = selected_task[:2]
     logger.info(
         f"User selected: {selected_index + 1} ({selected_url}) with selector '{selected_selector}'"
         )
@@ -95,7 +375,7 @@ def main():
     # but the manager handles the worker task logic nicely.
     # We could potentially adapt this later to process multiple selections or
     #  all URLs.
-    manager = ConcurrencyManager(max_workers=1)
+    manager = build_manager(args, max_workers=1)
     # Use 1 worker for single selection
 
     print(f"\nProcessing selected website: {selected_url}")
@@ -103,7 +383,7 @@ def main():
 
     # Submit the single selected task
     # process_tasks expects a list
-    results = manager.process_tasks([(selected_url, selected_selector)])
+    results = manager.process_tasks([selected_task])
 
     # Process and display results (should be only one result)
     if results:
@@ -114,6 +394,10 @@ def main():
             filepath = result.get('filepath', 'N/A')
             print(f"\nSuccessfully generated navigation map for {url}")
             print(f"Output file: {filepath}")
+            if result.get('truncated'):
+                print(
+                    f"Note: the map is partial (crawl stopped early: {result['truncated']})."
+                )
             logger.info(
                 f"Task completed successfully for {url}. Output: {filepath}"
             )
@@ -126,6 +410,10 @@ def main():
             logger.error(
                 f"Task failed and moved to DLQ for {url}. Error: {error_msg}"
             )
+        elif status == 'cancelled':
+            reason = result.get('reason', 'cancelled')
+            print(f"\nProcessing of {url} was cancelled ({reason}).")
+            logger.warning(f"Task cancelled for {url} ({reason}).")
         else:  # status == 'error' or unknown
             error_msg = result.get('error', 'Unknown processing error')
             print(f"\nAn unexpected error occurred while processing {url}.")
@@ -141,6 +429,22 @@ def main():
 
     # Shutdown the concurrency manager
     manager.shutdown()
+
+
+def main(argv=None):
+    """Main execution function."""
+    args = parse_args(argv)
+    if args.list:
+        # Output is the listing itself; keep log records off the console
+        setup_logging(level=logging.WARNING)
+        sys.exit(list_rows(args))
+    setup_logging()
+    logger.info("Application started.")
+    if args.batch:
+        exit_code = run_batch(args)
+        logger.info("Application finished.")
+        sys.exit(exit_code)
+    run_interactive(args)
     logger.info("Application finished.")
 
 
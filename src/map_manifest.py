@@ -0,0 +1,226 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+
+try:
+    from . import file_writer
+except ImportError:
+    import file_writer
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "manifest.jsonl"
+MAP_FILE_SUFFIX = "_nav_map.md"
+MAP_FILE_SUFFIXES = (MAP_FILE_SUFFIX,) + tuple(
+    MAP_FILE_SUFFIX + suffix for suffix in file_writer.COMPRESSION_SUFFIXES.values()
+)
+_TRUNCATION_MARKER = re.compile(r" \[truncated: [^\]]*\]$")
+
+
+def content_digest(content):
+    """
+    SHA-256 hex digest of a rendered map, as stored in the manifest.
+
+    Accepts the map as one string or as an iterable of string chunks (e.g.
+    `crawler.iter_format_tree`); both give the same digest. The digest is
+    of the uncompressed text, so it does not depend on the compression used.
+    """
+    digest = hashlib.sha256()
+    for chunk in ((content,) if isinstance(content, str) else content):
+        digest.update(chunk.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class DigestingChunks:
+    """
+    Passes the string chunks of a rendered map through unchanged while
+    hashing them, so a streamed map is digested in the same pass that
+    writes it. `hexdigest()` equals `content_digest` of the chunks once
+    they have all been consumed.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._digest = hashlib.sha256()
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            self._digest.update(chunk.encode('utf-8'))
+            yield chunk
+
+    def hexdigest(self):
+        return self._digest.hexdigest()
+
+
+class MapManifest:
+    """
+    Index mapping each site URL to its map file path and content digest.
+
+    Stored as an append-only JSON-lines file in the output directory, so
+    recording a write is one small append and lookups are dictionary hits,
+    independent of how many maps exist. Later lines supersede earlier ones
+    for the same URL; `compact` rewrites the file with one line per URL.
+    Thread-safe.
+
+    Args:
+        output_dir (str, optional): Directory holding the maps and the
+            manifest; defaults to `file_writer.OUTPUT_DIR`.
+    """
+
+    def __init__(self, output_dir=None):
+        self.output_dir = output_dir or file_writer.OUTPUT_DIR
+        self.path = os.path.join(self.output_dir, MANIFEST_FILENAME)
+        self._entries = {}  # url -> {'path': ..., 'digest': ...}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line_no, line in enumerate(f, start=1):
+                    try:
+                        entry = json.loads(line)
+                        self._entries[entry['url']] = {
+                            'path': entry['path'], 'digest': entry['digest']
+                        }
+                    except (ValueError, KeyError):
+                        logger.warning(
+                            f"Skipping malformed manifest line {self.path}:{line_no}"
+                        )
+        except FileNotFoundError:
+            pass
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def lookup(self, url):
+        """Returns {'path': ..., 'digest': ...} for a URL, or None."""
+        with self._lock:
+            entry = self._entries.get(url)
+            return dict(entry) if entry else None
+
+    def record(self, url, filepath, digest):
+        """
+        Records that `url`'s map lives at `filepath` with `digest`.
+
+        Paths are stored relative to the output directory. Unchanged entries
+        are not re-appended, so incremental syncs can compare digests cheaply.
+        """
+        relative = os.path.relpath(filepath, self.output_dir)
+        entry = {'path': relative, 'digest': digest}
+        with self._lock:
+            if self._entries.get(url) == entry:
+                return
+            self._entries[url] = entry
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'url': url, **entry}) + '\n')
+
+    def compact(self):
+        """Rewrites the manifest with exactly one line per URL."""
+        with self._lock:
+            lines = [
+                json.dumps({'url': url, **entry})
+                for url, entry in self._entries.items()
+            ]
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + ('\n' if lines else ''))
+            os.replace(temp_path, self.path)
+
+
+def _read_root_url(filepath):
+    """Returns the root URL from a map file's first line, or None."""
+    try:
+        with file_writer.open_map_file(filepath) as f:
+            first_line = f.readline().strip()
+    except (IOError, UnicodeDecodeError, ValueError, EOFError):
+        return None
+    first_line = _TRUNCATION_MARKER.sub('', first_line)
+    return first_line if first_line.startswith(('http://', 'https://')) else None
+
+
+def migrate_flat_to_sharded(output_dir=None, dry_run=False):
+    """
+    Moves maps from a flat output directory into the sharded layout and
+    records each one in the manifest.
+
+    The site URL of each map is read from the map's first line. Maps whose
+    URL cannot be determined are still moved but are not indexed.
+
+    Args:
+        output_dir (str, optional): Directory to migrate; defaults to
+            `file_writer.OUTPUT_DIR`.
+        dry_run (bool): Only report what would be moved.
+
+    Returns:
+        int: Number of map files moved (or that would be moved).
+    """
+    output_dir = output_dir or file_writer.OUTPUT_DIR
+    manifest = MapManifest(output_dir)
+    moved = 0
+    with os.scandir(output_dir) as entries:
+        for entry in entries:
+            if not entry.is_file() or not entry.name.endswith(MAP_FILE_SUFFIXES):
+                continue
+            target = file_writer.shard_path(entry.name, output_dir)
+            if dry_run:
+                logger.info(f"Would move {entry.path} -> {target}")
+                moved += 1
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(entry.path, target)
+            moved += 1
+            url = _read_root_url(target)
+            if url is None:
+                logger.warning(f"Moved {target} but could not read its URL.")
+                continue
+            with file_writer.open_map_file(target) as f:
+                manifest.record(url, target, content_digest(f))
+    if not dry_run:
+        manifest.compact()
+    logger.info(f"Migrated {moved} map file(s) in {output_dir} to the sharded layout.")
+    return moved
+
+
+if __name__ == '__main__':
+    try:
+        from logger_config import setup_logging
+        setup_logging()
+    except ImportError:
+        logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description="Manage the map output directory layout and manifest."
+    )
+    parser.add_argument(
+        '--output-dir', default=file_writer.OUTPUT_DIR,
+        help="Map output directory (default: %(default)s)."
+    )
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = subcommands.add_parser(
+        'migrate', help="Move flat map files into the sharded layout."
+    )
+    migrate_parser.add_argument(
+        '--dry-run', action='store_true', help="Only list what would move."
+    )
+    lookup_parser = subcommands.add_parser(
+        'lookup', help="Print the manifest entry for a site URL."
+    )
+    lookup_parser.add_argument('url')
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        count = migrate_flat_to_sharded(args.output_dir, dry_run=args.dry_run)
+        print(f"{'Would move' if args.dry_run else 'Moved'} {count} map file(s).")
+    else:
+        entry = MapManifest(args.output_dir).lookup(args.url)
+        if entry is None:
+            print(f"No manifest entry for {args.url}")
+            raise SystemExit(1)
+        print(json.dumps(entry))
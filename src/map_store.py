@@ -0,0 +1,246 @@
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+try:
+    from . import file_writer
+except ImportError:
+    import file_writer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(file_writer.OUTPUT_DIR, "maps.sqlite")
+DEFAULT_BATCH_SIZE = 100  # Maps per transaction
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS maps (
+    url TEXT PRIMARY KEY,
+    filepath TEXT NOT NULL,
+    markdown TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    map_url TEXT NOT NULL,
+    url TEXT NOT NULL,
+    parent_url TEXT,
+    name TEXT,
+    depth INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    truncated TEXT
+);
+CREATE INDEX IF NOT EXISTS nodes_map_url ON nodes (map_url);
+CREATE INDEX IF NOT EXISTS nodes_path ON nodes (path);
+CREATE INDEX IF NOT EXISTS nodes_url ON nodes (url);
+"""
+
+
+def _normalize_path(path):
+    """Makes '/careers' and '/careers/' index to the same key."""
+    return path.rstrip('/') or '/'
+
+
+def _iter_nodes(nav_data):
+    """Yields (url, parent_url, name, depth, truncated) for every tree node."""
+    stack = [
+        (url, None, node, 0) for url, node in reversed(list(nav_data.items()))
+    ]
+    while stack:
+        url, parent_url, node, depth = stack.pop()
+        yield url, parent_url, node.get('name'), depth, node.get('truncated')
+        for child_url, child in reversed(list(node.get('children', {}).items())):
+            stack.append((child_url, url, child, depth + 1))
+
+
+class SqliteMapStore:
+    """
+    Map storage backend keeping every map in a single SQLite database.
+
+    Each map is stored as its rendered markdown (table `maps`) plus one row
+    per tree node (table `nodes`, indexed by URL path), so questions such as
+    "which sites link to /careers" become indexed lookups. The database runs
+    in WAL mode and commits every `batch_size` maps instead of per map;
+    call `flush` (or `close`) to commit the tail. Thread-safe.
+
+    Args:
+        db_path (str): SQLite database file.
+        batch_size (int): Maps written per transaction.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, batch_size=DEFAULT_BATCH_SIZE):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._uncommitted = 0
+
+    def write_map(self, url, filepath, markdown, nav_data):
+        """
+        Stores (or replaces) one site's map.
+
+        Args:
+            url (str): Site start URL (primary key).
+            filepath (str): Path the map would have as a file; used by
+                `export_files`.
+            markdown (str): Rendered map.
+            nav_data (dict): Tree from `crawl_navigation`, stored node by node.
+
+        Returns:
+            bool: True on success, False if the database write failed.
+        """
+        node_rows = [
+            (url, node_url, parent_url, name, depth,
+             _normalize_path(urlparse(node_url).path), truncated)
+            for node_url, parent_url, name, depth, truncated
+            in _iter_nodes(nav_data or {})
+        ]
+        with self._lock:
+            try:
+                if not self._conn.in_transaction:
+                    self._conn.execute("BEGIN")
+                # One savepoint per map: a failure undoes only this map's
+                #  statements, not the rest of the uncommitted batch
+                self._conn.execute("SAVEPOINT write_map")
+                self._conn.execute("DELETE FROM nodes WHERE map_url = ?", (url,))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO maps (url, filepath, markdown, updated_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (url, filepath, markdown, time.time())
+                )
+                self._conn.executemany(
+                    "INSERT INTO nodes (map_url, url, parent_url, name, depth, path, truncated)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    node_rows
+                )
+                self._conn.execute("RELEASE write_map")
+            except sqlite3.Error as e:
+                logger.error(f"Failed to store map for {url} in {self.db_path}: {e}")
+                try:
+                    self._conn.execute("ROLLBACK TO write_map")
+                    self._conn.execute("RELEASE write_map")
+                except sqlite3.Error:
+                    # The savepoint itself failed; nothing of this map to undo
+                    pass
+                return False
+            self._uncommitted += 1
+            if self._uncommitted >= self.batch_size:
+                self._commit()
+        return True
+
+    def _commit(self):
+        """Commits the open batch. Lock held."""
+        self._conn.commit()
+        logger.debug(f"Committed {self._uncommitted} map(s) to {self.db_path}")
+        self._uncommitted = 0
+
+    def flush(self):
+        """Commits any maps written since the last batch commit."""
+        with self._lock:
+            if self._uncommitted:
+                self._commit()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def get_markdown(self, url):
+        """Returns the stored markdown for a site URL, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT markdown FROM maps WHERE url = ?", (url,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def sites_linking_to(self, path):
+        """Returns the site URLs whose maps contain a node with this URL path."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT map_url FROM nodes WHERE path = ? ORDER BY map_url",
+                (_normalize_path(path),)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def iter_maps(self):
+        """
+        Streams (url, filepath, markdown) for every stored map without
+        loading the whole table. Uses its own read connection (WAL readers
+        do not block writers).
+        """
+        self.flush()
+        reader = sqlite3.connect(self.db_path)
+        try:
+            for row in reader.execute(
+                "SELECT url, filepath, markdown FROM maps ORDER BY url"
+            ):
+                yield row
+        finally:
+            reader.close()
+
+    def export_files(self, output_dir=None, write_func=None):
+        """
+        Writes every stored map back out as an individual `.md` file.
+
+        Args:
+            output_dir (str, optional): Directory to export into; defaults to
+                each map's stored filepath.
+            write_func (callable, optional): `(filepath, content) -> bool`;
+                defaults to `write_map_file`.
+
+        Returns:
+            int: Number of files written successfully.
+        """
+        write_func = write_func or file_writer.write_map_file
+        written = 0
+        for url, filepath, markdown in self.iter_maps():
+            if output_dir:
+                filepath = os.path.join(output_dir, os.path.basename(filepath))
+            if write_func(filepath, markdown):
+                written += 1
+            else:
+                logger.error(f"Failed to export map for {url} to {filepath}")
+        return written
+
+
+if __name__ == '__main__':
+    try:
+        from logger_config import setup_logging
+        setup_logging()
+    except ImportError:
+        logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Query or export the SQLite map store.")
+    parser.add_argument(
+        '--db', default=DEFAULT_DB_PATH, help="Database path (default: %(default)s)."
+    )
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    export_parser = subcommands.add_parser(
+        'export', help="Write every stored map out as a .md file."
+    )
+    export_parser.add_argument(
+        '--output-dir', help="Export directory (default: each map's stored path)."
+    )
+    linking_parser = subcommands.add_parser(
+        'linking-to', help="List sites whose navigation links to a URL path."
+    )
+    linking_parser.add_argument('path', help="URL path, e.g. /careers")
+    args = parser.parse_args()
+
+    store = SqliteMapStore(args.db)
+    try:
+        if args.command == 'export':
+            print(f"Exported {store.export_files(args.output_dir)} map file(s).")
+        else:
+            for site in store.sites_linking_to(args.path):
+                print(site)
+    finally:
+        store.close()
@@ -0,0 +1,351 @@
+import bisect
+import functools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers fast local parses up to slow fetches near the request timeout
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+SUMMARY_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def _label_key(labels):
+    """Hashable, ordered key for one label set ({} -> ())."""
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base for a named metric holding one value per label set."""
+    kind = None
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. bytes fetched or retries."""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def _summary(self):
+        with self._lock:
+            return {
+                _format_labels(key) or 'total': value
+                for key, value in sorted(self._values.items())
+            }
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. requests in flight."""
+    kind = 'gauge'
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    @contextmanager
+    def track(self, **labels):
+        """Counts the enclosed block as in flight while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values (seconds) over fixed buckets.
+
+    Each label set keeps per-bucket counts plus sum and count, so an
+    observation is one bisect and a few additions under the lock.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Last slot counts observations above the largest bucket
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the wall-clock duration of the enclosed block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def timed(self, func):
+        """Wraps `func` so every call is observed."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.time():
+                return func(*args, **kwargs)
+        return wrapper
+
+    def _snapshot(self):
+        with self._lock:
+            return {
+                key: (list(counts), total, count)
+                for key, (counts, total, count) in self._values.items()
+            }
+
+    def _samples(self):
+        samples = []
+        for key, (counts, total, count) in self._snapshot().items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                samples.append((
+                    f"{self.name}_bucket", key + (('le', _format_value(bound)),),
+                    cumulative
+                ))
+            samples.append((f"{self.name}_sum", key, total))
+            samples.append((f"{self.name}_count", key, count))
+        return samples
+
+    def quantile(self, q, counts, count):
+        """
+        Estimates the q-quantile from bucket counts by linear interpolation
+        within the bucket it falls in (as Prometheus' histogram_quantile).
+        """
+        if not count:
+            return None
+        rank = q * count
+        cumulative = 0
+        lower = 0.0
+        for bound, bucket_count in zip(self.buckets, counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                return lower + (bound - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+            lower = bound
+        return self.buckets[-1]  # Beyond the largest bucket
+
+    def _summary(self):
+        summary = {}
+        for key, (counts, total, count) in sorted(self._snapshot().items()):
+            entry = {
+                'count': count,
+                'sum': round(total, 6),
+                'mean': round(total / count, 6) if count else None,
+            }
+            for q in SUMMARY_QUANTILES:
+                estimate = self.quantile(q, counts, count)
+                entry[f"p{int(q * 100)}"] = (
+                    round(estimate, 6) if estimate is not None else None
+                )
+            summary[_format_labels(key) or 'total'] = entry
+        return summary
+
+
+class MetricsRegistry:
+    """
+    Set of named metrics with Prometheus text and JSON export.
+
+    Metrics are created once (usually at import time) and then updated from
+    any thread; each metric has its own lock, so unrelated metrics never
+    contend. Values are cumulative for the life of the process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name, help_text, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {name} already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help_text):
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name, help_text):
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def reset(self):
+        """Clears every value (the metrics stay registered)."""
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+    def to_prometheus(self):
+        """Renders all metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for sample_name, key, value in metric._samples():
+                lines.append(f"{sample_name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Returns {metric name: {label set: value or histogram stats}}."""
+        return {
+            name: metric._summary()
+            for name, metric in sorted(self._metrics.items())
+        }
+
+    def write_textfile(self, path):
+        """
+        Writes the Prometheus text format to `path` atomically, for
+        node_exporter's textfile collector (which reads `*.prom` files).
+        """
+        _atomic_write(path, self.to_prometheus())
+
+    def write_json(self, path):
+        """Writes `summary()` as JSON to `path` atomically."""
+        _atomic_write(path, json.dumps(self.summary(), indent=2) + "\n")
+
+
+def _atomic_write(path, text):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".metrics_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+# Process-wide registry and the crawler's metrics
+REGISTRY = MetricsRegistry()
+
+FETCH_SECONDS = REGISTRY.histogram(
+    'crawler_fetch_seconds', "HTTP fetch latency per attempt, including the body."
+)
+PARSE_SECONDS = REGISTRY.histogram(
+    'crawler_parse_seconds', "Time to parse a page and extract its nav links."
+)
+FORMAT_SECONDS = REGISTRY.histogram(
+    'crawler_format_seconds', "Time to render a crawl tree as markdown."
+)
+WRITE_SECONDS = REGISTRY.histogram(
+    'crawler_write_seconds', "Time to write (or store) one map."
+)
+FETCH_BYTES = REGISTRY.counter(
+    'crawler_fetch_bytes_total', "Response body bytes received."
+)
+HTTP_RESPONSES = REGISTRY.counter(
+    'crawler_http_responses_total',
+    "HTTP responses by status code ('error' when no response was received)."
+)
+RETRIES = REGISTRY.counter(
+    'crawler_retries_total', "Retried calls by function."
+)
+DECODE_SOURCES = REGISTRY.counter(
+    'crawler_html_decode_total',
+    "Fetched pages by where their character encoding came from "
+    "(bom/header/meta/utf-8/detected/fallback)."
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    'crawler_page_cache_lookups_total', "Page cache lookups by result (hit/miss)."
+)
+TASKS = REGISTRY.counter(
+    'crawler_tasks_total', "Finished tasks by status."
+)
+TASKS_IN_FLIGHT = REGISTRY.gauge(
+    'crawler_tasks_in_flight', "Tasks currently running."
+)
+FETCHES_IN_FLIGHT = REGISTRY.gauge(
+    'crawler_fetches_in_flight', "HTTP requests currently in flight."
+)
+WRITES_IN_FLIGHT = REGISTRY.gauge(
+    'crawler_writes_in_flight', "Map writes currently in progress."
+)
+
+
+def export_metrics(textfile=None, json_path=None, registry=REGISTRY):
+    """
+    Writes the registry to a Prometheus textfile and/or a JSON summary.
+    Errors are logged, not raised: metrics must never fail a crawl run.
+    """
+    for path, write in ((textfile, registry.write_textfile),
+                        (json_path, registry.write_json)):
+        if not path:
+            continue
+        try:
+            write(path)
+            logger.info(f"Metrics written to {path}")
+        except OSError as e:
+            logger.error(f"Failed to write metrics to {path}: {e}")
+
+
+# Example usage (optional)
+if __name__ == '__main__':
+    import random
+
+    for _ in range(1000):
+        FETCH_SECONDS.observe(random.expovariate(1 / 0.2))
+        HTTP_RESPONSES.inc(code=random.choice((200, 200, 200, 404)))
+    with TASKS_IN_FLIGHT.track():
+        print(REGISTRY.to_prometheus())
+    print(json.dumps(REGISTRY.summary()['crawler_fetch_seconds'], indent=2))
@@ -0,0 +1,157 @@
+import collections
+import logging
+import threading
+import time
+
+try:
+    from .utils import canonicalize_url
+    from .tracing import span
+except ImportError:
+    from utils import canonicalize_url
+    from tracing import span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 64 MB of cached link lists
+_ENTRY_OVERHEAD_BYTES = 128  # Rough per-entry/per-link bookkeeping cost
+
+
+def _estimate_size(links):
+    """Approximate memory footprint of a cached link list."""
+    if not links:
+        return _ENTRY_OVERHEAD_BYTES
+    return _ENTRY_OVERHEAD_BYTES + sum(
+        len(text) + len(url) + _ENTRY_OVERHEAD_BYTES for text, url in links
+    )
+
+
+class _Flight:
+    """A load in progress; followers wait on `done` instead of refetching."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = False
+        self.links = None
+
+
+class PageCache:
+    """
+    In-process LRU cache of parsed navigation links, shared by every worker
+    of a `ConcurrencyManager` run.
+
+    Entries are keyed by (canonical URL, CSS selector) and hold the link list
+    that `find_nav_links` returned for the page (None if the fetch failed).
+    Loads are single-flight: when several threads ask for the same missing
+    key, one fetches and parses while the rest wait for its result. If that
+    load raises, a waiting thread takes over and tries again itself.
+
+    Args:
+        max_bytes (int): Approximate memory bound; least recently used
+            entries are evicted once it is exceeded.
+        ttl (float, optional): Seconds an entry stays valid. None keeps
+            entries until evicted, which suits a cache scoped to one run; a
+            cache kept across runs (e.g. by the daemon) needs a TTL so sites
+            are eventually re-fetched.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_MAX_BYTES, ttl=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key -> (links, size, loaded_at)
+        self._entries = collections.OrderedDict()
+        self._flights = {}  # key -> _Flight
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(url, css_selector):
+        return (canonicalize_url(url), css_selector)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get_or_load(self, url, css_selector, loader):
+        """
+        Returns the cached links for a page, calling `loader()` on a miss.
+
+        Args:
+            url (str): Page URL (canonicalized for the key).
+            css_selector (str): Selector the links were extracted with.
+            loader (callable): Fetches and parses the page; returns the link
+                list or None. Exceptions propagate to the calling thread and
+                nothing is cached.
+
+        Returns:
+            tuple: (links, hit) where `hit` is True if no load was needed by
+                this caller.
+        """
+        key = self.make_key(url, css_selector)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and self._expired(entry):
+                    self._discard(key)
+                    entry = None
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0], True
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = self._flights[key] = _Flight()
+                    self.misses += 1
+                    break
+            # Another thread is loading this key; share its result
+            with span('cache_wait', url=url):
+                flight.done.wait()
+            if flight.ok:
+                with self._lock:
+                    self.hits += 1
+                return flight.links, True
+
+        try:
+            links = loader()
+        except BaseException:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+            raise
+
+        flight.links, flight.ok = links, True
+        with self._lock:
+            self._store(key, links)
+            del self._flights[key]
+        flight.done.set()
+        return links, False
+
+    def _expired(self, entry):
+        return self.ttl is not None and time.monotonic() - entry[2] > self.ttl
+
+    def _discard(self, key):
+        """Removes one entry. Lock held."""
+        _, size, _ = self._entries.pop(key)
+        self.size_bytes -= size
+
+    def _store(self, key, links):
+        """Inserts an entry and evicts LRU entries past the bound. Lock held."""
+        size = _estimate_size(links)
+        if size > self.max_bytes:
+            return  # Too big to be worth caching
+        if key in self._entries:
+            self._discard(key)
+        self._entries[key] = (links, size, time.monotonic())
+        self.size_bytes += size
+        while self.size_bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.size_bytes -= evicted_size
+
+    def stats(self):
+        """Returns hit/miss/size counters for progress and metrics reporting."""
+        with self._lock:
+            return {
+                'hits': self.hits, 'misses': self.misses,
+                'entries': len(self._entries), 'bytes': self.size_bytes,
+            }
@@ -0,0 +1,209 @@
+import cProfile
+import io
+import itertools
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+
+try:
+    from .utils import get_website_name
+except ImportError:
+    from utils import get_website_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = "profiles"
+RUN_PROFILE_FILENAME = "run.prof"
+RUN_REPORT_FILENAME = "run.txt"
+TASK_TIMES_FILENAME = "tasks.json"
+REPORT_TOP_FUNCTIONS = 40
+
+
+class TaskProfile:
+    """
+    Profile of one task, accumulated over its runs.
+
+    A crawl suspended for a retry backoff runs again later, possibly on
+    another worker thread; each run is merged in here so the task still
+    gets one profile, and its wall time spans from the first run to the
+    last, parked time included.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.stats = None  # pstats.Stats of all runs so far
+        self.cpu = 0.0
+        self.runs = 0
+        self.started = time.perf_counter()
+
+
+class TaskProfiler:
+    """
+    Runs selected crawl tasks under cProfile.
+
+    Each profiled task gets its own `.prof` file (open it with `pstats` or a
+    viewer such as snakeviz); `write_summary()` merges them into one
+    run-wide profile plus a text report. For every profiled task the wall
+    time is split into CPU time (`time.thread_time`) and waiting time (the
+    rest: network I/O, retry backoff sleeps and time parked waiting for a
+    deferred retry, lock waits).
+
+    cProfile only traces the thread that enabled it, so tasks running in
+    parallel on worker threads are profiled independently.
+
+    Args:
+        output_dir (str): Directory for the profile files.
+        sample_rate (float): Fraction (0-1] of tasks to profile at random.
+        match (str or re.Pattern, optional): Only URLs matching this
+            pattern are considered; combined with `sample_rate`.
+    """
+
+    def __init__(self, output_dir=DEFAULT_PROFILE_DIR, sample_rate=1.0, match=None):
+        if not 0 < sample_rate <= 1:
+            raise ValueError(f"sample_rate must be in (0, 1], got {sample_rate}")
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.match = re.compile(match) if isinstance(match, str) else match
+        self._lock = threading.Lock()
+        self._profile_paths = []
+        self._task_times = []
+        self._sequence = itertools.count(1)  # Keeps file names unique
+
+    def should_profile(self, url):
+        if self.match is not None and not self.match.search(url):
+            return False
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def start(self, url):
+        """Returns a `TaskProfile` for a task about to make its first run."""
+        return TaskProfile(url)
+
+    def run(self, url, func, *args, **kwargs):
+        """
+        Calls `func(*args, **kwargs)` under the profiler and records the
+        profile for `url`. Returns whatever `func` returns.
+        """
+        task = self.start(url)
+        try:
+            return self.run_part(task, func, *args, **kwargs)
+        finally:
+            self.finish(task)
+
+    def run_part(self, task, func, *args, **kwargs):
+        """
+        Calls `func(*args, **kwargs)` under the profiler as one run of
+        `task` (a `TaskProfile`); call `finish` after its last run.
+        Returns whatever `func` returns.
+        """
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Another profiler is already active on this thread
+            logger.warning(f"Not profiling {task.url}: {e}")
+            return func(*args, **kwargs)
+        cpu_started = time.thread_time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            task.cpu += time.thread_time() - cpu_started
+            task.runs += 1
+            if task.stats is None:
+                task.stats = pstats.Stats(profiler)
+            else:
+                task.stats.add(profiler)
+
+    def finish(self, task):
+        """Writes the merged profile of `task` and records its times."""
+        if task.stats is None:
+            return  # No run was profiled
+        wall = time.perf_counter() - task.started
+        self._record(task.url, task.stats, wall, task.cpu, task.runs)
+
+    def _record(self, url, stats, wall, cpu, runs):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(
+            self.output_dir,
+            f"{get_website_name(url)}_{time.strftime('%Y%m%d_%H%M%S')}_{next(self._sequence)}.prof"
+        )
+        try:
+            stats.dump_stats(path)
+        except OSError as e:
+            logger.error(f"Failed to write profile for {url} to {path}: {e}")
+            return
+        times = {
+            'url': url, 'profile': path, 'wall': round(wall, 6),
+            'cpu': round(cpu, 6), 'wait': round(max(wall - cpu, 0.0), 6),
+            'runs': runs,
+        }
+        with self._lock:
+            self._profile_paths.append(path)
+            self._task_times.append(times)
+        logger.info(
+            f"Profiled {url}: wall={times['wall']:.3f}s cpu={times['cpu']:.3f}s "
+            f"wait={times['wait']:.3f}s -> {path}"
+        )
+
+    def task_times(self):
+        """Returns the wall/cpu/wait breakdown of every profiled task."""
+        with self._lock:
+            return list(self._task_times)
+
+    def write_summary(self, top=REPORT_TOP_FUNCTIONS):
+        """
+        Merges the per-task profiles of this run into `run.prof` and writes
+        `run.txt` (CPU/wait totals, then the top functions by cumulative and
+        by internal time) and `tasks.json` (per-task breakdown).
+
+        Returns:
+            str: Path of the merged profile, or None if nothing was profiled.
+        """
+        with self._lock:
+            paths, task_times = list(self._profile_paths), list(self._task_times)
+        if not paths:
+            return None
+        run_path = os.path.join(self.output_dir, RUN_PROFILE_FILENAME)
+        try:
+            stats = pstats.Stats(*paths)
+            stats.dump_stats(run_path)
+            wall = sum(t['wall'] for t in task_times)
+            cpu = sum(t['cpu'] for t in task_times)
+            report = io.StringIO()
+            report.write(
+                f"Profiled tasks: {len(task_times)}\n"
+                f"Wall time: {wall:.3f}s  CPU: {cpu:.3f}s  "
+                f"Waiting (I/O, sleeps): {max(wall - cpu, 0.0):.3f}s\n\n"
+            )
+            stats.stream = report
+            stats.sort_stats('cumulative').print_stats(top)
+            stats.sort_stats('tottime').print_stats(top)
+            with open(os.path.join(self.output_dir, RUN_REPORT_FILENAME), 'w',
+                      encoding='utf-8') as f:
+                f.write(report.getvalue())
+            with open(os.path.join(self.output_dir, TASK_TIMES_FILENAME), 'w',
+                      encoding='utf-8') as f:
+                json.dump(task_times, f, indent=2)
+        except (OSError, TypeError) as e:
+            logger.error(f"Failed to write run profile to {self.output_dir}: {e}")
+            return None
+        logger.info(f"Run profile of {len(paths)} task(s) written to {run_path}")
+        return run_path
+
+
+# Example usage (optional)
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print a saved profile.")
+    parser.add_argument('path', nargs='?', default=os.path.join(
+        DEFAULT_PROFILE_DIR, RUN_PROFILE_FILENAME))
+    parser.add_argument('--sort', default='cumulative')
+    parser.add_argument('--top', type=int, default=REPORT_TOP_FUNCTIONS)
+    args = parser.parse_args()
+    pstats.Stats(args.path).sort_stats(args.sort).print_stats(args.top)
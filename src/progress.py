@@ -0,0 +1,154 @@
+import logging
+import shutil
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTY_INTERVAL_SECONDS = 0.5  # Redraw rate of the terminal status line
+DEFAULT_LOG_INTERVAL_SECONDS = 10.0  # Status line rate when not on a TTY
+BUSIEST_SITES_SHOWN = 3
+
+
+class ProgressReporter:
+    """
+    One aggregated, rate-limited progress display for a whole run.
+
+    Crawl threads only record counts (`update`, once per page); a single
+    reporter thread turns them into output at a fixed rate. On a TTY this is
+    one status line redrawn in place; otherwise (cron, CI, piped output) it
+    is a periodic `key=value` INFO log line, suitable for log collection.
+
+    Args:
+        interval (float, optional): Seconds between reports. Defaults to
+            DEFAULT_TTY_INTERVAL_SECONDS on a TTY, else
+            DEFAULT_LOG_INTERVAL_SECONDS.
+        stream (file, optional): Terminal stream; defaults to sys.stderr.
+        tty (bool, optional): Force terminal (True) or log-line (False)
+            mode; detected from `stream` by default.
+    """
+
+    def __init__(self, interval=None, stream=None, tty=None):
+        self.stream = stream or sys.stderr
+        self.tty = self.stream.isatty() if tty is None else tty
+        self.interval = interval or (
+            DEFAULT_TTY_INTERVAL_SECONDS if self.tty
+            else DEFAULT_LOG_INTERVAL_SECONDS
+        )
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._reset(total=None)
+
+    def _reset(self, total):
+        self.total = total
+        self.started_at = time.monotonic()
+        self._in_flight = {}  # url -> latest crawl stats dict
+        self._finished_pages = 0
+        self._done = 0
+        self._failed = 0
+        self._last_pages = 0
+        self._last_time = self.started_at
+
+    def start(self, total=None):
+        """Starts reporting for a run of `total` tasks (None if unknown)."""
+        with self._lock:
+            self._reset(total)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="ProgressReporter", daemon=True
+        )
+        self._thread.start()
+
+    def task_started(self, url):
+        with self._lock:
+            self._in_flight[url] = None
+
+    def update(self, url, stats):
+        """Records a site's running counts; cheap, called once per page."""
+        with self._lock:
+            self._in_flight[url] = stats
+
+    def task_finished(self, url, status):
+        with self._lock:
+            stats = self._in_flight.pop(url, None)
+            if stats:
+                self._finished_pages += stats.get('pages', 0)
+            self._done += 1
+            if status not in ('success', 'cancelled'):
+                self._failed += 1
+
+    def snapshot(self):
+        """Returns the current aggregate counts as a dict."""
+        now = time.monotonic()
+        with self._lock:
+            in_flight = [
+                (url, stats.get('pages', 0) if stats else 0)
+                for url, stats in self._in_flight.items()
+            ]
+            pages = self._finished_pages + sum(count for _, count in in_flight)
+            elapsed = now - self.started_at
+            window = now - self._last_time
+            rate = (pages - self._last_pages) / window if window > 0 else 0.0
+            self._last_pages, self._last_time = pages, now
+            snapshot = {
+                'elapsed': round(elapsed, 1),
+                'done': self._done,
+                'total': self.total,
+                'failed': self._failed,
+                'in_flight': len(in_flight),
+                'pages': pages,
+                'pages_per_sec': round(rate, 1),
+                'avg_pages_per_sec': round(pages / elapsed, 1) if elapsed > 0 else 0.0,
+            }
+        in_flight.sort(key=lambda item: item[1], reverse=True)
+        snapshot['busiest'] = in_flight[:BUSIEST_SITES_SHOWN]
+        return snapshot
+
+    def _format(self, snapshot, final=False):
+        total = f"/{snapshot['total']}" if snapshot['total'] is not None else ""
+        rate = snapshot['avg_pages_per_sec' if final else 'pages_per_sec']
+        line = (
+            f"{snapshot['done']}{total} sites, {snapshot['in_flight']} in flight, "
+            f"{snapshot['failed']} failed | {snapshot['pages']} pages, "
+            f"{rate}/s | {snapshot['elapsed']:.0f}s"
+        )
+        if snapshot['busiest']:
+            line += " | " + ", ".join(
+                f"{url.split('//')[-1][:30]}:{count}"
+                for url, count in snapshot['busiest']
+            )
+        return line
+
+    def report(self, final=False):
+        """Emits one progress report now; `final` reports the run average rate."""
+        snapshot = self.snapshot()
+        if self.tty:
+            width = shutil.get_terminal_size().columns - 1
+            line = self._format(snapshot, final)
+            self.stream.write("\r" + line[:width].ljust(width))
+            self.stream.flush()
+        else:
+            logger.info(
+                f"progress elapsed={snapshot['elapsed']}s done={snapshot['done']} "
+                f"total={snapshot['total']} failed={snapshot['failed']} "
+                f"in_flight={snapshot['in_flight']} pages={snapshot['pages']} "
+                f"pages_per_sec={snapshot['pages_per_sec']} "
+                f"avg_pages_per_sec={snapshot['avg_pages_per_sec']}"
+            )
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.report()
+
+    def stop(self):
+        """Stops the reporter thread and emits a final report."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.report(final=True)
+        if self.tty:
+            self.stream.write("\n")
+            self.stream.flush()
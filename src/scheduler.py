@@ -0,0 +1,165 @@
+import collections
+import heapq
+import ipaddress
+import itertools
+import logging
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Second-level labels commonly used under two-letter country TLDs
+#  (e.g. example.co.uk). A heuristic stand-in for the Public Suffix List.
+_COUNTRY_SECOND_LEVEL_LABELS = {
+    'ac', 'co', 'com', 'edu', 'gov', 'net', 'org', 'ne', 'or', 'go'
+}
+
+
+def registered_domain(url):
+    """
+    Returns the registered domain ("eTLD+1") of a URL, used to group tasks
+    that hit the same site.
+
+    Uses a small heuristic instead of the Public Suffix List: the last two
+    host labels, or the last three when the host ends in a generic
+    second-level label under a country TLD (e.g. `example.co.uk`). IP
+    addresses and single-label hosts are returned as-is.
+
+    Args:
+        url (str): The URL to inspect.
+
+    Returns:
+        str: The lower-cased registered domain, or the raw URL if it has no
+            parsable host.
+    """
+    try:
+        host = (urlparse(url).hostname or '').rstrip('.')
+    except ValueError:
+        host = ''
+    if not host:
+        return url
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+    labels = host.split('.')
+    if (len(labels) >= 3 and len(labels[-1]) == 2
+            and labels[-2] in _COUNTRY_SECOND_LEVEL_LABELS):
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+def longest_expected_first(history):
+    """
+    Priority policy: run the tasks expected to take longest first.
+
+    Scheduling the biggest jobs first (LPT) keeps a few huge sites from
+    starting last and stretching the batch's total wall-clock time.
+
+    Args:
+        history (CrawlHistory): Source of per-site duration estimates.
+
+    Returns:
+        callable: Maps a task tuple to a sort key (lower runs first).
+    """
+    def priority(task):
+        return -history.estimate(task[0])
+    return priority
+
+
+class DomainScheduler:
+    """
+    Orders tasks by domain and caps how many tasks per domain may run at once.
+
+    Without a priority policy, domains are served round-robin and tasks within
+    a domain keep their submission order. With a `priority` callable, the
+    runnable domain whose next task has the lowest key goes first (ties fall
+    back to round-robin), and each domain's own tasks are ordered by key.
+
+    Tasks are tuples whose first element is the URL, e.g. `(url,
+    css_selector)`. The scheduler is not thread-safe; it is meant to be
+    driven by a single dispatcher loop (see `ConcurrencyManager`), which calls
+    `next_task` whenever a worker slot is free and `task_done` when a task
+    finishes.
+
+    Args:
+        max_per_domain (int, optional): Maximum tasks in flight per registered
+            domain. None means no cap (interleaving still applies).
+        priority (callable, optional): Maps a task to a sort key; lower keys
+            run first. See `longest_expected_first`.
+    """
+
+    def __init__(self, max_per_domain=None, priority=None):
+        self.max_per_domain = max_per_domain
+        self.priority = priority
+        self._queues = {}  # domain -> heap of (key, seq, task)
+        self._rotation = collections.deque()  # domains with pending tasks
+        self._active = collections.Counter()  # domain -> tasks in flight
+        self._sequence = itertools.count()
+        self._pending_count = 0
+
+    def __len__(self):
+        """Number of tasks not yet handed out."""
+        return self._pending_count
+
+    def add(self, task):
+        """Queues a task; it runs after earlier equal-priority tasks of its domain."""
+        domain = registered_domain(task[0])
+        queue = self._queues.get(domain)
+        if queue is None:
+            queue = self._queues[domain] = []
+        if not queue:
+            self._rotation.append(domain)
+        sequence = next(self._sequence)
+        key = self.priority(task) if self.priority is not None else sequence
+        heapq.heappush(queue, (key, sequence, task))
+        self._pending_count += 1
+
+    def _has_capacity(self, domain):
+        return (self.max_per_domain is None
+                or self._active[domain] < self.max_per_domain)
+
+    def next_task(self):
+        """
+        Returns the next task to run, or None if nothing is runnable right now
+        (queue empty, or every domain with pending work is at its cap).
+        """
+        chosen = None
+        for index, domain in enumerate(self._rotation):
+            if not self._has_capacity(domain):
+                continue
+            if chosen is None:
+                chosen = index
+                if self.priority is None:
+                    break  # Plain round-robin: first runnable domain wins
+            elif self._queues[domain][0][0] < self._queues[self._rotation[chosen]][0][0]:
+                chosen = index
+        if chosen is None:
+            return None
+
+        domain = self._rotation[chosen]
+        del self._rotation[chosen]
+        queue = self._queues[domain]
+        _, _, task = heapq.heappop(queue)
+        if queue:
+            self._rotation.append(domain)  # Back of the line
+        self._active[domain] += 1
+        self._pending_count -= 1
+        return task
+
+    def task_done(self, task):
+        """Releases the domain slot held by a task returned from `next_task`."""
+        domain = registered_domain(task[0])
+        if self._active[domain] > 0:
+            self._active[domain] -= 1
+
+    def drain(self):
+        """Removes and returns every task not yet handed out, in queue order."""
+        drained = []
+        for domain in self._rotation:
+            queue = self._queues[domain]
+            drained.extend(task for _, _, task in sorted(queue))
+            queue.clear()
+        self._rotation.clear()
+        self._pending_count = 0
+        return drained
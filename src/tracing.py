@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACE_FILE = "trace.json"
+# Per-thread cap; later spans are dropped (and counted) instead of growing
+#  memory without bound on very long runs.
+DEFAULT_MAX_EVENTS_PER_THREAD = 1_000_000
+
+_tracer = None  # Active Tracer, if any; see start_tracing()
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ('buffer', 'name', 'cat', 'args', 'started')
+
+    def __init__(self, buffer, name, cat, args):
+        self.buffer = buffer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.buffer.add(self.name, self.cat, self.started, time.perf_counter_ns(), self.args)
+        return False
+
+
+class _ThreadBuffer:
+    """Spans recorded by one thread; only that thread appends to it."""
+
+    def __init__(self, tid, thread_name, max_events):
+        self.tid = tid
+        self.thread_name = thread_name
+        self.max_events = max_events
+        self.events = []
+        self.dropped = 0
+
+    def add(self, name, cat, started_ns, ended_ns, args):
+        if len(self.events) >= self.max_events:
+            self.dropped += 1
+            return
+        self.events.append((name, cat, started_ns, ended_ns, args))
+
+
+class Tracer:
+    """
+    Records timed spans (fetch, parse, write, ...) from every thread and
+    writes them as a Chrome Trace Event file.
+
+    Each thread appends to its own buffer, so recording a span takes no
+    lock; buffers are only read when the trace is written at the end of a
+    run. Open the file in https://ui.perfetto.dev or chrome://tracing to see
+    one row per worker thread: idle gaps, tasks queued behind one slow host
+    and long lock or retry waits are visible at a glance.
+
+    Args:
+        max_events_per_thread (int): Spans kept per thread.
+    """
+
+    def __init__(self, max_events_per_thread=DEFAULT_MAX_EVENTS_PER_THREAD):
+        self.max_events_per_thread = max_events_per_thread
+        self.origin_ns = time.perf_counter_ns()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._buffers = []
+
+    def _buffer(self):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            thread = threading.current_thread()
+            buffer = self._local.buffer = _ThreadBuffer(
+                thread.ident, thread.name, self.max_events_per_thread
+            )
+            with self._lock:
+                self._buffers.append(buffer)
+        return buffer
+
+    def span(self, name, cat='crawl', **args):
+        """Context manager recording the enclosed block as one span."""
+        return _Span(self._buffer(), name, cat, args)
+
+    def events(self):
+        """Returns the recorded spans as Chrome Trace Event dicts."""
+        pid = os.getpid()
+        with self._lock:
+            buffers = list(self._buffers)
+        events = [{
+            'ph': 'M', 'name': 'process_name', 'pid': pid, 'tid': 0,
+            'args': {'name': 'nav-map crawler'},
+        }]
+        for buffer in buffers:
+            events.append({
+                'ph': 'M', 'name': 'thread_name', 'pid': pid, 'tid': buffer.tid,
+                'args': {'name': buffer.thread_name},
+            })
+            for name, cat, started_ns, ended_ns, args in list(buffer.events):
+                event = {
+                    'ph': 'X', 'name': name, 'cat': cat, 'pid': pid,
+                    'tid': buffer.tid,
+                    'ts': (started_ns - self.origin_ns) / 1000,  # microseconds
+                    'dur': (ended_ns - started_ns) / 1000,
+                }
+                if args:
+                    event['args'] = args
+                events.append(event)
+        return events
+
+    def write(self, path=DEFAULT_TRACE_FILE):
+        """
+        Writes the trace to `path` in Chrome Trace Event JSON format.
+
+        Returns:
+            bool: True on success. Errors are logged, not raised.
+        """
+        events = self.events()
+        dropped = sum(buffer.dropped for buffer in self._buffers)
+        if dropped:
+            logger.warning(f"Trace buffer full: {dropped} span(s) were dropped.")
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {'traceEvents': events, 'displayTimeUnit': 'ms'}, f,
+                    separators=(',', ':'), default=str
+                )
+        except OSError as e:
+            logger.error(f"Failed to write trace to {path}: {e}")
+            return False
+        logger.info(f"Trace with {len(events)} event(s) written to {path}")
+        return True
+
+
+def span(name, cat='crawl', **args):
+    """
+    Records the enclosed block as a span on the active tracer. A shared
+    no-op context manager is returned when tracing is off, so instrumented
+    code costs one global lookup.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, cat, **args)
+
+
+def start_tracing(tracer=None):
+    """Makes `tracer` (a new Tracer by default) the active tracer and returns it."""
+    global _tracer
+    _tracer = tracer or Tracer()
+    return _tracer
+
+
+def stop_tracing(path=None):
+    """
+    Deactivates the active tracer, writing it to `path` if given.
+
+    Returns:
+        Tracer: The tracer that was active, or None.
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None and path:
+        tracer.write(path)
+    return tracer
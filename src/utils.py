@@ -1,9 +1,19 @@
 import re
 import time
 import random
+import inspect
 import logging
 import functools
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlunparse
+
+try:
+    from .deadline import DeadlineExceeded
+    from .metrics import RETRIES
+    from .tracing import span
+except ImportError:
+    from deadline import DeadlineExceeded
+    from metrics import RETRIES
+    from tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -79,6 +89,66 @@ def get_website_name(url):
         return "invalid_url_parsing_error"
 
 
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url):
+    """
+    Normalizes a URL so equivalent spellings compare equal.
+
+    Lower-cases the scheme and host, drops default ports, the fragment and
+    any userinfo, and uses "/" for an empty path. The query string is kept.
+
+    Args:
+        url (str): The URL to normalize.
+
+    Returns:
+        str: The canonical URL, or the input unchanged if it cannot be parsed.
+    """
+    try:
+        parsed = urlparse(url)
+        scheme = parsed.scheme.lower()
+        host = (parsed.hostname or '').lower()
+        port = parsed.port
+    except ValueError:
+        return url
+    if port is not None and port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    return urlunparse(
+        (scheme, host, parsed.path or '/', parsed.params, parsed.query, '')
+    )
+
+
+class RetryLater(Exception):
+    """
+    Raised by a `retry_with_backoff` function called in deferred mode
+    (``retry_attempt=n``) instead of sleeping before the next attempt.
+
+    The caller schedules the call again after `delay` seconds, passing
+    ``retry_attempt=attempt``, and is free to do other work meanwhile.
+    """
+
+    def __init__(self, delay, attempt, error):
+        super().__init__(f"Retry #{attempt} due in {delay:.2f}s after: {error}")
+        self.delay = delay
+        self.attempt = attempt
+        self.error = error
+
+
+def _backoff_delay(delay, jitter):
+    """Returns `delay` with random jitter of +/- `jitter * delay`, never negative."""
+    return max(0, delay + random.uniform(-jitter * delay, jitter * delay))
+
+
+def _check_retry_deadline(deadline, wait_time, error):
+    """Raises DeadlineExceeded if a retry `wait_time` from now cannot start."""
+    if deadline is None:
+        return
+    remaining = deadline.remaining()
+    if deadline.expired() or (remaining is not None and remaining < wait_time):
+        raise DeadlineExceeded(deadline.reason() or "deadline") from error
+
+
 def retry_with_backoff(
         retries=3,
         initial_delay: float = 1.0,
@@ -95,38 +165,99 @@ def retry_with_backoff(
         backoff_factor (float): Factor to multiply delay by for each retry.
         jitter (float): Factor to add random jitter to delay (delay * jitter).
         retry_exceptions (tuple): Tuple of exception types to retry on.
+
+    If the wrapped call is given a ``deadline`` keyword argument (a
+    `Deadline`), backoff sleeps wake early on cancellation and a retry that
+    cannot start before the deadline raises `DeadlineExceeded` instead.
+
+    If the wrapped call is given ``retry_attempt=n`` (deferred mode), it
+    makes only attempt `n` (0 is the first call) and, when that fails and
+    retries remain, raises `RetryLater` with the backoff delay instead of
+    sleeping in the calling thread. The keyword is not passed on to `func`.
+
+    Coroutine functions get an async wrapper that awaits `asyncio.sleep`
+    between attempts, so backoff never blocks the event loop.
     """
     def decorator(func):
+        def give_up(e):
+            logger.error(
+                f"Function '{func.__name__}' failed after {retries} retries. Last error: {e}",
+                exc_info=True
+                # Include stack trace for the final failure
+            )
+
+        def next_wait(e, attempt, delay, verb="Retrying"):
+            """Counts and logs a retry; returns its jittered wait time."""
+            wait_time = _backoff_delay(delay, jitter)
+            RETRIES.inc(function=func.__name__)
+            logger.warning(
+                f"Function '{func.__name__}' failed with {type(e).__name__}: {e}. "
+                f"{verb} in {wait_time:.2f} seconds... (Attempt {attempt}/{retries})"
+            )
+            return wait_time
+
+        def call_once(attempt, args, kwargs):
+            """Deferred mode: one attempt; RetryLater instead of sleeping."""
+            try:
+                return func(*args, **kwargs)
+            except retry_exceptions as e:
+                if attempt >= retries:
+                    give_up(e)
+                    raise
+                wait_time = next_wait(
+                    e, attempt + 1, initial_delay * backoff_factor ** attempt,
+                    verb="Deferring retry"
+                )
+                _check_retry_deadline(kwargs.get('deadline'), wait_time, e)
+                raise RetryLater(wait_time, attempt + 1, e) from e
+
+        if inspect.iscoroutinefunction(func):
+            import asyncio  # Deferred: keeps asyncio off the CLI startup path
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                delay = initial_delay
+                deadline = kwargs.get('deadline')
+                for i in range(retries + 1):
+                    try:
+                        return await func(*args, **kwargs)
+                    except retry_exceptions as e:
+                        if i == retries:
+                            give_up(e)
+                            raise
+                        wait_time = next_wait(e, i + 1, delay)
+                        _check_retry_deadline(deadline, wait_time, e)
+                        # No retry_sleep span: spans are per thread, and other
+                        #  coroutines run on this thread while we wait
+                        await asyncio.sleep(wait_time)
+                        if deadline is not None:
+                            deadline.check()
+                        delay *= backoff_factor
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            attempt = kwargs.pop('retry_attempt', None)
+            if attempt is not None:
+                return call_once(attempt, args, kwargs)
             delay = initial_delay
+            deadline = kwargs.get('deadline')
             for i in range(retries + 1):  # Try once + number of retries
                 try:
                     return func(*args, **kwargs)
                 except retry_exceptions as e:
                     if i == retries:
-                        logger.error(
-                            f"Function '{func.__name__}' failed after {retries} retries. Last error: {e}",
-                            exc_info=True
-                            # Include stack trace for the final failure
-                        )
+                        give_up(e)
                         raise  # Re-raise the last exception
-                    else:
-                        # Calculate delay with backoff and jitter
-                        current_jitter = random.uniform(
-                            -jitter * delay,
-                            jitter * delay
-                        )
-                        wait_time = delay + current_jitter
-                        # Ensure wait_time is not negative
-                        wait_time = max(0, wait_time)
-
-                        logger.warning(
-                            f"Function '{func.__name__}' failed with {type(e).__name__}: {e}. "
-                            f"Retrying in {wait_time:.2f} seconds... (Attempt {i + 1}/{retries})"
-                        )
-                        time.sleep(wait_time)
-                        delay *= backoff_factor
+                    wait_time = next_wait(e, i + 1, delay)
+                    with span('retry_sleep', function=func.__name__, attempt=i + 1):
+                        if deadline is None:
+                            time.sleep(wait_time)
+                        elif not deadline.sleep(wait_time):
+                            raise DeadlineExceeded(
+                                deadline.reason() or "deadline"
+                            ) from e
+                    delay *= backoff_factor
         return wrapper
     return decorator
 
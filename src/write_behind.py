@@ -0,0 +1,98 @@
+import concurrent.futures
+import logging
+import queue
+import threading
+
+try:
+    from .file_writer import write_map_file
+except ImportError:
+    from file_writer import write_map_file
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PENDING_WRITES = 64
+_STOP = object()  # Queue sentinel telling the writer thread to exit
+
+
+class WriteBehindWriter:
+    """
+    Writes rendered maps on a dedicated thread so fetch workers never block
+    on disk I/O.
+
+    `submit` hands a map to a bounded queue and returns a Future that resolves
+    to the write's boolean result. Repeated submissions for a path that is
+    still queued are coalesced: only the newest content is written, and every
+    Future for that path receives the result of that one write. Each write
+    still goes through `write_func` (by default `write_map_file`), so the
+    temp-file-then-rename atomicity is unchanged.
+
+    Args:
+        max_pending (int): Maximum distinct paths waiting to be written.
+            `submit` blocks when the queue is full, applying backpressure
+            instead of buffering unbounded content in memory.
+        write_func (callable, optional): `(filepath, content) -> bool` used
+            for each write. Defaults to `write_map_file`.
+    """
+
+    def __init__(self, max_pending=DEFAULT_MAX_PENDING_WRITES, write_func=None):
+        self.write_func = write_func or write_map_file
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._pending = {}  # filepath -> (content, [futures])
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="MapWriter", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, filepath, content):
+        """
+        Queues `content` for writing to `filepath`.
+
+        Returns:
+            concurrent.futures.Future: Resolves to True/False like
+                `write_map_file`.
+        """
+        future = concurrent.futures.Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("WriteBehindWriter is closed.")
+            entry = self._pending.get(filepath)
+            if entry is not None:
+                # Still queued: newest content wins, all callers share the write
+                self._pending[filepath] = (content, entry[1] + [future])
+                logger.debug(f"Coalesced queued write for {filepath}")
+                return future
+            self._pending[filepath] = (content, [future])
+        self._queue.put(filepath)  # Blocks while the queue is full
+        return future
+
+    def _run(self):
+        while True:
+            filepath = self._queue.get()
+            if filepath is _STOP:
+                break
+            with self._lock:
+                content, futures = self._pending.pop(filepath)
+            try:
+                success = self.write_func(filepath, content)
+            except Exception as e:
+                logger.error(
+                    f"Write-behind write failed for {filepath}: {e}",
+                    exc_info=True
+                )
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for future in futures:
+                future.set_result(success)
+
+    def close(self, wait=True):
+        """Flushes queued writes and stops the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(_STOP)
+        if wait:
+            self._thread.join()
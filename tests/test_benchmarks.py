@@ -0,0 +1,117 @@
+"""Smoke tests for the synthetic-site benchmark harness in benchmarks/."""
+
+import unittest
+import sys
+import os
+import logging  # Import logging unconditionally
+
+# Adjust path to import from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+try:
+    from benchmarks.synthetic_site import SiteSpec, render_page, page_id_for
+    from benchmarks.run import run_benchmark, percentile
+    from benchmarks.micro import compare, time_callable
+    from benchmarks.fault_server import FaultInjectingServer, FaultSpec
+    from benchmarks.load_test import saturation_point
+    import requests
+    from src.logger_config import setup_logging
+    setup_logging(level=logging.CRITICAL)
+except ImportError as e:
+    print(f"Error importing src modules in tests: {e}. Ensure tests are run from project root or PYTHONPATH is set.")
+    sys.exit(1)
+
+
+class TestSyntheticSite(unittest.TestCase):
+
+    def test_site_shape(self):
+        """Test heap-numbered nav links, depth cap and page padding."""
+        spec = SiteSpec(pages=50, fanout=3, depth=2, page_size=2048)
+        status, body = render_page(spec, page_id_for("/p/1.html"))
+        self.assertEqual(status, 200)
+        self.assertGreaterEqual(len(body), 2048)
+        for child in (4, 5, 6):
+            self.assertIn(f'href="/p/{child}.html"'.encode(), body)
+        self.assertEqual(spec.reachable_pages(), 1 + 3 + 9)
+        self.assertEqual(render_page(spec, 99)[0], 404)
+
+    def test_error_rate_is_deterministic(self):
+        spec = SiteSpec(pages=1000, error_rate=0.1, seed=7)
+        failing = [i for i in range(1000) if spec.fails(i)]
+        self.assertEqual(failing, [i for i in range(1000) if SiteSpec(
+            pages=1000, error_rate=0.1, seed=7).fails(i)])
+        self.assertTrue(50 < len(failing) < 150)
+
+    def test_percentile(self):
+        self.assertEqual(percentile(list(range(1, 101)), 50), 50)
+        self.assertEqual(percentile(list(range(1, 101)), 99), 99)
+        self.assertIsNone(percentile([], 50))
+
+
+class TestRunBenchmark(unittest.TestCase):
+
+    def test_inprocess_crawl_fetches_every_page(self):
+        spec = SiteSpec(pages=30, fanout=4, page_size=512)
+        result = run_benchmark(spec, mode='crawl', transport='inprocess')
+        self.assertEqual(result['pages'], result['expected_pages'])
+        self.assertEqual(result['pages'], 30)
+        self.assertIsNotNone(result['fetch_latency_ms']['p99'])
+
+
+class TestMicroHarness(unittest.TestCase):
+
+    def test_compare_flags_regressions_beyond_tolerance(self):
+        baselines = {'benchmarks': {'a': {'min': 1.0}, 'b': {'min': 1.0}}}
+        results = {'a': {'min': 1.2}, 'b': {'min': 1.3}, 'new': {'min': 5.0}}
+        rows = {row[0]: row for row in compare(results, baselines, tolerance=0.25)}
+        self.assertFalse(rows['a'][4])
+        self.assertTrue(rows['b'][4])
+        self.assertIsNone(rows['new'][2])  # No baseline yet: never a regression
+        self.assertFalse(rows['new'][4])
+
+    def test_time_callable_scales_calls_per_batch(self):
+        calls = []
+        timings = time_callable(lambda: calls.append(1), repeat=2, min_batch=0.01)
+        self.assertGreater(timings['calls'], 1)
+        self.assertLessEqual(timings['min'], timings['median'])
+
+
+class TestFaultInjection(unittest.TestCase):
+
+    def test_throttle_and_burst(self):
+        """Test 429 + Retry-After, and that a burst fails consecutive requests."""
+        spec = SiteSpec(pages=10, fanout=3, page_size=256)
+        throttled = FaultSpec(rates={'throttle': 1.0}, retry_after=7)
+        with FaultInjectingServer(spec, throttled) as server:
+            response = requests.get(server.base_url, timeout=5)
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response.headers['Retry-After'], '7')
+
+        bursty = FaultSpec(rates={'burst': 0.01}, burst_length=4)
+        server = FaultInjectingServer(spec, bursty)
+        draws = [server._draw("/")[1] for _ in range(2000)]
+        first = draws.index('burst')
+        self.assertEqual(draws[first:first + 4], ['burst'] * 4)
+        server.server.server_close()
+
+    def test_draws_are_deterministic_per_seed(self):
+        spec = SiteSpec(pages=10)
+        faults = FaultSpec(rates={'reset': 0.1, 'throttle': 0.1})
+        draws = []
+        for _ in range(2):
+            server = FaultInjectingServer(spec, faults, seed=3)
+            draws.append([server._draw("/")[1] for _ in range(200)])
+            server.server.server_close()
+        self.assertEqual(draws[0], draws[1])
+        self.assertIn('reset', draws[0])
+
+    def test_saturation_point(self):
+        batches = [{'workers': w, 'pages_per_sec': pps}
+                   for w, pps in ((2, 100), (4, 190), (8, 195), (16, 196))]
+        self.assertEqual(saturation_point(batches), 4)
+        self.assertIsNone(saturation_point(batches[:2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""Unit tests for task scheduling in src.concurrency_manager."""
+
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import time
+import logging  # Import logging unconditionally
+from unittest import mock
+
+# Adjust path to import from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+try:
+    from src import concurrency_manager
+    from src.concurrency_manager import ConcurrencyManager
+    from src.logger_config import setup_logging
+    setup_logging(level=logging.CRITICAL)
+except ImportError as e:
+    print(f"Error importing src modules in tests: {e}. Ensure tests are run from project root or PYTHONPATH is set.")
+    sys.exit(1)
+
+
+class TestConcurrencyManager(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        previous_cwd = os.getcwd()
+        os.chdir(self.temp_dir.name)  # dlq.log and maps stay out of the tree
+        self.addCleanup(os.chdir, previous_cwd)
+
+    def test_resumed_tasks_overfilling_the_window(self):
+        """Test that crawls resuming while the only worker is busy don't break the input top-up."""
+        slow_started = threading.Event()
+
+        def fake_task(url, css_selector, crawl_state=None, **kwargs):
+            if url == "https://slow.com":
+                slow_started.set()
+                time.sleep(0.3)  # Both suspended crawls come due meanwhile
+            elif url.startswith("https://flaky") and crawl_state is None:
+                return {'status': 'retry_later', 'url': url,
+                        'crawl_state': object(), 'resume_at': time.monotonic() + 0.05}
+            return {'status': 'success', 'url': url, 'filepath': url, 'digest': None}
+
+        manager = ConcurrencyManager(max_workers=1, lookahead=1, max_per_domain=None)
+        self.addCleanup(manager.shutdown)
+        tasks = [("https://flaky1.com", "nav"), ("https://flaky2.com", "nav"),
+                 ("https://slow.com", "nav"), ("https://last.com", "nav")]
+        with mock.patch.object(concurrency_manager, "process_single_url_task",
+                               side_effect=fake_task):
+            results = manager.process_tasks(iter(tasks))
+
+        self.assertTrue(slow_started.is_set())
+        self.assertEqual(
+            sorted(r['url'] for r in results if r['status'] == 'success'),
+            sorted(url for url, _ in tasks)
+        )
+        self.assertEqual(manager.futures, {})  # Handled futures are released
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,13 +4,18 @@ import unittest
 import sys
 import os
 import logging  # Import logging unconditionally
+from unittest import mock
 
 # Adjust path to import from src
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
 try:
-    from src.crawler import format_tree  # fetch_html, find_nav_links, crawl_navigation
+    from src.crawler import format_tree, crawl_navigation, CrawlSuspended  # fetch_html, find_nav_links
+    from src.crawler import find_nav_links, sniff_encoding
+    from src.utils import RetryLater
+    from src.deadline import Deadline
+    from src.crawl_limits import CrawlLimits
     # Need logger_config for the module to load if it uses logger at module level
     from src.logger_config import setup_logging
     # Configure dummy logging for tests
@@ -23,6 +28,11 @@ except NameError:  # Handle case where logging hasn't been imported yet (should
     logging.basicConfig(level=logging.CRITICAL)
 
 
+def _page(html):
+    """A fake `fetch_html` result: (body bytes, encoding), or None."""
+    return (html.encode('utf-8'), 'utf-8') if html is not None else None
+
+
 class TestCrawler(unittest.TestCase):
 
     def test_format_tree_simple(self):
@@ -89,6 +99,146 @@ R
 """.strip()
         self.assertEqual(format_tree(nav_data), expected_output)
 
+    def test_format_tree_marks_truncated_nodes(self):
+        """Test that truncated nodes are flagged in the markdown output."""
+        nav_data = {
+            "R": {"name": "R", "truncated": "deadline", "children": {
+                "A": {"name": "A", "children": {}},
+            }}
+        }
+        self.assertEqual(format_tree(nav_data), "R [truncated: deadline]\n└── A")
+
+    def test_crawl_navigation_stops_when_deadline_expires(self):
+        """Test that an expired deadline yields a partial tree marked truncated."""
+        pages = {
+            "https://root.com": '<nav><a href="/a">A</a><a href="/b">B</a></nav>',
+        }
+        deadline = Deadline()
+        fetched = []
+
+        def fake_fetch(url, deadline=None, stats=None):
+            fetched.append(url)
+            deadline.cancel()  # Cancel after the first page
+            return _page(pages.get(url))
+
+        with mock.patch("src.crawler.fetch_html", side_effect=fake_fetch):
+            tree = crawl_navigation("https://root.com", "nav", deadline=deadline)
+
+        root = tree["https://root.com"]
+        self.assertEqual(fetched, ["https://root.com"])
+        self.assertEqual(root["truncated"], "cancelled")
+        self.assertEqual(
+            list(root["children"]), ["https://root.com/a", "https://root.com/b"]
+        )
+
+    def _crawl_with_pages(self, pages, limits):
+        """Runs crawl_navigation over an in-memory site."""
+        def fake_fetch(url, deadline=None, stats=None):
+            stats['bytes'] += len(pages.get(url, ""))
+            return _page(pages.get(url))
+
+        with mock.patch("src.crawler.fetch_html", side_effect=fake_fetch):
+            return crawl_navigation("https://root.com", "nav", limits=limits)
+
+    def test_crawl_navigation_max_depth_marks_unexpanded_nodes(self):
+        """Test that nodes beyond max_depth are listed but not fetched."""
+        pages = {
+            "https://root.com": '<nav><a href="/a">A</a></nav>',
+            "https://root.com/a": '<nav><a href="/a/1">A1</a></nav>',
+            "https://root.com/a/1": '<nav><a href="/a/1/x">X</a></nav>',
+        }
+        tree = self._crawl_with_pages(pages, CrawlLimits(max_depth=1))
+        root = tree["https://root.com"]
+        a1 = root["children"]["https://root.com/a"]["children"]["https://root.com/a/1"]
+        self.assertEqual(a1, {"name": "A1", "children": {}, "truncated": "max_depth"})
+        self.assertNotIn("truncated", root)
+        self.assertEqual(root["stats"]["pages"], 2)
+
+    def test_crawl_navigation_max_pages_stops_expansion(self):
+        """Test that max_pages stops the crawl and flags queued nodes."""
+        pages = {
+            "https://root.com": '<nav><a href="/a">A</a><a href="/b">B</a></nav>',
+        }
+        tree = self._crawl_with_pages(pages, CrawlLimits(max_pages=1))
+        root = tree["https://root.com"]
+        self.assertEqual(root["truncated"], "max_pages")
+        self.assertEqual(root["stats"]["pages"], 1)
+        self.assertEqual(root["stats"]["queued"], 2)
+        for child in root["children"].values():
+            self.assertEqual(child["truncated"], "max_pages")
+
+    def test_crawl_navigation_counts_failed_fetches_as_errors(self):
+        """Test that only parsed pages count as pages; failed fetches are errors."""
+        pages = {
+            "https://root.com": '<nav><a href="/a">A</a><a href="/b">B</a></nav>',
+            "https://root.com/a": '<nav></nav>',
+        }  # /b fails to fetch
+        tree = self._crawl_with_pages(pages, None)
+        stats = tree["https://root.com"]["stats"]
+        self.assertEqual(stats["pages"], 2)
+        self.assertEqual(stats["errors"], 1)
+
+    def test_crawl_navigation_defers_failed_pages_and_resumes(self):
+        """Test that a deferred retry suspends the crawl instead of sleeping."""
+        pages = {
+            "https://root.com": '<nav><a href="/a">A</a><a href="/b">B</a></nav>',
+            "https://root.com/a": '<nav></nav>',
+            "https://root.com/b": '<nav></nav>',
+        }
+        fetched = []
+
+        def fake_fetch(url, deadline=None, stats=None, retry_attempt=None):
+            fetched.append((url, retry_attempt))
+            if url == "https://root.com/a" and retry_attempt == 0:
+                raise RetryLater(60, 1, ValueError("reset"))
+            return _page(pages.get(url))
+
+        with mock.patch("src.crawler.fetch_html", side_effect=fake_fetch):
+            with self.assertRaises(CrawlSuspended) as suspended:
+                crawl_navigation("https://root.com", "nav", defer_retries=True)
+            state = suspended.exception.state
+            # /b was crawled while /a waits out its backoff
+            self.assertEqual([url for url, _ in fetched][-1], "https://root.com/b")
+            self.assertEqual(state.pending(), 1)
+            state.deferred[0] = (0,) + state.deferred[0][1:]  # Backoff elapsed
+            tree = crawl_navigation(
+                "https://root.com", "nav", defer_retries=True, state=state
+            )
+
+        self.assertEqual(fetched[-1], ("https://root.com/a", 1))
+        root = tree["https://root.com"]
+        self.assertEqual(root["stats"]["pages"], 3)
+        self.assertNotIn("truncated", root)
+
+    def test_sniff_encoding_prefers_declared_hints(self):
+        """Test BOM > header > <meta> > UTF-8 check > detection order."""
+        latin = '<p>Caf\u00e9</p>'.encode('latin-1')
+        meta = b'<html><head><meta charset="ISO-8859-1"></head>' + latin
+        self.assertEqual(
+            sniff_encoding('text/html', b'\xef\xbb\xbf<p>x</p>'), ('utf-8-sig', 'bom')
+        )
+        self.assertEqual(
+            sniff_encoding('text/html; charset=Shift_JIS', meta), ('shift_jis', 'header')
+        )
+        self.assertEqual(sniff_encoding('text/html', meta), ('iso8859-1', 'meta'))
+        self.assertEqual(
+            sniff_encoding('text/html', b'<meta http-equiv="Content-Type" '
+                                        b'content="text/html; charset=windows-1251">'),
+            ('cp1251', 'meta')
+        )
+        self.assertEqual(
+            sniff_encoding('text/html', '<p>Caf\u00e9</p>'.encode('utf-8')), ('utf-8', 'utf-8')
+        )
+        # A <meta> past the first KB is ignored; undeclared non-UTF-8 is detected
+        late_meta = b' ' * 2048 + meta
+        self.assertIn(sniff_encoding('text/html', late_meta)[1], ('detected', 'fallback'))
+
+    def test_find_nav_links_decodes_bytes_with_hint(self):
+        """Test that byte input is decoded with the given encoding."""
+        body = '<nav><a href="/caf\u00e9">Caf\u00e9</a></nav>'.encode('cp1252')
+        links = find_nav_links(body, "https://root.com", "nav", from_encoding='cp1252')
+        self.assertEqual(links, [("Caf\u00e9", "https://root.com/caf\u00e9")])
+
     # Add more complex tests later, potentially mocking crawler functions
 
 
@@ -6,13 +6,16 @@ import os
 import csv
 import tempfile
 import logging  # Import logging unconditionally
+from unittest import mock
 
 # Adjust path to import from src
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
 try:
-    from src.csv_processor import validate_url, process_csv_file
+    from src import csv_processor
+    from src.csv_processor import validate_url, process_csv_file, iter_valid_urls
+    from src.crawl_limits import CrawlLimits
     # find_csv_files, load_all_valid_urls
     # Need logger_config for the module to load if it uses logger at module
     # level
@@ -124,11 +127,115 @@ class TestCsvProcessor(unittest.TestCase):
         self.assertEqual(result, expected_result)
         os.remove(temp_csv_path)
 
+    def test_process_csv_file_with_limits_column(self):
+        """Test that an optional third column sets per-row crawl limits."""
+        with tempfile.NamedTemporaryFile(mode='w+', delete=False, suffix=".csv", newline='') as temp_csv:
+            writer = csv.writer(temp_csv)
+            writer.writerow(["https://valid1.com", ".nav", "max_depth=2;max_pages=50"])
+            writer.writerow(["https://valid2.com", ".nav", ""])
+            writer.writerow(["https://valid3.com", ".nav", "max_depth=lots"])
+            temp_csv_path = temp_csv.name
+
+        expected_result = [
+            ("https://valid1.com", ".nav", CrawlLimits(max_depth=2, max_pages=50)),
+            ("https://valid2.com", ".nav"),
+        ]
+        result = process_csv_file(temp_csv_path)
+        self.assertEqual(result, expected_result)
+        os.remove(temp_csv_path)
+
     def test_process_csv_file_not_found(self):
         """Test processing a non-existent file."""
         result = process_csv_file("non_existent_file.csv")
         self.assertEqual(result, [])  # Should return empty list and log error
 
+    def test_iter_valid_urls_streams_and_keeps_first(self):
+        """Test that rows stream lazily and duplicates keep the first row."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, "sites.csv"), 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(["https://valid1.com", ".nav"])
+                writer.writerow(["https://valid2.com", "#menu"])
+                writer.writerow(["https://valid1.com", ".other"])
+            rows = iter_valid_urls(temp_dir)
+            self.assertEqual(next(rows), ("https://valid1.com", ".nav"))
+            self.assertEqual(list(rows), [("https://valid2.com", "#menu")])
+
+    def test_iter_valid_urls_parallel_keeps_file_order(self):
+        """Test that files parsed in parallel still dedupe in file order."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for i in range(3):
+                with open(os.path.join(temp_dir, f"vendor{i}.csv"), 'w', newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(["url", "css_selector"])
+                    writer.writerow(["https://shared.com", f".nav{i}"])
+                    writer.writerow([f"https://site{i}.com", ".nav"])
+            rows = list(iter_valid_urls(temp_dir, use_index=False, max_workers=3))
+        self.assertEqual(rows, [
+            ("https://shared.com", ".nav0"), ("https://site0.com", ".nav"),
+            ("https://site1.com", ".nav"), ("https://site2.com", ".nav"),
+        ])
+
+    def test_parallel_parse_relays_worker_logs(self):
+        """Test that pool workers log through this process, not their own handlers."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for i in range(3):
+                with open(os.path.join(temp_dir, f"vendor{i}.csv"), 'w', newline='') as f:
+                    csv.writer(f).writerows([
+                        [f"https://site{i}.com", ".nav"], [f"bad-url-{i}", ".nav"],
+                    ])
+            with self.assertLogs(csv_processor.logger, level='WARNING') as logs:
+                rows = list(iter_valid_urls(temp_dir, use_index=False, max_workers=3))
+        self.assertEqual([row[0] for row in rows],
+                         [f"https://site{i}.com" for i in range(3)])
+        bad_url_records = [r for r in logs.records if "bad-url" in r.getMessage()]
+        self.assertEqual(len(bad_url_records), 3)
+        # vendor0.csv streams here; the other two were parsed in workers
+        self.assertEqual(
+            sum(1 for r in bad_url_records if r.process != os.getpid()), 2
+        )
+
+    def test_csv_index_serves_unchanged_files(self):
+        """Test that unchanged files load from the index and edits invalidate it."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_path = os.path.join(temp_dir, "sites.csv")
+            with open(csv_path, 'w', newline='') as f:
+                csv.writer(f).writerows([
+                    ["url", "css_selector", "limits"],
+                    ["https://valid1.com", ".nav", "max_depth=2"],
+                ])
+            expected = [("https://valid1.com", ".nav", CrawlLimits(max_depth=2))]
+            self.assertEqual(list(iter_valid_urls(temp_dir, max_workers=1)), expected)
+
+            with open(os.path.join(temp_dir, ".csv_index.json")) as f:
+                self.assertNotIn("valid1.com", f.read())  # Positions, not rows
+            with mock.patch.object(csv_processor, "iter_csv_rows") as parse:
+                self.assertEqual(list(iter_valid_urls(temp_dir, max_workers=1)), expected)
+                parse.assert_not_called()
+
+            with open(csv_path, 'a', newline='') as f:
+                csv.writer(f).writerow(["https://valid2.com", "#menu"])
+            self.assertEqual(
+                list(iter_valid_urls(temp_dir, max_workers=1)),
+                expected + [("https://valid2.com", "#menu")]
+            )
+
+    def test_iter_valid_urls_yields_before_file_is_read(self):
+        """Test that the first row is yielded before the rest of its file is parsed."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, "sites.csv"), 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(["url", "css_selector"])
+                writer.writerows([f"https://site{i}.com", ".nav"] for i in range(5000))
+            for use_index in (False, True):
+                with self.subTest(use_index=use_index), mock.patch.object(
+                    csv_processor, "validate_url", wraps=validate_url
+                ) as validate:
+                    rows = iter_valid_urls(temp_dir, use_index=use_index, max_workers=1)
+                    self.assertEqual(next(rows), ("https://site0.com", ".nav"))
+                    self.assertEqual(validate.call_count, 1)
+                    rows.close()
+
     # Add tests for find_csv_files and load_all_valid_urls later if needed,
     # mocking os functions
 
@@ -0,0 +1,118 @@
+"""Unit tests for the resident crawl service in src.daemon."""
+
+import unittest
+import sys
+import os
+import csv
+import json
+import tempfile
+import logging  # Import logging unconditionally
+import urllib.request
+
+# Adjust path to import from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+try:
+    from src.daemon import CrawlDaemon, serve_control
+    from src.deadline import Deadline
+    from src.logger_config import setup_logging
+    setup_logging(level=logging.CRITICAL)
+except ImportError as e:
+    print(f"Error importing src modules in tests: {e}. Ensure tests are run from project root or PYTHONPATH is set.")
+    sys.exit(1)
+
+
+class FakeManager:
+    """Stands in for ConcurrencyManager; records the batches it is given."""
+
+    def __init__(self):
+        self.batches = []
+        self.task_stats = {}
+        self.page_cache = None
+        self.run_deadline = Deadline()
+
+    def process_tasks(self, tasks):
+        tasks = list(tasks)
+        self.batches.append([task[0] for task in tasks])
+        return [{'status': 'success', 'url': task[0]} for task in tasks]
+
+    def cancel(self):
+        self.run_deadline.cancel()
+
+
+class TestCrawlDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.csv_path = os.path.join(self.temp_dir.name, "sites.csv")
+        self._write_sites(["https://a.com", "https://b.com"])
+        self.manager = FakeManager()
+        self.daemon = CrawlDaemon(
+            self.manager, input_dir=self.temp_dir.name, interval=3600
+        )
+
+    def _write_sites(self, urls):
+        with open(self.csv_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["url", "css_selector"])
+            writer.writerows([url, "nav"] for url in urls)
+
+    def test_recrawl_schedule_and_trigger(self):
+        """Test that sites run once per interval unless triggered."""
+        self.daemon._check_inputs()
+        self.assertEqual(self.daemon.run_once(), 2)
+        self.assertEqual(self.daemon.run_once(), 0)  # Not due for an hour
+        self.assertFalse(self.daemon.trigger("https://unknown.com"))
+        self.assertTrue(self.daemon.trigger("https://b.com"))
+        self.assertEqual(self.daemon.run_once(), 1)
+        self.assertEqual(self.manager.batches[-1], ["https://b.com"])
+        self.assertEqual(self.daemon.site_status("https://b.com")['runs'], 2)
+
+    def test_input_changes_are_picked_up(self):
+        """Test that new CSV rows are crawled and removed ones dropped."""
+        self.daemon._check_inputs()
+        self.daemon.run_once()
+        self._write_sites(["https://b.com", "https://c.com", "https://d.com"])
+        self.daemon._check_inputs()
+        self.assertEqual(self.daemon.run_once(), 2)
+        self.assertEqual(sorted(self.manager.batches[-1]), ["https://c.com", "https://d.com"])
+        self.assertIsNone(self.daemon.site_status("https://a.com"))
+
+    def test_stop_is_not_lost_when_a_batch_starts(self):
+        """Test that a stop racing the start of a batch still ends it."""
+        self.daemon._check_inputs()
+        process_tasks = self.manager.process_tasks
+
+        def stop_then_process(tasks):
+            self.daemon.stop()
+            # The cancel is lost: process_tasks replaces the run deadline
+            self.manager.run_deadline = Deadline()
+            return process_tasks(tasks)
+
+        self.manager.process_tasks = stop_then_process
+        self.daemon.run_once()
+        self.assertEqual(self.manager.batches, [[]])
+        self.assertTrue(self.manager.run_deadline.cancelled)
+        self.assertEqual(self.daemon.run_once(), 0)
+        self.assertEqual(len(self.manager.batches), 1)
+
+    def test_control_endpoint(self):
+        """Test status and trigger requests over HTTP."""
+        self.daemon._check_inputs()
+        server = serve_control(self.daemon, port=0)
+        self.addCleanup(server.shutdown)
+        base = f"http://127.0.0.1:{server.server_port}"
+        with urllib.request.urlopen(f"{base}/status") as response:
+            self.assertEqual(json.load(response)['sites'], 2)
+        request = urllib.request.Request(
+            f"{base}/trigger?url=https://a.com", method='POST'
+        )
+        with urllib.request.urlopen(request) as response:
+            self.assertEqual(response.status, 202)
+        self.assertEqual(self.daemon.status()['triggered'], ["https://a.com"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+"""Unit tests for map output (file_writer, write_behind, map_manifest, map_store)."""
+
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import logging  # Import logging unconditionally
+from unittest import mock
+
+# Adjust path to import from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+try:
+    from src import concurrency_manager, file_writer
+    from src.crawler import format_tree
+    from src.file_writer import write_map_file
+    from src.write_behind import WriteBehindWriter
+    from src.map_manifest import MapManifest, content_digest, migrate_flat_to_sharded
+    from src.map_store import SqliteMapStore
+    from src.logger_config import setup_logging
+    setup_logging(level=logging.CRITICAL)
+except ImportError as e:
+    print(f"Error importing src modules in tests: {e}. Ensure tests are run from project root or PYTHONPATH is set.")
+    sys.exit(1)
+
+
+class TestFileWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(file_writer, "OUTPUT_DIR", self.temp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def test_write_map_file(self):
+        """Test that content is written and no temp files are left behind."""
+        filepath = os.path.join(self.temp_dir.name, "site_nav_map.md")
+        self.assertTrue(write_map_file(filepath, "https://site.com\n└── a"))
+        with open(filepath, encoding='utf-8') as f:
+            self.assertEqual(f.read(), "https://site.com\n└── a")
+        leftovers = [n for n in os.listdir(self.temp_dir.name) if n.endswith(".tmp")]
+        self.assertEqual(leftovers, [])
+
+    def test_contended_lock_waits_instead_of_failing(self):
+        """Test that a writer waits for a briefly held lock, then succeeds."""
+        filepath = os.path.join(self.temp_dir.name, "site_nav_map.md")
+        lock_path = filepath + file_writer.LOCK_SUFFIX
+        handle = file_writer._acquire_lock(lock_path)
+        timer = threading.Timer(
+            0.2, file_writer._release_lock, args=(lock_path, handle)
+        )
+        timer.start()
+        try:
+            self.assertTrue(write_map_file(filepath, "content", fsync='full'))
+        finally:
+            timer.join()
+        self.assertFalse(os.path.exists(lock_path))
+
+    def test_lock_timeout_returns_false(self):
+        """Test that a lock held past the timeout fails the write."""
+        filepath = os.path.join(self.temp_dir.name, "site_nav_map.md")
+        lock_path = filepath + file_writer.LOCK_SUFFIX
+        handle = file_writer._acquire_lock(lock_path)
+        try:
+            self.assertFalse(write_map_file(filepath, "content", lock_timeout=0.1))
+        finally:
+            file_writer._release_lock(lock_path, handle)
+        self.assertFalse(os.path.exists(filepath))
+
+    def test_gzip_map_round_trip(self):
+        """Test that a streamed, gzip-compressed map reads back transparently."""
+        filepath = file_writer.generate_filename("https://site.com", compression='gzip')
+        self.assertTrue(filepath.endswith("_nav_map.md.gz"))
+        chunks = iter(["https://site.com", "\n└── https://site.com/a"])
+        self.assertTrue(write_map_file(filepath, chunks, compression='gzip'))
+        with open(filepath, 'rb') as f:
+            self.assertEqual(f.read(2), b"\x1f\x8b")
+        self.assertEqual(
+            file_writer.read_map_file(filepath), "https://site.com\n└── https://site.com/a"
+        )
+        self.assertEqual(
+            list(file_writer.iter_map_file_lines(filepath)),
+            ["https://site.com", "└── https://site.com/a"]
+        )
+
+    def test_failed_stream_leaves_no_temp_file(self):
+        """Test that an error raised while streaming chunks removes the .tmp file."""
+        filepath = file_writer.generate_filename("https://site.com", compression='gzip')
+
+        def chunks():
+            yield "https://site.com"
+            yield "\n└── \udc80"  # Lone surrogate: UnicodeEncodeError mid-stream
+
+        with self.assertRaises(UnicodeEncodeError):
+            write_map_file(filepath, chunks(), compression='gzip')
+        leftovers = [n for n in os.listdir(self.temp_dir.name)
+                     if n.endswith((".tmp", ".gz"))]
+        self.assertEqual(leftovers, [])
+        self.assertFalse(os.path.exists(filepath + file_writer.LOCK_SUFFIX))
+
+    def test_compressed_map_is_rendered_and_digested_once(self):
+        """Test that a streamed map's digest comes from the chunks it writes."""
+        nav_data = {"https://site.com": {"name": "site", "children": {
+            "https://site.com/a": {"name": "A", "children": {}}}}}
+        expected = content_digest(format_tree(nav_data))
+        with mock.patch.object(concurrency_manager, "crawl_navigation", return_value=nav_data), \
+                mock.patch.object(concurrency_manager, "iter_format_tree",
+                                  wraps=concurrency_manager.iter_format_tree) as render:
+            result = concurrency_manager.process_single_url_task(
+                "https://site.com", "nav", compression='gzip'
+            )
+            self.assertEqual(result['digest'], expected)
+            writer = WriteBehindWriter(write_func=lambda path, content: write_map_file(
+                path, content, compression='gzip'))
+            result = concurrency_manager.process_single_url_task(
+                "https://site.com", "nav", compression='gzip', writer=writer
+            )
+            writer.close()
+            self.assertTrue(result['write_future'].result())
+            self.assertEqual(result['digest_chunks'].hexdigest(), expected)
+        self.assertEqual(render.call_count, 2)  # Once per task
+
+    def test_write_behind_coalesces_queued_writes(self):
+        """Test that queued writes to one path collapse into the newest."""
+        release = threading.Event()
+        written = []
+
+        def slow_write(filepath, content):
+            release.wait()
+            written.append((filepath, content))
+            return True
+
+        writer = WriteBehindWriter(write_func=slow_write)
+        blocker = writer.submit("first.md", "x")  # Occupies the writer thread
+        futures = [writer.submit("same.md", f"v{i}") for i in range(3)]
+        release.set()
+        writer.close()
+
+        self.assertTrue(blocker.result())
+        self.assertTrue(all(f.result() for f in futures))
+        self.assertEqual(written, [("first.md", "x"), ("same.md", "v2")])
+
+    def test_generate_filename_sharded(self):
+        """Test that the sharded layout nests maps under hashed prefixes."""
+        flat = file_writer.generate_filename("https://example.com/docs")
+        sharded = file_writer.generate_filename("https://example.com/docs", layout='sharded')
+        self.assertEqual(os.path.basename(flat), os.path.basename(sharded))
+        relative = os.path.relpath(sharded, self.temp_dir.name).split(os.sep)
+        self.assertEqual(len(relative), file_writer.SHARD_LEVELS + 1)
+        self.assertTrue(all(len(part) == 2 for part in relative[:-1]))
+
+    def test_migrate_flat_to_sharded(self):
+        """Test that migration moves flat maps and indexes them by URL."""
+        flat_path = os.path.join(self.temp_dir.name, "example_com_nav_map.md")
+        with open(flat_path, 'w', encoding='utf-8') as f:
+            f.write("https://example.com [truncated: deadline]\n└── https://example.com/a")
+
+        self.assertEqual(migrate_flat_to_sharded(self.temp_dir.name), 1)
+        entry = MapManifest(self.temp_dir.name).lookup("https://example.com")
+        self.assertIsNotNone(entry)
+        self.assertFalse(os.path.exists(flat_path))
+        self.assertEqual(
+            os.path.join(self.temp_dir.name, entry['path']),
+            file_writer.shard_path("example_com_nav_map.md", self.temp_dir.name)
+        )
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir.name, entry['path'])))
+
+    def test_sqlite_store_queries_and_export(self):
+        """Test storing maps in SQLite, querying nodes and exporting files."""
+        store = SqliteMapStore(os.path.join(self.temp_dir.name, "maps.sqlite"), batch_size=10)
+        self.addCleanup(store.close)
+        tree = {"https://a.com": {"name": "a", "children": {
+            "https://a.com/careers/": {"name": "Careers", "children": {}}}}}
+        self.assertTrue(store.write_map("https://a.com", "a_com_nav_map.md", "map a", tree))
+        self.assertTrue(store.write_map(
+            "https://b.com", "b_com_nav_map.md", "map b",
+            {"https://b.com": {"name": "b", "children": {}}}
+        ))
+        self.assertEqual(store.sites_linking_to("/careers"), ["https://a.com"])
+
+        export_dir = os.path.join(self.temp_dir.name, "export")
+        self.assertEqual(store.export_files(export_dir), 2)
+        with open(os.path.join(export_dir, "b_com_nav_map.md"), encoding='utf-8') as f:
+            self.assertEqual(f.read(), "map b")
+
+    def test_sqlite_store_failed_map_keeps_earlier_batch(self):
+        """Test that a failing map only rolls back itself, not the open batch."""
+        db_path = os.path.join(self.temp_dir.name, "maps.sqlite")
+        store = SqliteMapStore(db_path, batch_size=10)
+        self.assertTrue(store.write_map(
+            "https://a.com", "a_com_nav_map.md", "map a",
+            {"https://a.com": {"name": "a", "children": {}}}
+        ))
+        # A node name sqlite cannot bind fails after the map row was inserted
+        self.assertFalse(store.write_map(
+            "https://b.com", "b_com_nav_map.md", "map b",
+            {"https://b.com": {"name": object(), "children": {}}}
+        ))
+        self.assertTrue(store.write_map(
+            "https://c.com", "c_com_nav_map.md", "map c",
+            {"https://c.com": {"name": "c", "children": {}}}
+        ))
+        store.close()
+
+        reopened = SqliteMapStore(db_path)
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.get_markdown("https://a.com"), "map a")
+        self.assertIsNone(reopened.get_markdown("https://b.com"))
+        self.assertEqual(reopened.get_markdown("https://c.com"), "map c")
+
+
+if __name__ == '__main__':
+    unittest.main()
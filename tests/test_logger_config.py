@@ -0,0 +1,79 @@
+"""Unit tests for the queue-based logging setup in src.logger_config."""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+import logging  # Import logging unconditionally
+
+# Adjust path to import from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+try:
+    from src.logger_config import setup_logging, shutdown_logging, JsonFormatter
+except ImportError as e:
+    print(f"Error importing src modules in tests: {e}. Ensure tests are run from project root or PYTHONPATH is set.")
+    sys.exit(1)
+
+
+class TestLoggerConfig(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        # Leave the suite's usual quiet logging in place afterwards
+        self.addCleanup(setup_logging, level=logging.CRITICAL)
+
+    def test_queued_records_are_written_on_shutdown(self):
+        """Test that records reach the JSON file once the listener stops."""
+        setup_logging(log_dir=self.temp_dir.name, level=logging.DEBUG)
+        items = ["first"]
+        logging.getLogger("test.queue").debug("items: %s", items)
+        items.append("second")  # Message is resolved when logged, not later
+        shutdown_logging()
+        shutdown_logging()  # Idempotent
+
+        with open(os.path.join(self.temp_dir.name, "app.log"), encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        record = records[-1]
+        self.assertEqual(record['message'], "items: ['first']")
+        self.assertEqual(record['process'], os.getpid())
+        self.assertIn('hostname', record)
+
+    def test_json_formatter_keeps_exception_info(self):
+        """Test that exc_info survives the queue and is formatted as text."""
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            record = logging.getLogger("test.queue").makeRecord(
+                "test.queue", logging.ERROR, __file__, 1, "failed", None, sys.exc_info()
+            )
+        record = json.loads(JsonFormatter().format(record))
+        self.assertIn("ZeroDivisionError", record['exc_info'])
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "requires fork()")
+    def test_json_formatter_reports_forked_child_pid(self):
+        """Test that a formatter created before fork() logs the child's pid."""
+        formatter = JsonFormatter()
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # Child: format one record and report it
+            try:
+                record = logging.getLogger("test.fork").makeRecord(
+                    "test.fork", logging.INFO, __file__, 1, "child", None, None
+                )
+                os.write(write_fd, formatter.format(record).encode('utf-8'))
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd, 'rb') as pipe:
+            record = json.loads(pipe.read())
+        os.waitpid(pid, 0)
+        self.assertEqual(record['process'], pid)
+        self.assertNotEqual(record['process'], os.getpid())
+
+
+if __name__ == '__main__':
+    unittest.main()
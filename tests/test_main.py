@@ -0,0 +1,69 @@
+"""Unit tests for the batch command line in src.main."""
+
+import unittest
+import sys
+import os
+import re
+import io
+import json
+from contextlib import redirect_stderr, redirect_stdout
+from unittest import mock
+
+# main.py imports its siblings as top-level modules
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+try:
+    import main
+except ImportError as e:
+    print(f"Error importing src modules in tests: {e}. Ensure tests are run from project root or PYTHONPATH is set.")
+    sys.exit(1)
+
+
+class TestBatchCli(unittest.TestCase):
+
+    def test_parse_args_modes(self):
+        """Test that any selection option switches to batch mode."""
+        self.assertFalse(main.parse_args([]).batch)
+        args = main.parse_args(["--domain", "example.com", "--workers", "8"])
+        self.assertTrue(args.batch)
+        self.assertEqual(args.workers, 8)
+        self.assertTrue(main.parse_args(["--match", "docs"]).batch)
+
+    def test_row_matches(self):
+        """Test domain (with subdomains) and regex row filters."""
+        self.assertTrue(main.row_matches("https://docs.Example.com/a", ["example.com"]))
+        self.assertFalse(main.row_matches("https://notexample.com/", ["example.com"]))
+        self.assertTrue(main.row_matches("https://a.com/docs", pattern=re.compile("/docs")))
+        self.assertFalse(
+            main.row_matches("https://a.com/docs", ["b.com"], re.compile("/docs"))
+        )
+
+    def test_exit_codes(self):
+        """Test that partial failure is distinguishable from total failure."""
+        ok = {'status': 'success', 'url': 'https://a.com'}
+        failed = {'status': 'dlq', 'url': 'https://b.com', 'error': 'boom'}
+        cancelled = {'status': 'cancelled', 'url': 'https://c.com'}
+        self.assertEqual(main.exit_code_for(main.summarize_results([ok], 1.0)), main.EXIT_OK)
+        summary = main.summarize_results([ok, failed, cancelled], 1.0)
+        self.assertEqual((summary['failed'], summary['cancelled']), (1, 1))
+        self.assertEqual(main.exit_code_for(summary), main.EXIT_PARTIAL)
+        self.assertEqual(main.exit_code_for(main.summarize_results([failed], 1.0)), main.EXIT_FAILURE)
+        self.assertEqual(main.exit_code_for(main.summarize_results([], 0.0)), main.EXIT_FAILURE)
+
+    def test_summary_to_stdout_is_pure_json(self):
+        """Test that '--summary -' keeps the human-readable line off stdout."""
+        manager = mock.Mock(max_workers=1)
+        manager.process_tasks.return_value = [{'status': 'success', 'url': 'https://a.com'}]
+        args = main.parse_args(["--domain", "a.com", "--summary", "-"])
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with mock.patch.object(main, "build_manager", return_value=manager), \
+                mock.patch.object(main, "selected_rows", return_value=[]), \
+                redirect_stdout(stdout), redirect_stderr(stderr):
+            self.assertEqual(main.run_batch(args), main.EXIT_OK)
+        self.assertEqual(json.loads(stdout.getvalue())['succeeded'], 1)
+        self.assertIn("Processed 1 site(s)", stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""Unit tests for the metrics registry in src.metrics."""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+from unittest import mock
+
+# Adjust path to import from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+try:
+    from src.metrics import MetricsRegistry
+    from src import crawler, metrics
+except ImportError as e:
+    print(f"Error importing src modules in tests: {e}. Ensure tests are run from project root or PYTHONPATH is set.")
+    sys.exit(1)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_prometheus_text_format(self):
+        """Test counter labels and cumulative histogram buckets."""
+        responses = self.registry.counter('http_responses_total', "Responses.")
+        responses.inc(code=200)
+        responses.inc(2, code=404)
+        latency = self.registry.histogram('fetch_seconds', "Latency.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            latency.observe(value)
+
+        text = self.registry.to_prometheus()
+        self.assertIn("# TYPE fetch_seconds histogram", text)
+        self.assertIn('fetch_seconds_bucket{le="0.1"} 1\n', text)
+        self.assertIn('fetch_seconds_bucket{le="1.0"} 3\n', text)
+        self.assertIn('fetch_seconds_bucket{le="+Inf"} 4\n', text)
+        self.assertIn("fetch_seconds_count 4\n", text)
+        self.assertIn('http_responses_total{code="404"} 2\n', text)
+
+    def test_json_summary_estimates_percentiles(self):
+        """Test that the JSON summary interpolates quantiles within buckets."""
+        latency = self.registry.histogram('fetch_seconds', "Latency.", buckets=(1.0, 2.0))
+        for _ in range(50):
+            latency.observe(0.5)
+        for _ in range(50):
+            latency.observe(1.5)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "metrics.json")
+            self.registry.write_json(path)
+            with open(path, encoding='utf-8') as f:
+                summary = json.load(f)['fetch_seconds']['total']
+        self.assertEqual(summary['count'], 100)
+        self.assertAlmostEqual(summary['p50'], 1.0)
+        self.assertAlmostEqual(summary['p99'], 1.98)
+
+    def test_kind_conflict_is_rejected(self):
+        self.registry.counter('pages', "Pages.")
+        with self.assertRaises(ValueError):
+            self.registry.gauge('pages', "Pages.")
+
+
+class TestFetchInstrumentation(unittest.TestCase):
+
+    def test_fetch_records_status_bytes_and_latency(self):
+        """Test that fetch_html feeds the process-wide crawler metrics."""
+        response = mock.Mock(
+            status_code=200, content=b"<html></html>", text="<html></html>",
+            headers={'content-type': 'text/html'}
+        )
+        session = mock.Mock()
+        session.get.return_value = response
+        before = (
+            metrics.HTTP_RESPONSES.value(code=200), metrics.FETCH_BYTES.value(),
+            metrics.DECODE_SOURCES.value(source='utf-8')
+        )
+        with mock.patch.object(crawler, 'get_session', return_value=session):
+            self.assertEqual(
+                crawler.fetch_html("https://example.com"), (b"<html></html>", 'utf-8')
+            )
+        self.assertEqual(metrics.HTTP_RESPONSES.value(code=200), before[0] + 1)
+        self.assertEqual(metrics.FETCH_BYTES.value(), before[1] + 13)
+        self.assertEqual(metrics.DECODE_SOURCES.value(source='utf-8'), before[2] + 1)
+        self.assertEqual(metrics.FETCHES_IN_FLIGHT.value(), 0)
+        self.assertGreaterEqual(metrics.REGISTRY.summary()['crawler_fetch_seconds']['total']['count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
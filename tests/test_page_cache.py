@@ -0,0 +1,104 @@
+"""Unit tests for the shared page cache in src.page_cache."""
+
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Adjust path to import from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+try:
+    from src.page_cache import PageCache
+    from src.utils import canonicalize_url
+except ImportError as e:
+    print(
+        f"Error importing src modules in tests: {e}. Ensure tests are run from project root or PYTHONPATH is set."
+    )
+    sys.exit(1)
+
+
+class TestPageCache(unittest.TestCase):
+
+    def test_canonicalize_url(self):
+        """Test that equivalent URL spellings share a cache key."""
+        self.assertEqual(
+            canonicalize_url("HTTPS://Example.COM:443#top"), "https://example.com/"
+        )
+        self.assertEqual(
+            canonicalize_url("http://example.com:8080/a?b=1"),
+            "http://example.com:8080/a?b=1"
+        )
+
+    def test_hit_after_load(self):
+        """Test that a second lookup is served from the cache."""
+        cache = PageCache()
+        links = [("A", "https://x.com/a")]
+        self.assertEqual(
+            cache.get_or_load("https://x.com/en", "nav", lambda: links),
+            (links, False)
+        )
+        self.assertEqual(
+            cache.get_or_load("https://X.com/en#frag", "nav", lambda: None),
+            (links, True)
+        )
+        # A different selector is a different key
+        self.assertEqual(
+            cache.get_or_load("https://x.com/en", "#menu", lambda: []),
+            ([], False)
+        )
+
+    def test_single_flight(self):
+        """Test that concurrent misses for one key trigger a single load."""
+        cache = PageCache()
+        calls = []
+
+        def slow_loader():
+            calls.append(1)
+            time.sleep(0.05)
+            return [("A", "https://x.com/a")]
+
+        threads = [
+            threading.Thread(
+                target=cache.get_or_load,
+                args=("https://x.com/", "nav", slow_loader)
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()['hits'], 4)
+
+    def test_failed_load_is_not_cached(self):
+        """Test that a loader exception propagates and is retried later."""
+        cache = PageCache()
+
+        def failing_loader():
+            raise IOError("boom")
+
+        with self.assertRaises(IOError):
+            cache.get_or_load("https://x.com/", "nav", failing_loader)
+        self.assertEqual(
+            cache.get_or_load("https://x.com/", "nav", lambda: []), ([], False)
+        )
+
+    def test_memory_bound_evicts_lru(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = PageCache(max_bytes=1000)
+        link = [("x" * 100, "https://x.com/" + "y" * 100)]
+        cache.get_or_load("https://x.com/1", "nav", lambda: link)
+        cache.get_or_load("https://x.com/2", "nav", lambda: link)
+        cache.get_or_load("https://x.com/1", "nav", lambda: None)  # Touch 1
+        cache.get_or_load("https://x.com/3", "nav", lambda: link)
+        self.assertLessEqual(cache.size_bytes, 1000)
+        _, hit = cache.get_or_load("https://x.com/2", "nav", lambda: link)
+        self.assertFalse(hit)
+
+
+if __name__ == '__main__':
+    unittest.main()
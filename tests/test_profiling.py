@@ -0,0 +1,94 @@
+"""Unit tests for the per-task profiler in src.profiling."""
+
+import unittest
+import sys
+import os
+import json
+import pstats
+import tempfile
+import time
+from unittest import mock
+
+# Adjust path to import from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+try:
+    from src import concurrency_manager
+    from src.concurrency_manager import ConcurrencyManager
+    from src.profiling import TaskProfiler, RUN_PROFILE_FILENAME, TASK_TIMES_FILENAME
+except ImportError as e:
+    print(f"Error importing src modules in tests: {e}. Ensure tests are run from project root or PYTHONPATH is set.")
+    sys.exit(1)
+
+
+def fake_task(url, wait):
+    time.sleep(wait)  # Stands in for network I/O
+    return {'status': 'success', 'url': url}
+
+
+class TestTaskProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def test_selection_by_pattern(self):
+        profiler = TaskProfiler(self.temp_dir.name, match=r"example\.org")
+        self.assertTrue(profiler.should_profile("https://example.org/docs"))
+        self.assertFalse(profiler.should_profile("https://example.com/"))
+        with self.assertRaises(ValueError):
+            TaskProfiler(self.temp_dir.name, sample_rate=0)
+
+    def test_per_task_profiles_and_run_summary(self):
+        """Test that tasks are dumped, merged and split into CPU and wait time."""
+        profiler = TaskProfiler(self.temp_dir.name)
+        for url in ("https://a.com", "https://b.com"):
+            result = profiler.run(url, fake_task, url, 0.05)
+            self.assertEqual(result['url'], url)
+
+        run_path = profiler.write_summary()
+        self.assertEqual(run_path, os.path.join(self.temp_dir.name, RUN_PROFILE_FILENAME))
+        functions = {func[2] for func in pstats.Stats(run_path).stats}
+        self.assertIn('fake_task', functions)
+        with open(os.path.join(self.temp_dir.name, TASK_TIMES_FILENAME)) as f:
+            task_times = json.load(f)
+        self.assertEqual([t['url'] for t in task_times], ["https://a.com", "https://b.com"])
+        for times in task_times:
+            self.assertTrue(os.path.exists(times['profile']))
+            self.assertGreaterEqual(times['wait'], 0.04)  # The sleep is not CPU time
+
+    def test_resumed_task_is_profiled_once(self):
+        """Test that a task suspended for a retry is sampled once and gets one merged profile."""
+        profiler = TaskProfiler(self.temp_dir.name, sample_rate=0.5)
+        outcomes = iter([
+            {'status': 'retry_later', 'url': "https://a.com",
+             'crawl_state': object(), 'resume_at': time.monotonic()},
+            {'status': 'success', 'url': "https://a.com"},
+        ])
+
+        def fake_run(*args, **kwargs):
+            fake_task("https://a.com", 0.02)
+            return next(outcomes)
+
+        manager = ConcurrencyManager(max_workers=1, profiler=profiler)
+        self.addCleanup(manager.shutdown)
+        with mock.patch.object(concurrency_manager, "process_single_url_task",
+                               side_effect=fake_run), \
+                mock.patch.object(profiler, "should_profile", return_value=True) as sample:
+            suspended = manager._run_task("https://a.com", "nav", None)
+            self.assertEqual(profiler.task_times(), [])  # Not finished yet
+            time.sleep(0.05)  # Parked waiting for the retry
+            result = manager._run_task("https://a.com", "nav", None, suspended['resume'])
+        self.assertEqual(result['status'], 'success')
+        sample.assert_called_once_with("https://a.com")
+        task_times = profiler.task_times()
+        self.assertEqual(len(task_times), 1)
+        self.assertEqual(task_times[0]['runs'], 2)
+        self.assertGreaterEqual(task_times[0]['wait'], 0.08)  # Sleeps plus parked time
+        stats = pstats.Stats(task_times[0]['profile'])
+        calls = [v[1] for k, v in stats.stats.items() if k[2] == 'fake_task']
+        self.assertEqual(calls, [2])  # Both runs merged into one profile
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""Unit tests for the aggregated progress reporter in src.progress."""
+
+import unittest
+import sys
+import os
+import io
+
+# Adjust path to import from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+try:
+    from src.progress import ProgressReporter
+except ImportError as e:
+    print(f"Error importing src modules in tests: {e}. Ensure tests are run from project root or PYTHONPATH is set.")
+    sys.exit(1)
+
+
+class TestProgressReporter(unittest.TestCase):
+
+    def test_aggregates_across_sites(self):
+        """Test that page counts combine in-flight and finished sites."""
+        reporter = ProgressReporter(interval=60, stream=io.StringIO(), tty=True)
+        reporter.start(total=3)
+        reporter.task_started("https://a.com")
+        reporter.task_started("https://b.com")
+        reporter.update("https://a.com", {'pages': 4})
+        reporter.update("https://b.com", {'pages': 7})
+        reporter.task_finished("https://a.com", 'success')
+        reporter.task_finished("https://c.com", 'dlq')
+        snapshot = reporter.snapshot()
+        reporter.stop()
+
+        self.assertEqual(snapshot['pages'], 11)
+        self.assertEqual(
+            (snapshot['done'], snapshot['failed'], snapshot['in_flight']), (2, 1, 1)
+        )
+        self.assertEqual(snapshot['busiest'], [("https://b.com", 7)])
+
+    def test_non_tty_writes_status_log_lines(self):
+        """Test that non-terminal output becomes key=value log lines."""
+        stream = io.StringIO()
+        reporter = ProgressReporter(interval=60, stream=stream, tty=False)
+        reporter.start(total=None)
+        with self.assertLogs("src.progress", level="INFO") as logs:
+            reporter.stop()
+        self.assertEqual(stream.getvalue(), "")
+        self.assertIn("done=0 total=None", logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""Unit tests for task scheduling in src.scheduler."""
+
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Adjust path to import from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+try:
+    from src.scheduler import (
+        registered_domain, DomainScheduler, longest_expected_first
+    )
+    from src import crawl_history
+    from src.crawl_history import CrawlHistory
+except ImportError as e:
+    print(
+        f"Error importing src modules in tests: {e}. Ensure tests are run from project root or PYTHONPATH is set."
+    )
+    sys.exit(1)
+
+
+class TestScheduler(unittest.TestCase):
+
+    def test_registered_domain(self):
+        """Test grouping URLs by registered domain."""
+        test_cases = {
+            "https://docs.example.com/en": "example.com",
+            "https://EXAMPLE.com:8080/": "example.com",
+            "https://shop.example.co.uk/a": "example.co.uk",
+            "http://192.168.1.1/admin": "192.168.1.1",
+            "http://localhost:8000/": "localhost",
+        }
+        for url, expected in test_cases.items():
+            with self.subTest(url=url):
+                self.assertEqual(registered_domain(url), expected)
+
+    def test_round_robin_across_domains(self):
+        """Test that tasks for one domain are spread between other domains."""
+        scheduler = DomainScheduler()
+        for task in [("https://a.com/1", "nav"), ("https://a.com/2", "nav"),
+                     ("https://a.com/3", "nav"), ("https://b.com/1", "nav"),
+                     ("https://c.com/1", "nav")]:
+            scheduler.add(task)
+        order = []
+        while len(scheduler):
+            order.append(scheduler.next_task()[0])
+        self.assertEqual(order, [
+            "https://a.com/1", "https://b.com/1", "https://c.com/1",
+            "https://a.com/2", "https://a.com/3",
+        ])
+
+    def test_max_per_domain_cap(self):
+        """Test that a capped domain yields nothing until a slot is released."""
+        scheduler = DomainScheduler(max_per_domain=1)
+        first = ("https://a.com/1", "nav")
+        scheduler.add(first)
+        scheduler.add(("https://www.a.com/2", "nav"))
+        self.assertEqual(scheduler.next_task(), first)
+        self.assertIsNone(scheduler.next_task())
+        scheduler.task_done(first)
+        self.assertEqual(scheduler.next_task(), ("https://www.a.com/2", "nav"))
+        self.assertEqual(len(scheduler), 0)
+
+    def test_drain_returns_pending_tasks(self):
+        """Test that drain empties the scheduler."""
+        scheduler = DomainScheduler()
+        scheduler.add(("https://a.com/1", "nav"))
+        scheduler.add(("https://b.com/1", "nav"))
+        self.assertEqual(len(scheduler.drain()), 2)
+        self.assertIsNone(scheduler.next_task())
+
+    def test_longest_expected_first(self):
+        """Test that sites with the longest history run first."""
+        history = CrawlHistory(path=None)
+        history.record("https://big.com", pages=5000, duration=600.0)
+        history.record("https://small.com", pages=10, duration=2.0)
+        history.record("https://mid.com", pages=100, duration=20.0)
+        scheduler = DomainScheduler(priority=longest_expected_first(history))
+        for url in ["https://small.com", "https://new.com", "https://big.com",
+                    "https://mid.com"]:
+            scheduler.add((url, "nav"))
+        order = [scheduler.next_task()[0] for _ in range(4)]
+        # Unknown sites are estimated at the median of known durations
+        self.assertEqual(order, [
+            "https://big.com", "https://new.com", "https://mid.com",
+            "https://small.com",
+        ])
+
+    def test_history_smooths_durations(self):
+        """Test that repeated runs are folded into a moving average."""
+        history = CrawlHistory(path=None)
+        history.record("https://a.com", pages=10, duration=10.0)
+        history.record("https://a.com", pages=20, duration=30.0)
+        self.assertEqual(history.estimate("https://a.com"), 20.0)
+        self.assertEqual(history.get("https://a.com")["runs"], 2)
+
+    def test_history_default_estimate_is_lazy(self):
+        """Test that the median default is recomputed on demand, not per record."""
+        history = CrawlHistory(path=None)
+        with mock.patch.object(
+            crawl_history.statistics, "median", wraps=crawl_history.statistics.median
+        ) as median:
+            for i in range(50):
+                history.record(f"https://site{i}.com", pages=1, duration=float(i))
+            median.assert_not_called()
+            self.assertEqual(history.estimate("https://new.com"), 24.5)
+            self.assertEqual(history.estimate("https://other.com"), 24.5)
+            self.assertEqual(median.call_count, 1)
+            history.record("https://site50.com", pages=1, duration=50.0)
+            self.assertEqual(history.estimate("https://new.com"), 25.0)
+            self.assertEqual(median.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Startup-cost regression checks for the CLI entry point (src/main.py)."""
+
+import unittest
+import sys
+import os
+import json
+import subprocess
+import tempfile
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(project_root, 'src')
+
+# Modules that belong to the crawl stack and must not load before a crawl
+HEAVY_MODULES = (
+    'requests', 'urllib3', 'bs4', 'tqdm', 'sqlite3', 'http.client', 'asyncio',
+    'crawler', 'concurrency_manager', 'map_store',
+)
+# `import main` may take at most this fraction of the time the crawl stack
+#  then takes to import, both measured in the same interpreter, so machine
+#  speed and load cancel out. The light import measures ~0.25 of it; an
+#  eager crawl stack makes main take all of it.
+STARTUP_BUDGET_FRACTION = 0.5
+# Reports the modules loaded by `import main` on stdout, then imports the
+#  crawl stack as the reference for the budget
+_LOADED_MODULES_SCRIPT = (
+    "import sys, json, main; print(json.dumps(sorted(sys.modules))); "
+    "import concurrency_manager"
+)
+
+
+def _run_with_import_times(args, cwd):
+    """
+    Runs Python with -X importtime.
+
+    Returns:
+        tuple: (returncode, stdout, {module: cumulative_us}).
+    """
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        cwd=cwd, env=env, capture_output=True, text=True, timeout=60
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return completed.returncode, completed.stdout, times
+
+
+class TestStartup(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def test_import_is_light_and_side_effect_free(self):
+        """Test that importing main skips the crawl stack and creates no logs."""
+        returncode, stdout, times = _run_with_import_times(
+            ['-c', _LOADED_MODULES_SCRIPT], self.temp_dir.name
+        )
+        self.assertEqual(returncode, 0)
+        loaded = set(json.loads(stdout))
+        self.assertIn('main', loaded)
+        self.assertEqual([m for m in HEAVY_MODULES if m in loaded], [])
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+        # Missing from the trace if main already imported the crawl stack
+        crawl_stack = times.get('concurrency_manager', 0)
+        self.assertLess(times['main'], STARTUP_BUDGET_FRACTION * crawl_stack)
+
+    def test_help_skips_crawl_stack(self):
+        """Test that --help returns without importing the crawl stack."""
+        returncode, _, times = _run_with_import_times(
+            [os.path.join(SRC_DIR, 'main.py'), '--help'], self.temp_dir.name
+        )
+        self.assertEqual(returncode, 0)
+        self.assertEqual([m for m in HEAVY_MODULES if m in times], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
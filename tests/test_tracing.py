@@ -0,0 +1,72 @@
+"""Unit tests for Chrome trace span recording in src.tracing."""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+import threading
+
+# Adjust path to import from src
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+try:
+    from src import tracing
+except ImportError as e:
+    print(f"Error importing src modules in tests: {e}. Ensure tests are run from project root or PYTHONPATH is set.")
+    sys.exit(1)
+
+
+class TestTracing(unittest.TestCase):
+
+    def tearDown(self):
+        tracing.stop_tracing()
+
+    def test_span_is_noop_when_tracing_is_off(self):
+        self.assertIs(tracing.span('fetch', url="https://a.com"), tracing._NULL_SPAN)
+
+    def test_spans_from_threads_are_written_per_thread(self):
+        """Test that each thread's spans land on their own named track."""
+        tracing.start_tracing()
+
+        def worker(url):
+            with tracing.span('task', url=url):
+                with tracing.span('fetch', url=url):
+                    pass
+
+        threads = [
+            threading.Thread(target=worker, args=(f"https://{name}.com",), name=f"Worker-{name}")
+            for name in ("a", "b")
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "trace.json")
+            tracing.stop_tracing(path)
+            with open(path) as f:
+                events = json.load(f)['traceEvents']
+
+        thread_names = {
+            event['tid']: event['args']['name']
+            for event in events if event['name'] == 'thread_name'
+        }
+        spans = [event for event in events if event['ph'] == 'X']
+        self.assertEqual(len(spans), 4)
+        for event in spans:
+            # Each span sits on the track of the thread that recorded it
+            host = event['args']['url'].split('//')[1][0]
+            self.assertEqual(thread_names[event['tid']], f"Worker-{host}")
+        task, fetch = sorted(
+            (e for e in spans if e['args']['url'] == "https://a.com"),
+            key=lambda e: e['name'], reverse=True
+        )
+        self.assertLessEqual(task['ts'], fetch['ts'])
+        self.assertGreaterEqual(task['ts'] + task['dur'], fetch['ts'] + fetch['dur'])
+
+
+if __name__ == '__main__':
+    unittest.main()
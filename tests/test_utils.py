@@ -1,5 +1,7 @@
 """Unit tests for utility functions in src.utils."""
 
+import asyncio
+import inspect
 import unittest
 import sys
 import os
@@ -9,8 +11,7 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
 try:
-    from src.utils import get_website_name
-    # retry_with_backoff (Decorator testing is more complex)
+    from src.utils import get_website_name, retry_with_backoff, RetryLater
 except ImportError as e:
     print(
         f"Error importing src modules in tests: {e}. Ensure tests are run from project root or PYTHONPATH is set."
@@ -60,12 +61,41 @@ class TestUtils(unittest.TestCase):
                     [expected_name, "invalid_url_parsing_error"]
                 )
 
-    # Testing the retry decorator is more involved and often requires mocking
-    #  time.sleep
-    # and potentially the decorated function's behavior. Skipping for this
-    #  basic setup.
-    # def test_retry_decorator(self):
-    #     pass
+    def test_retry_deferred_mode_raises_retry_later(self):
+        """Test that retry_attempt=n makes one attempt and never sleeps."""
+        calls = []
+
+        @retry_with_backoff(retries=2, initial_delay=10, backoff_factor=3,
+                            jitter=0, retry_exceptions=(ValueError,))
+        def flaky():
+            calls.append(1)
+            raise ValueError("down")
+
+        with self.assertRaises(RetryLater) as first:
+            flaky(retry_attempt=0)
+        self.assertEqual((first.exception.attempt, first.exception.delay), (1, 10))
+        with self.assertRaises(RetryLater) as second:
+            flaky(retry_attempt=1)
+        self.assertEqual((second.exception.attempt, second.exception.delay), (2, 30))
+        with self.assertRaises(ValueError):
+            flaky(retry_attempt=2)  # Retries exhausted: the error itself
+        self.assertEqual(len(calls), 3)
+
+    def test_retry_wraps_coroutines(self):
+        """Test that coroutine functions are retried with awaited backoff."""
+        calls = []
+
+        @retry_with_backoff(retries=2, initial_delay=0.01,
+                            retry_exceptions=(ValueError,))
+        async def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise ValueError("down")
+            return "ok"
+
+        self.assertTrue(inspect.iscoroutinefunction(flaky))
+        self.assertEqual(asyncio.run(flaky()), "ok")
+        self.assertEqual(len(calls), 3)
 
 
 if __name__ == '__main__':